@@ -1,8 +1,6 @@
 #!/usr/bin/env python
 
 import os
-from pyats.easypy import run
-from genie.testbed import load
 
 def main(runtime):
     """
@@ -11,7 +9,8 @@ def main(runtime):
     # Get absolute path for testbed file
     testbed_path = os.path.join(os.path.dirname(__file__), 'testbed.yaml')
     
-    # Load the testbed file
+    # Load the testbed file, genie is only imported once the job actually runs
+    from genie.testbed import load
     testbed = load(testbed_path)
     
     # Get script path
@@ -25,4 +24,5 @@ def main(runtime):
     )
 
 if __name__ == '__main__':
+    from pyats.easypy import run
     run(main)
\ No newline at end of file
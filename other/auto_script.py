@@ -3,8 +3,9 @@
 import logging
 import os
 from pyats import aetest
-from pyats.log.utils import banner
-from genie.testbed import load
+
+from check_testcase import CheckTestcase
+from rate_limit import CommandGovernor
 
 log = logging.getLogger(__name__)
 
@@ -25,70 +26,34 @@ class common_setup(aetest.CommonSetup):
             log.error(f"Failed to connect to device: {str(e)}")
             self.failed(f"Failed to connect to device: {str(e)}")
 
+    @aetest.subsection
+    def configure_rate_limits(self, testbed):
+        """Send every command through the testbed rate limits (rate_limit.py)"""
+        self.parent.parameters['governor'] = CommandGovernor.from_testbed(testbed)
+
     @aetest.subsection
     def loop_mark(self, testbed):
         """Mark testcases to run per device"""
         aetest.loop.mark(SimpleTest, device_name=list(testbed.devices.keys()))
 
 # Your SimpleTest class and other classes remain the same...
-class SimpleTest(aetest.Testcase):
+class SimpleTest(CheckTestcase):
     """A basic connectivity test"""
 
+    # Registry checks run by the tests below (checks.py)
+    checks = ('ping_test', 'ping_peer_ip', 'ping_pc_hosts')
+
     @aetest.test
     def ping_test(self, testbed, device_name):
-        device = testbed.devices[device_name]
-        try:
-            ip = device.connections.cli.ip
-            log.info(f"Pinging {device_name} at {ip}")
-            result = device.execute(f"ping {ip}")
-            if "Success rate is 0 percent" in result:
-                self.failed(f"Ping to {device_name} failed")
-        except Exception as e:
-            self.failed(f"Error executing ping on {device_name}: {str(e)}")
+        self.run_check(testbed.devices[device_name], 'ping_test')
 
     @aetest.test
     def ping_peer_ip(self, testbed, device_name):
-        device = testbed.devices[device_name]
-        try:
-            # Define peer IP mapping
-            peer_ips = {
-                'R1': '172.16.0.2',  # R2's IP
-                'R2': '172.16.0.1'   # R1's IP
-            }
-            
-            # Get peer IP for current device
-            if device_name in peer_ips:
-                peer_ip = peer_ips[device_name]
-                log.info(f"Device {device_name} pinging peer IP {peer_ip}")
-                result = device.execute(f"ping {peer_ip}")
-                if "Success rate is 0 percent" in result:
-                    self.failed(f"Ping from {device_name} to {peer_ip} failed")
-                else:
-                    log.info(f"Ping from {device_name} to {peer_ip} successful")
-        except Exception as e:
-            self.failed(f"Error executing peer ping on {device_name}: {str(e)}")
+        self.run_check(testbed.devices[device_name], 'ping_peer_ip')
 
     @aetest.test
     def ping_pc_hosts(self, testbed, device_name):
-        device = testbed.devices[device_name]
-        try:
-            # Define PC host IPs
-            pc_ips = {
-                'PC1': '172.16.1.1',
-                'PC2': '172.16.2.1'
-            }
-            
-            # Try to ping each PC from the current device
-            for pc_name, pc_ip in pc_ips.items():
-                log.info(f"Device {device_name} pinging {pc_name} at {pc_ip}")
-                result = device.execute(f"ping {pc_ip}")
-                if "Success rate is 0 percent" in result:
-                    self.failed(f"Ping from {device_name} to {pc_name}({pc_ip}) failed")
-                else:
-                    log.info(f"Ping from {device_name} to {pc_name}({pc_ip}) successful")
-                    
-        except Exception as e:
-            self.failed(f"Error executing PC ping test on {device_name}: {str(e)}")
+        self.run_check(testbed.devices[device_name], 'ping_pc_hosts')
 
 class CommonCleanup(aetest.CommonCleanup):
     """Cleanup Section"""
@@ -102,6 +67,8 @@ class CommonCleanup(aetest.CommonCleanup):
 
 
 if __name__ == '__main__':
+    from genie.testbed import load
+    
     # Set log level for standalone execution
     log.setLevel(logging.INFO)
     
@@ -0,0 +1,69 @@
+#!/usr/bin/env python
+
+"""Capture of raw command outputs and verdicts from a Sanity_Check run.
+
+The capture is a JSON lines file with two record types:
+
+    {"type": "output", "device": "R1", "test": "...", "command": "...", "output": "..."}
+    {"type": "verdict", "device": "R1", "test": "...", "verdict": "passed", "message": "...",
+     "replayable": true, "duration": 1.23, "timestamp": 1700000000.0}
+
+offline_eval.py reads it back to re-run the evaluation logic without devices.
+Each run starts the file afresh, so a capture holds the outputs of one run.
+"""
+
+import json
+import logging
+import time
+
+log = logging.getLogger(__name__)
+
+
+class OutputCapture(object):
+    """Writer for the command outputs and test verdicts of one run"""
+
+    def __init__(self, path):
+        self.path = path
+        # Truncated: records of an earlier run would mix with this one's
+        self._file = open(path, 'w', encoding='utf-8')
+        self._concluded = set()
+        log.info(f"Capturing command outputs to {path}")
+
+    def _write(self, record):
+        self._file.write(json.dumps(record) + '\n')
+
+    def output(self, device_name, test, command, output):
+        """Record the raw output of a command issued by a test"""
+        self._write({'type': 'output', 'device': device_name, 'test': test,
+                     'command': command, 'output': output})
+
+    def verdict(self, device_name, test, verdict, message, replayable=True, duration=None):
+        """Record the verdict of a test, only the first one per test counts"""
+        key = (device_name, test)
+        if key in self._concluded:
+            return
+        self._concluded.add(key)
+        self._write({'type': 'verdict', 'device': device_name, 'test': test,
+                     'verdict': verdict, 'message': message,
+                     'replayable': replayable, 'duration': duration,
+                     'timestamp': time.time()})
+
+    def close(self):
+        self._file.close()
+
+
+def load_capture(path):
+    """Load a capture file into {device: {test: {'outputs': [...], 'verdict': {...}}}}"""
+    devices = {}
+    with open(path, encoding='utf-8') as capture_file:
+        for line in capture_file:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            tests = devices.setdefault(record['device'], {})
+            entry = tests.setdefault(record['test'], {'outputs': [], 'verdict': None})
+            if record['type'] == 'output':
+                entry['outputs'].append((record['command'], record['output']))
+            elif record['type'] == 'verdict':
+                entry['verdict'] = record
+    return devices
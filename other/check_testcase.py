@@ -0,0 +1,83 @@
+#!/usr/bin/env python
+
+"""aetest base class running registry checks (checks.py) as per-device tests.
+
+A looped Testcase deriving from CheckTestcase lists its checks and runs
+each test as a one-liner:
+
+    class Connectivity_Test(CheckTestcase):
+        checks = ('ping_test', 'ping_peer_ip')
+
+        @aetest.test
+        def ping_test(self, testbed, device_name):
+            self.run_check(testbed.devices[device_name], 'ping_test')
+
+Each command is issued once per device, in the variant of its OS
+(platforms.py), and the tests of a device share its outputs. Thresholds
+and targets can be overridden with a ``check_settings`` script argument
+(see checks.DEFAULT_SETTINGS). With a true ``restconf`` parameter, the
+checks with a structured evaluation read devices with a restconf testbed
+connection over RESTCONF (restconf.py). With a ``governor`` parameter
+(rate_limit.CommandGovernor), commands are sent under its rate limits.
+On a resumed run, a check with a verdict in the ``completed`` parameter
+(checkpoint.py) concludes with it without running.
+"""
+
+import logging
+from pyats import aetest
+
+from checkpoint import COMPLETED
+from checks import plan, run_checks
+
+log = logging.getLogger(__name__)
+
+
+class CheckTestcase(aetest.Testcase):
+    """Testcase whose tests are registry checks sharing the device outputs"""
+
+    # Checks run by the tests of the subclass, in order
+    checks = ()
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._outputs = {}  # Device -> {command: output}
+        self._device_outputs = {}  # Device -> {OS variant command: output}
+        self._restconf = None  # restconf.StructuredCollector, with a restconf parameter
+
+    def run_check(self, device, name):
+        """Run one check on device and pass or fail the test with its message"""
+        verdict = (self.parameters.get('completed') or {}).get(device.name, {}).get(name)
+        if verdict in COMPLETED:
+            # aetest has a result method named after each verdict
+            getattr(self, verdict)(f"{name} on {device.name} {verdict} in a previous run "
+                                   f"(checkpoint)")
+        settings = self.parameters.get('check_settings')
+        if self.parameters.get('restconf'):
+            if self._restconf is None:
+                from restconf import StructuredCollector
+                self._restconf = StructuredCollector()
+            settings = dict(settings or {}, structured=self._restconf)
+        if device.name not in self._outputs:
+            commands, _ = plan(device, self.checks, settings)
+            log.info(f"{len(commands)} commands planned for {len(self.checks)} checks "
+                     f"on {device.name}")
+        outputs = self._outputs.setdefault(device.name, {})
+        governor = self.parameters.get('governor')
+
+        def execute(command):
+            if governor is None:
+                return device.execute(command)
+            return governor.execute(device.execute, device.name, command)
+
+        result = run_checks(device, [name], execute, settings, outputs=outputs,
+                            device_outputs=self._device_outputs.setdefault(device.name, {}))[name]
+        if result['verdict'] != 'passed':
+            self.failed(result['message'])
+        log.info(result['message'])
+
+    @aetest.cleanup
+    def close_restconf(self):
+        """Close the RESTCONF connections of this testcase"""
+        if self._restconf is not None:
+            self._restconf.close()
+            self._restconf = None
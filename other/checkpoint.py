@@ -0,0 +1,101 @@
+#!/usr/bin/env python
+
+"""Checkpoint of completed device x check results, to resume interrupted jobs.
+
+The checkpoint is a result stream (health_matrix.py) kept across runs:
+every concluded test appends one JSON line, flushed at once and synced to
+disk every few seconds, so a run killed at device 3000 of 5000 leaves the
+results of the first 3000 behind. Resuming reads it back, the task
+scripts only connect to and test the devices with checks left, and replay
+the recorded verdict of the checks already done:
+
+    pyats run job all_tests_job.py --checkpoint run.jsonl
+    pyats run job all_tests_job.py --checkpoint run.jsonl --resume
+
+Only passed, passx, failed and skipped results count as completed; the
+aborted, blocked and errored ones an interrupted run leaves behind are
+run again. Replayed verdicts are not appended to the checkpoint again.
+Without --checkpoint nothing is checkpointed. A partly written last line,
+from a run killed mid-write, is ignored.
+"""
+
+import json
+import logging
+import os
+import time
+
+from health_matrix import VERDICTS, ResultStream
+
+log = logging.getLogger(__name__)
+
+# Verdicts of a check that ran to its end, not run again on resume
+COMPLETED = ('passed', 'passx', 'failed', 'skipped')
+
+
+def _ends_with_newline(path):
+    with open(path, 'rb') as checkpoint_file:
+        checkpoint_file.seek(-1, os.SEEK_END)
+        return checkpoint_file.read(1) == b'\n'
+
+
+class Checkpoint(ResultStream):
+    """Result stream synced to disk at most every sync_interval seconds"""
+
+    def __init__(self, path, sync_interval=5.0):
+        super().__init__(path)
+        # End a line cut short by a killed run, so the next record stays readable
+        if self._file.tell() and not _ends_with_newline(path):
+            self._file.write('\n')
+        self.sync_interval = sync_interval
+        self._synced = time.monotonic()
+
+    def record(self, device_name, check, verdict, task=None):
+        super().record(device_name, check, verdict, task)
+        now = time.monotonic()
+        if now - self._synced >= self.sync_interval:
+            with self._lock:
+                os.fsync(self._file.fileno())
+            self._synced = now
+
+    def close(self):
+        with self._lock:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+        super().close()
+
+
+def read_checkpoint(path):
+    """Records of a checkpoint file in order, [] when it does not exist"""
+    records = []
+    try:
+        with open(path, encoding='utf-8') as checkpoint_file:
+            for line in checkpoint_file:
+                if not line.strip():
+                    continue
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    log.warning(f"Ignoring a partly written checkpoint line in {path}")
+                    continue
+                if record.get('verdict') in VERDICTS:
+                    records.append(record)
+    except FileNotFoundError:
+        pass
+    return records
+
+
+def load_checkpoint(path, task=None):
+    """{device: {check: verdict}} completed in the checkpoint, for one task or all"""
+    completed = {}
+    for record in read_checkpoint(path):
+        if record['verdict'] not in COMPLETED:
+            continue
+        if task is None or record.get('task') == task:
+            completed.setdefault(record['device'], {})[record['check']] = record['verdict']
+    return completed
+
+
+def pending_devices(device_names, checks, completed):
+    """Devices, in order, with at least one check not completed yet"""
+    return [name for name in device_names
+            if any(check not in completed.get(name, {}) for check in checks)]
@@ -0,0 +1,431 @@
+#!/usr/bin/env python
+
+"""Registry of the Sanity_Check checks, with a runner sharing their commands.
+
+Every check declares the commands it needs on a device, a parser for its
+output and its evaluation (evaluators.py), once for all the suites:
+escript.py, auto_script.py, the pyats_easypy scripts (through
+check_testcase.py), monitor.py and fast_sweep.py.
+
+plan() lists the commands a set of checks needs on one device, each once
+in first-use order, and run_checks() issues each of them once and evaluates
+every check from the shared outputs:
+
+    results = run_checks(device, ['verify_cpu_memory', 'verify_ospf_neighbors',
+                                  'verify_ospf_routes'], device.execute)
+
+Pings are planned as ``ping <target>`` and sent under the ``ping_policy``
+setting when there is one (reachability.py). Commands are planned in IOS
+form and sent as the variant of each device's OS (platforms.py);
+plan_fleet() groups a fleet by OS with the device commands of each group.
+With a ``digests`` setting (output_digest.py), a check whose outputs only
+changed in volatile fields reuses its previous verdict unparsed, and with
+a ``result_cache`` setting (result_cache.py), a ``cacheable`` check reuses
+its cached verdict without its commands while the device configuration
+has not changed.
+"""
+
+import json
+import logging
+import time
+
+from evaluators import (CPU_THRESHOLD, EXPECTED_NETWORKS, EXPECTED_OSPF_STATE, PC_IPS,
+                        PEER_IPS, evaluate_basic_config, evaluate_cpu, evaluate_cpu_usage,
+                        evaluate_interface_status, evaluate_no_acls,
+                        evaluate_ospf_neighbor_states, evaluate_ospf_neighbors,
+                        evaluate_ospf_routes, evaluate_ping, evaluate_route_table, find_acls,
+                        parse_cpu_usage, parse_ping)
+from interface_stats import anomalies, delta, parse_interfaces
+from ospf_topology import parse_ospf_neighbors
+from platforms import dialect_for, group_by_dialect
+from reachability import ping
+from result_cache import CONFIG_CHANGE_COMMAND, parse_config_change
+from route_table import parse_routes
+
+log = logging.getLogger(__name__)
+
+CPU_COMMAND = 'show processes cpu | include CPU'
+MEMORY_COMMAND = 'show memory statistics | include Processor'
+CONFIG_SECTIONS = ('hostname', 'logging', 'ntp')
+
+DEFAULT_SETTINGS = {
+    'cpu_threshold': CPU_THRESHOLD,
+    'expected_ospf_state': EXPECTED_OSPF_STATE,
+    'peer_ips': PEER_IPS,
+    'pc_ips': PC_IPS,
+    'expected_networks': EXPECTED_NETWORKS,
+    'ping_policy': None,
+    # Sources of structured data, first answer wins: restconf.StructuredCollector
+    # and telemetry.TelemetryStore, or a list of them
+    'structured': None,
+    # output_digest.OutputDigests, to reuse the verdicts of unchanged outputs
+    'digests': None,
+    # result_cache.ResultCache, to reuse the verdicts of cacheable checks
+    'result_cache': None,
+    # ospf_topology.OSPFTopology, the OSPF neighbors are the peers to ping
+    'ospf_topology': None,
+}
+
+# Settings the evaluations read, part of the key of a reused verdict
+EVALUATION_SETTINGS = ('cpu_threshold', 'expected_ospf_state', 'peer_ips', 'pc_ips',
+                       'expected_networks')
+
+# Check name -> Check, in the suite's execution order
+CHECKS = {}
+
+
+class Check(object):
+    """One check of the suite
+
+    ``commands(device, settings)`` lists the commands it needs,
+    ``evaluate(device, outputs, settings)`` judges their outputs (by command)
+    into ``(passed, message)``, and ``parser(output)`` extracts the data of
+    its first command. Commands are retried up to ``retries`` times.
+    A ``stateful`` evaluation also depends on earlier runs, its verdict is
+    never reused from unchanged outputs. A ``cacheable`` check only judges
+    the configuration, its verdict holds until the configuration changes.
+    ``structured`` is an optional ``(kind, evaluate(device, data, settings))``
+    judging structured data (restconf.py, telemetry.py) instead of the CLI
+    outputs.
+    """
+
+    def __init__(self, name, commands, evaluate, parser=None, retries=3, structured=None,
+                 stateful=False, cacheable=False):
+        self.name = name
+        self.commands = commands
+        self.evaluate = evaluate
+        self.parser = parser
+        self.retries = retries
+        self.structured = structured
+        self.stateful = stateful
+        self.cacheable = cacheable
+
+    def parse(self, device, outputs, settings):
+        """Parsed output of the check's first command, None without a parser"""
+        commands = self.commands(device, settings)
+        if self.parser is None or not commands:
+            return None
+        return self.parser(outputs[commands[0]])
+
+
+def check(name, commands, parser=None, retries=3, stateful=False, cacheable=False):
+    """Decorator registering evaluate(device, outputs, settings) as a check"""
+    def register(evaluate):
+        CHECKS[name] = Check(name, commands, evaluate, parser, retries, stateful=stateful,
+                             cacheable=cacheable)
+        return evaluate
+    return register
+
+
+def structured(name, kind):
+    """Decorator adding evaluate(device, data, settings) of structured data to check name"""
+    def register(evaluate):
+        CHECKS[name].structured = (kind, evaluate)
+        return evaluate
+    return register
+
+
+def ping_command(target):
+    return f"ping {target}"
+
+
+def collect(execute, command, settings):
+    """Output of one planned command, pings following the run's ping policy"""
+    policy = settings.get('ping_policy')
+    if policy is not None and command.startswith('ping '):
+        return '\n'.join(ping(execute, command.split()[1], policy))
+    return execute(command)
+
+
+def with_retry(execute, command, retries):
+    """execute(command), retried on errors up to retries attempts in total"""
+    for attempt in range(retries):
+        try:
+            return execute(command)
+        except Exception as e:
+            if attempt == retries - 1:
+                raise
+            log.warning(f"Retry {attempt + 1} of '{command}' after error: {str(e)}")
+
+
+def settings_key(settings):
+    """The evaluation settings, serialized as part of a reused verdict's key"""
+    return json.dumps({setting: settings.get(setting) for setting in EVALUATION_SETTINGS},
+                      sort_keys=True, default=str)
+
+
+def evaluate_check(device, name, outputs, settings):
+    """(passed, message, reused) of check name from its commands' outputs
+
+    With a ``digests`` setting, the verdict of the previous evaluation is
+    reused when the outputs normalize to the same digests.
+    """
+    check = CHECKS[name]
+    digests = settings.get('digests')
+    if digests is None or check.stateful:
+        return check.evaluate(device, outputs, settings) + (False,)
+    key = digests.key(device.name, check.commands(device, settings), outputs,
+                      settings_key(settings))
+    verdict = digests.lookup(device.name, name, key)
+    if verdict is not None:
+        return verdict + (True,)
+    passed, message = check.evaluate(device, outputs, settings)
+    digests.record(device.name, name, key, passed, message)
+    return passed, message, False
+
+
+def plan(device, checks, settings=None):
+    """Commands needed by the checks on device, each once in first-use order
+
+    Returns the command list and {check: its commands}.
+    """
+    settings = dict(DEFAULT_SETTINGS, **(settings or {}))
+    needs = {name: CHECKS[name].commands(device, settings) for name in checks}
+    commands = list(dict.fromkeys(command for name in checks for command in needs[name]))
+    return commands, needs
+
+
+def plan_fleet(devices, checks, settings=None):
+    """Group devices by OS dialect before anything runs
+
+    Returns {dialect: {'devices': [names], 'commands': [device commands]}},
+    the commands being the union sent to the devices of the group.
+    """
+    groups = {}
+    for name, group in group_by_dialect(devices).items():
+        dialect = dialect_for(group[0])
+        commands = {}
+        for device in group:
+            commands.update(dict.fromkeys(dialect.commands(plan(device, checks, settings)[0])))
+        groups[name] = {'devices': [device.name for device in group],
+                        'commands': list(commands)}
+    return groups
+
+
+def run_checks(device, checks, execute, settings=None, outputs=None, parse=False,
+               device_outputs=None):
+    """Run checks on one device, issuing each planned command once
+
+    Commands are sent in the device's OS dialect. ``outputs`` (IOS
+    command -> output) may carry outputs already collected on the device,
+    it is filled in as commands run, like ``device_outputs`` with the
+    dialect's shared device commands. A command shared by several checks
+    is retried as often as the most tolerant of them. A failed command
+    errors the checks that need it, the others still run, and a verdict
+    reused from unchanged outputs is flagged 'unchanged', one reused from
+    the result cache 'cached'. Checks with a
+    structured evaluation read structured data instead when a source of the
+    ``structured`` setting has it for the device (under 'source', e.g.
+    'restconf' or 'telemetry').
+
+    Returns {check: {'verdict', 'message', 'duration'}}, plus the parsed
+    data under 'data' when parse is set.
+    """
+    settings = dict(DEFAULT_SETTINGS, **(settings or {}))
+    outputs = {} if outputs is None else outputs
+    commands, needs = plan(device, checks, settings)
+    execute = dialect_for(device).executor(execute, device_outputs)
+    retries = {}
+    for name in checks:
+        for command in needs[name]:
+            retries[command] = max(retries.get(command, 1), CHECKS[name].retries)
+
+    errors, results = {}, {}
+
+    def fetch(command, attempts):
+        if command in errors:
+            raise errors[command]
+        if command not in outputs:
+            try:
+                outputs[command] = collect(lambda line: with_retry(execute, line, attempts),
+                                           command, settings)
+            except Exception as e:
+                errors[command] = e
+                raise
+        return outputs[command]
+
+    cache = settings['result_cache']
+    sources = settings['structured'] or []
+    if not isinstance(sources, (list, tuple)):
+        sources = [sources]
+    for name in checks:
+        start = time.monotonic()
+        try:
+            if CHECKS[name].structured is not None:
+                kind, evaluate = CHECKS[name].structured
+                for source in sources:
+                    data = source.get(device, kind)
+                    if data is not None:
+                        passed, message = evaluate(device, data, settings)
+                        results[name] = {'verdict': 'passed' if passed else 'failed',
+                                         'message': message, 'source': source.name,
+                                         'duration': round(time.monotonic() - start, 3)}
+                        break
+                if name in results:
+                    continue
+            config_change = None
+            if cache is not None and CHECKS[name].cacheable:
+                try:
+                    config_change = parse_config_change(fetch(CONFIG_CHANGE_COMMAND, 1))
+                except Exception as e:
+                    # Without the signal the check runs, uncached
+                    log.warning(f"No configuration change time on {device.name}: {str(e)}")
+                verdict = cache.lookup(device.name, name, config_change, settings_key(settings))
+                if verdict is not None:
+                    passed, message = verdict
+                    results[name] = {'verdict': 'passed' if passed else 'failed',
+                                     'message': message, 'cached': True,
+                                     'duration': round(time.monotonic() - start, 3)}
+                    continue
+            for command in needs[name]:
+                fetch(command, retries[command])
+            passed, message, reused = evaluate_check(device, name, outputs, settings)
+            if cache is not None and CHECKS[name].cacheable:
+                cache.record(device.name, name, config_change, settings_key(settings),
+                             passed, message)
+            result = {'verdict': 'passed' if passed else 'failed', 'message': message}
+            if reused:
+                result['unchanged'] = True
+            if parse:
+                result['data'] = CHECKS[name].parse(device, outputs, settings)
+        except Exception as e:
+            result = {'verdict': 'errored',
+                      'message': f"Error running {name} on {device.name}: {str(e)}"}
+        result['duration'] = round(time.monotonic() - start, 3)
+        results[name] = result
+
+    log.debug(f"Ran {len(checks)} checks on {device.name} with {len(commands)} commands")
+    return results
+
+
+@check('verify_interface_status', lambda device, settings: ['show ip interface brief'])
+def _interface_status(device, outputs, settings):
+    return evaluate_interface_status(device.name, outputs['show ip interface brief'])
+
+
+@check('ping_test', lambda device, settings: [ping_command(device.connections.cli.ip)],
+       parser=parse_ping)
+def _ping_test(device, outputs, settings):
+    ip = device.connections.cli.ip
+    return evaluate_ping(device.name, ip, outputs[ping_command(ip)])
+
+
+def peer_ips(device, settings):
+    """Peer addresses to ping from device
+
+    Its neighbors in the expected state in the ``ospf_topology`` setting
+    (ospf_topology.py), else its entry of the static ``peer_ips`` map, one
+    address or a list of them.
+    """
+    topology = settings.get('ospf_topology')
+    if topology is not None and device.name in topology:
+        return topology.peer_addresses(device.name)
+    peers = settings['peer_ips'].get(device.name) or []
+    return [peers] if isinstance(peers, str) else list(peers)
+
+
+@check('ping_peer_ip', lambda device, settings: [
+    ping_command(peer_ip) for peer_ip in peer_ips(device, settings)], parser=parse_ping)
+def _ping_peer_ip(device, outputs, settings):
+    targets = peer_ips(device, settings)
+    if not targets:
+        return True, f"No peer IP to ping from {device.name}"
+    for peer_ip in targets:
+        passed, message = evaluate_ping(device.name, peer_ip, outputs[ping_command(peer_ip)])
+        if not passed:
+            return passed, message
+    return True, f"All {len(targets)} peers reachable from {device.name}"
+
+
+@check('ping_pc_hosts', lambda device, settings: [
+    ping_command(pc_ip) for pc_ip in settings['pc_ips'].values()], parser=parse_ping)
+def _ping_pc_hosts(device, outputs, settings):
+    for pc_name, pc_ip in settings['pc_ips'].items():
+        passed, message = evaluate_ping(device.name, f"{pc_name}({pc_ip})",
+                                        outputs[ping_command(pc_ip)])
+        if not passed:
+            return passed, message
+        log.info(message)
+    return True, f"All PC hosts reachable from {device.name}"
+
+
+@check('verify_ospf_neighbors', lambda device, settings: ['show ip ospf neighbor'],
+       parser=parse_ospf_neighbors)
+def _ospf_neighbors(device, outputs, settings):
+    return evaluate_ospf_neighbors(device.name, outputs['show ip ospf neighbor'],
+                                   settings['expected_ospf_state'])
+
+
+@structured('verify_ospf_neighbors', 'ospf_neighbors')
+def _ospf_neighbor_states(device, neighbors, settings):
+    return evaluate_ospf_neighbor_states(device.name, neighbors, settings['expected_ospf_state'])
+
+
+@check('verify_ospf_routes', lambda device, settings: ['show ip route ospf'],
+       parser=parse_routes)
+def _ospf_routes(device, outputs, settings):
+    return evaluate_ospf_routes(device.name, outputs['show ip route ospf'],
+                                settings['expected_networks'])
+
+
+@structured('verify_ospf_routes', 'routes')
+def _route_table(device, table, settings):
+    return evaluate_route_table(device.name, table, settings['expected_networks'])
+
+
+@check('verify_no_acls', lambda device, settings: ['show ip interface | inc access list'],
+       parser=find_acls, cacheable=True)
+def _no_acls(device, outputs, settings):
+    return evaluate_no_acls(device.name, outputs['show ip interface | inc access list'])
+
+
+@check('verify_basic_config', lambda device, settings: [
+    f'show run | inc {section}' for section in CONFIG_SECTIONS],
+    retries=1, cacheable=True)
+def _basic_config(device, outputs, settings):
+    return evaluate_basic_config(device.name, {
+        section: outputs[f'show run | inc {section}'] for section in CONFIG_SECTIONS})
+
+
+@check('verify_cpu_memory', lambda device, settings: [CPU_COMMAND, MEMORY_COMMAND],
+       parser=parse_cpu_usage)
+def _cpu_memory(device, outputs, settings):
+    return evaluate_cpu(device.name, outputs[CPU_COMMAND], settings['cpu_threshold'])
+
+
+@structured('verify_cpu_memory', 'cpu')
+def _cpu_usage(device, cpu_usage, settings):
+    return evaluate_cpu_usage(device.name, cpu_usage, settings['cpu_threshold'])
+
+
+@check('verify_interface_errors', lambda device, settings: ['show interfaces'],
+       parser=parse_interfaces, retries=1, stateful=True)
+def _interface_errors(device, outputs, settings):
+    return _interface_anomalies(device, parse_interfaces(outputs['show interfaces']), settings)
+
+
+@structured('verify_interface_errors', 'interfaces')
+def _interface_anomalies(device, sample, settings):
+    """Flag interfaces whose error or drop rate rose since the previous sample
+
+    Without an ``interface_samples`` setting (device -> latest sample, kept
+    by monitor.py between visits) the rates are since the counters were
+    last cleared.
+    """
+    samples = settings.get('interface_samples')
+    if samples is None:
+        change = delta(None, sample)
+    else:
+        previous = samples.get(device.name)
+        samples[device.name] = sample
+        if previous is None:
+            return True, (f"First interface counter sample of {device.name} "
+                          f"({len(sample)} interfaces)")
+        change = delta(previous, sample)
+    flagged = anomalies(change)
+    if flagged:
+        return False, (f"Interface error anomalies on {device.name}: "
+                       + '; '.join(f"{name} {reason}" for name, reason in flagged))
+    if samples is None:
+        return True, f"No interface error anomalies on {device.name} since counters were cleared"
+    return True, f"No interface error anomalies on {device.name} in {change.interval:.0f}s"
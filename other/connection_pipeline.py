@@ -0,0 +1,243 @@
+#!/usr/bin/env python
+
+"""Pipelined device connections, tests start as soon as their device is ready.
+
+``testbed.connect()`` returns once every device has connected or timed
+out (``connection_timeout: 360`` in testbed_explained.yaml), so the first
+device's tests wait for the slowest one. ConnectionPipeline instead
+connects the devices in the background, with at most ``max_open``
+sessions open or being opened at once, and ready() yields each device as
+soon as its own session is ready, while the next devices are
+pre-connected. A tested device is disconnected to free its slot:
+
+    pipeline = ConnectionPipeline(devices, max_open=16).start()
+    for name in pipeline.ready():
+        pipeline.wait(name)  # ConnectionError when the device failed
+        ...  # run the tests of the device
+        pipeline.release(name)
+    pipeline.close()
+
+aetest reads loop parameters lazily, so ``device_name=pipeline.ready()``
+loops a testcase over the devices in that order.
+
+The simulation compares connecting everything first with the pipeline on
+fake devices, a few of which are slow to connect:
+
+    python connection_pipeline.py --simulate 200 --max-open 16
+"""
+
+import argparse
+import logging
+import queue
+import random
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+log = logging.getLogger(__name__)
+
+DEFAULT_MAX_OPEN = 16
+DEFAULT_WORKERS = 8
+
+
+class ConnectionPipeline(object):
+    """Background connections of devices in testbed order, bounded by max_open sessions"""
+
+    def __init__(self, devices, max_open=DEFAULT_MAX_OPEN, workers=DEFAULT_WORKERS,
+                 timeout=None):
+        self.devices = list(devices)
+        self.max_open = max_open
+        self.workers = max(1, min(workers, max_open))
+        self.timeout = timeout
+        self.open = 0
+        self.peak_open = 0
+        self.connect_times = {}  # Device -> seconds its connection took
+        self._ready = {device.name: threading.Event() for device in self.devices}
+        self._errors = {}
+        self._finished = queue.Queue()  # Device names as their connection attempt ends
+        self._released = set()
+        self._slots = threading.Semaphore(max_open)
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._pool = None
+        self._feeder = None
+
+    def start(self):
+        self._pool = ThreadPoolExecutor(max_workers=self.workers,
+                                        thread_name_prefix='connect')
+        self._feeder = threading.Thread(target=self._feed, name='connection-pipeline',
+                                        daemon=True)
+        self._feeder.start()
+        log.info(f"Connecting {len(self.devices)} devices in the background, "
+                 f"at most {self.max_open} sessions open")
+        return self
+
+    def _feed(self):
+        # Devices are submitted in testbed order, each once a session slot is free
+        for device in self.devices:
+            while not self._slots.acquire(timeout=0.5):
+                if self._stop.is_set():
+                    return
+            if self._stop.is_set():
+                self._slots.release()
+                return
+            self._pool.submit(self._connect, device)
+
+    def _connect(self, device):
+        start = time.monotonic()
+        try:
+            if not device.is_connected():
+                device.connect(log_stdout=False)
+        except Exception as e:
+            # A device that failed holds no session
+            self._errors[device.name] = e
+            self._slots.release()
+        else:
+            with self._lock:
+                self.open += 1
+                self.peak_open = max(self.peak_open, self.open)
+                released = device.name in self._released
+            if released:
+                # Released, e.g. by an aborted run, while still connecting
+                self._disconnect(device)
+        self.connect_times[device.name] = time.monotonic() - start
+        self._ready[device.name].set()
+        self._finished.put(device.name)
+
+    def ready(self):
+        """Device names as their connection attempts end, failed ones included"""
+        for _ in self.devices:
+            device_name = self._finished.get()
+            if device_name is None:
+                return
+            yield device_name
+
+    def _disconnect(self, device):
+        try:
+            device.disconnect()
+        except Exception as e:
+            log.warning(f"Error disconnecting from {device.name}: {str(e)}")
+        with self._lock:
+            self.open -= 1
+        self._slots.release()
+
+    def wait(self, device_name):
+        """Block until the device's session is ready, ConnectionError when it failed
+
+        Devices outside the pipeline return at once.
+        """
+        event = self._ready.get(device_name)
+        if event is None:
+            return
+        start = time.monotonic()
+        if not event.wait(self.timeout):
+            raise ConnectionError(f"No session for {device_name} after {self.timeout}s")
+        waited = time.monotonic() - start
+        if device_name in self._errors:
+            raise ConnectionError(f"Failed to connect to {device_name}: "
+                                  f"{str(self._errors[device_name])}")
+        if waited >= 1:
+            log.info(f"Waited {waited:.1f}s for the session of {device_name}")
+
+    def release(self, device_name):
+        """Disconnect a tested device, freeing its slot for the next device"""
+        if device_name not in self._ready:
+            return
+        with self._lock:
+            if device_name in self._released:
+                return
+            self._released.add(device_name)
+            connected = self._ready[device_name].is_set() and device_name not in self._errors
+        if connected:
+            self._disconnect(next(device for device in self.devices
+                                  if device.name == device_name))
+
+    def close(self):
+        """Stop connecting and disconnect the sessions still open"""
+        self._stop.set()
+        # The feeder must be done submitting before the pool shuts down
+        if self._feeder is not None:
+            self._feeder.join()
+        if self._pool is not None:
+            self._pool.shutdown(wait=True, cancel_futures=True)
+        # Ends a ready() loop still waiting for devices that will not connect
+        self._finished.put(None)
+        for device in self.devices:
+            if self._ready[device.name].is_set():
+                self.release(device.name)
+
+
+class _SimulatedDevice(object):
+    """Device whose connect() sleeps, a stand-in for a slow SSH login"""
+
+    def __init__(self, name, connect_time):
+        self.name = name
+        self.connect_time = connect_time
+        self.connected = False
+
+    def is_connected(self):
+        return self.connected
+
+    def connect(self, log_stdout=True):
+        time.sleep(self.connect_time)
+        self.connected = True
+
+    def disconnect(self):
+        self.connected = False
+
+
+def _simulated_fleet(count, connect_time, slow_every, slow_time):
+    return [_SimulatedDevice(f"R{index + 1}", slow_time if index % slow_every == slow_every - 1
+                             else connect_time * random.uniform(0.5, 1.5))
+            for index in range(count)]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--simulate', type=int, default=200, metavar='DEVICES')
+    parser.add_argument('--max-open', type=int, default=DEFAULT_MAX_OPEN)
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS)
+    parser.add_argument('--connect-time', type=float, default=0.05,
+                        help='seconds a device takes to connect')
+    parser.add_argument('--slow-every', type=int, default=50,
+                        help='every Nth device is slow to connect')
+    parser.add_argument('--slow-time', type=float, default=2.0,
+                        help='seconds a slow device takes to connect')
+    parser.add_argument('--test-time', type=float, default=0.01,
+                        help='seconds the tests of a device take')
+    args = parser.parse_args(argv)
+
+    # Everything connected first, in parallel like testbed.connect()
+    devices = _simulated_fleet(args.simulate, args.connect_time, args.slow_every,
+                               args.slow_time)
+    start = time.monotonic()
+    with ThreadPoolExecutor(max_workers=len(devices)) as pool:
+        list(pool.map(lambda device: device.connect(), devices))
+    first_test = time.monotonic() - start
+    for device in devices:
+        time.sleep(args.test_time)
+    log.info(f"Connect all first: first test after {first_test:.2f}s, "
+             f"done in {time.monotonic() - start:.2f}s with {len(devices)} sessions open")
+
+    devices = _simulated_fleet(args.simulate, args.connect_time, args.slow_every,
+                               args.slow_time)
+    start = time.monotonic()
+    pipeline = ConnectionPipeline(devices, args.max_open, args.workers).start()
+    first_test = None
+    for name in pipeline.ready():
+        pipeline.wait(name)
+        if first_test is None:
+            first_test = time.monotonic() - start
+        time.sleep(args.test_time)
+        pipeline.release(name)
+    pipeline.close()
+    log.info(f"Pipelined: first test after {first_test:.2f}s, "
+             f"done in {time.monotonic() - start:.2f}s with at most "
+             f"{pipeline.peak_open} sessions open")
+    return 0
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    sys.exit(main())
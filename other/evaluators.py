@@ -0,0 +1,178 @@
+#!/usr/bin/env python
+
+"""Evaluation logic for the Sanity_Check tests.
+
+Every evaluator takes raw command output and returns a ``(passed, message)``
+tuple without touching a device, so the same code runs live in escript.py
+and offline against captured outputs in offline_eval.py.
+"""
+
+from parse_utils import ACL_LINE, CPU_PERCENT, DOWN, PING_SUMMARY
+from route_table import parse_routes
+
+# Default thresholds, mirrored by the Sanity_Check class attributes
+CPU_THRESHOLD = 80
+EXPECTED_OSPF_STATE = 'FULL'
+
+PING_FAILURE = "Success rate is 0 percent"
+
+# Define peer IP mapping
+PEER_IPS = {
+    'R1': '172.16.0.2',  # R2's IP
+    'R2': '172.16.0.1'   # R1's IP
+}
+
+# Define PC host IPs
+PC_IPS = {
+    'PC1': '172.16.1.1',
+    'PC2': '172.16.2.1'
+}
+
+# Device pairs expected to form an OSPF adjacency
+EXPECTED_OSPF_ADJACENCIES = [
+    ('R1', 'R2')
+]
+
+# Expected OSPF prefixes, matched on network and mask; a bare network
+# address matches a route of that network with any mask
+EXPECTED_NETWORKS = {
+    'R1': ['172.16.2.0/24'],  # R2's subnet
+    'R2': ['172.16.1.0/24']   # R1's subnet
+}
+
+
+def evaluate_interface_status(device_name, output):
+    """Fail when any interface is reported down"""
+    if any(down in output for down in DOWN):
+        return False, f"Down interfaces found on {device_name}"
+    return True, f"All interfaces are up on {device_name}"
+
+
+def parse_ping(output):
+    """Sum every ping summary in output into probe counts and RTTs in ms
+
+    Returns None when output has no summary line, the RTTs are None when
+    no probe was answered.
+    """
+    sent = received = 0
+    rtt_min = rtt_max = None
+    rtt_total = 0
+    for match in PING_SUMMARY.finditer(output):
+        sent += int(match.group('sent'))
+        received += int(match.group('received'))
+        if match.group('avg') is not None:
+            low, high = int(match.group('min')), int(match.group('max'))
+            rtt_min = low if rtt_min is None else min(rtt_min, low)
+            rtt_max = high if rtt_max is None else max(rtt_max, high)
+            rtt_total += int(match.group('avg')) * int(match.group('received'))
+    if not sent:
+        return None
+    return {
+        'sent': sent,
+        'received': received,
+        'success_rate': received * 100 // sent,
+        'rtt_min': rtt_min,
+        'rtt_avg': rtt_total // received if received else None,
+        'rtt_max': rtt_max,
+    }
+
+
+def evaluate_ping(device_name, target, output):
+    """Fail when no ping probe to target succeeded"""
+    stats = parse_ping(output)
+    if stats is None:
+        if PING_FAILURE in output:
+            return False, f"Ping from {device_name} to {target} failed"
+        return True, f"Ping from {device_name} to {target} successful"
+    if not stats['received']:
+        return False, (f"Ping from {device_name} to {target} failed "
+                       f"(0/{stats['sent']} replies)")
+    return True, (f"Ping from {device_name} to {target} successful "
+                  f"({stats['received']}/{stats['sent']} replies, "
+                  f"rtt min/avg/max {stats['rtt_min']}/{stats['rtt_avg']}/{stats['rtt_max']} ms)")
+
+
+def evaluate_ospf_neighbors(device_name, output, expected_state=EXPECTED_OSPF_STATE):
+    """Fail when no neighbor is in the expected OSPF state"""
+    if expected_state not in output:
+        return False, f"No {expected_state} OSPF neighbors found on {device_name}"
+    return True, f"OSPF neighbors verified on {device_name}"
+
+
+def evaluate_ospf_neighbor_states(device_name, neighbors, expected_state=EXPECTED_OSPF_STATE):
+    """evaluate_ospf_neighbors on (neighbor_id, state, address, interface) tuples"""
+    if not any(state == expected_state for _, state, _, _ in neighbors):
+        return False, f"No {expected_state} OSPF neighbors found on {device_name}"
+    return True, f"OSPF neighbors verified on {device_name}"
+
+
+def evaluate_ospf_routes(device_name, output, expected_networks=None):
+    """Fail when an expected network is missing from the OSPF routes"""
+    if expected_networks is None:
+        expected_networks = EXPECTED_NETWORKS
+    if device_name not in expected_networks:
+        return True, f"No specific routes to verify for {device_name}"
+    # Parse the table once, then each expected prefix is an indexed lookup
+    return evaluate_route_table(device_name, parse_routes(output), expected_networks)
+
+
+def evaluate_route_table(device_name, table, expected_networks=None):
+    """evaluate_ospf_routes on an already built RouteTable"""
+    if expected_networks is None:
+        expected_networks = EXPECTED_NETWORKS
+    if device_name not in expected_networks:
+        return True, f"No specific routes to verify for {device_name}"
+    missing, _ = table.diff(expected_networks[device_name])
+    if missing:
+        return False, (f"Network {', '.join(missing)} not found in OSPF routes "
+                       f"on {device_name}")
+    return True, f"OSPF routes verified on {device_name}"
+
+
+def find_acls(output):
+    """Return the interface lines that have an ACL applied"""
+    return [match.group('line') for match in ACL_LINE.finditer(output)
+            if match.group('acl')]
+
+
+def evaluate_no_acls(device_name, output):
+    """Fail when any interface has an inbound or outbound ACL"""
+    found_acls = find_acls(output)
+    if found_acls:
+        return False, f"ACLs found on {device_name}:\n" + "\n".join(found_acls)
+    return True, f"No ACLs found on interfaces of {device_name}"
+
+
+def evaluate_basic_config(device_name, outputs):
+    """Fail when any of the hostname/logging/ntp sections is empty
+
+    ``outputs`` maps the config check name to its ``show run`` output.
+    """
+    for check, output in outputs.items():
+        if not output:
+            return False, f"Missing {check} configuration on {device_name}"
+    return True, f"Basic configuration present on {device_name}"
+
+
+def parse_cpu_usage(output):
+    """Extract the 5 second CPU percentage from 'show processes cpu'
+
+    Raises ValueError when the output reports no percentage, e.g. an
+    '% Invalid input detected' error.
+    """
+    match = CPU_PERCENT.search(output)
+    if match is None:
+        raise ValueError(f"No CPU percentage in output: {output[:80]!r}")
+    return int(match.group(1))
+
+
+def evaluate_cpu(device_name, output, cpu_threshold=CPU_THRESHOLD):
+    """Fail when CPU usage is above cpu_threshold"""
+    return evaluate_cpu_usage(device_name, parse_cpu_usage(output), cpu_threshold)
+
+
+def evaluate_cpu_usage(device_name, cpu_usage, cpu_threshold=CPU_THRESHOLD):
+    """Fail when a 5 second CPU percentage is above cpu_threshold"""
+    if cpu_usage > cpu_threshold:
+        return False, f"High CPU usage ({cpu_usage}%) on {device_name}"
+    return True, f"CPU and memory usage normal on {device_name}"
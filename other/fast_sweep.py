@@ -0,0 +1,201 @@
+#!/usr/bin/env python
+
+"""Fast health sweep without aetest/easypy overhead.
+
+Runs the Sanity_Check registry checks (interfaces, OSPF neighbors, CPU,
+see checks.py) as a plain function pipeline, one thread per device, and
+writes a minimal JSON result:
+
+    python fast_sweep.py --testbed testbed.yaml --output sweep.json
+
+Commands are planned per OS group from the testbed os/platform
+(platforms.py). The result reports the time from the process start to
+the first command so the fixed overhead of each sweep (interpreter start,
+imports, testbed loading) can be tracked, and the time commands
+spent queued behind the testbed rate limits (rate_limit.py). With
+``--digests``, checks whose outputs only changed in volatile fields since
+the previous sweep reuse their verdict (output_digest.py).
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from checks import plan_fleet, run_checks
+from evaluators import CPU_THRESHOLD, EXPECTED_OSPF_STATE
+from rate_limit import CommandGovernor
+
+log = logging.getLogger(__name__)
+
+# Stands in for the process start where /proc is not available
+_IMPORTED = time.perf_counter()
+
+# Registry checks run by the sweep (checks.py)
+SWEEP_CHECKS = ('verify_interface_status', 'verify_ospf_neighbors', 'verify_cpu_memory')
+
+# Skip the unicon connection steps a sweep does not need
+CONNECT_ARGS = {
+    'log_stdout': False,
+    'learn_hostname': False,
+    'init_exec_commands': [],
+    'init_config_commands': [],
+}
+
+
+def process_start():
+    """perf_counter() time this process started, interpreter start and imports included
+
+    Read from /proc/self/stat on Linux, else the import of this module.
+    """
+    try:
+        with open('/proc/self/stat') as stat_file:
+            # The command name may hold spaces, count the fields after it
+            fields = stat_file.read().rsplit(')', 1)[1].split()
+        with open('/proc/uptime') as uptime_file:
+            uptime = float(uptime_file.read().split()[0])
+        started = int(fields[19]) / os.sysconf('SC_CLK_TCK')
+    except (OSError, IndexError, ValueError):
+        return _IMPORTED
+    return time.perf_counter() - (uptime - started)
+
+
+def sweep_device(device, settings, first_command, governor):
+    """Connect to one device and run every sweep check on it"""
+    result = {'ok': True, 'checks': {}}
+    start = time.perf_counter()
+    try:
+        if not device.is_connected():
+            device.connect(**CONNECT_ARGS)
+    except Exception as e:
+        result['ok'] = False
+        result['error'] = f"Failed to connect to {device.name}: {str(e)}"
+        return result
+
+    def execute(command):
+        first_command.append(time.perf_counter())
+        return governor.execute(device.execute, device.name, command)
+
+    for check, check_result in run_checks(device, SWEEP_CHECKS, execute, settings).items():
+        result['checks'][check] = {'verdict': check_result['verdict'],
+                                   'message': check_result['message']}
+        if check_result.get('unchanged'):
+            result['checks'][check]['unchanged'] = True
+        result['ok'] = result['ok'] and check_result['verdict'] == 'passed'
+
+    result['duration'] = round(time.perf_counter() - start, 3)
+    return result
+
+
+def sweep(testbed, cpu_threshold=CPU_THRESHOLD, expected_ospf_state=EXPECTED_OSPF_STATE,
+          workers=16, disconnect=True, governor=None, structured=None, digests=None,
+          start=None):
+    """Run the sweep on every device of the testbed and return the result dict
+
+    ``start`` is the perf_counter() time the startup and duration are
+    measured from, by default the call of sweep(); main() passes the
+    process start. ``structured`` is a restconf.StructuredCollector reading
+    OSPF data over RESTCONF where the testbed allows it, ``digests`` an
+    output_digest.OutputDigests of the previous sweeps.
+    """
+    start = time.perf_counter() if start is None else start
+    governor = governor or CommandGovernor.from_testbed(testbed)
+    settings = {'cpu_threshold': cpu_threshold,
+                'expected_ospf_state': expected_ospf_state,
+                'structured': structured,
+                'digests': digests}
+    first_command = []
+    started = datetime.now().isoformat()
+
+    # Plan the OS command variants up front, and sweep the devices OS group
+    # by OS group so each group sends one set of commands
+    groups = plan_fleet(testbed.devices.values(), SWEEP_CHECKS, settings)
+    for name, group in groups.items():
+        log.info(f"{name}: {len(group['devices'])} devices, "
+                 f"commands: {', '.join(group['commands'])}")
+    devices = [testbed.devices[device_name] for group in groups.values()
+               for device_name in group['devices']]
+
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(devices)))) as pool:
+        results = dict(zip(
+            (device.name for device in devices),
+            pool.map(lambda device: sweep_device(device, settings, first_command, governor),
+                     devices)
+        ))
+
+    if disconnect:
+        for device in devices:
+            try:
+                device.disconnect()
+            except Exception as e:
+                log.warning(f"Error disconnecting from {device.name}: {str(e)}")
+
+    return {
+        'started': started,
+        'startup_to_first_command': round(min(first_command) - start, 3) if first_command else None,
+        'duration': round(time.perf_counter() - start, 3),
+        'ok': all(result['ok'] for result in results.values()),
+        'queueing': governor.metrics()['fleet'],
+        'plan': {name: {'devices': len(group['devices']), 'commands': group['commands']}
+                 for name, group in groups.items()},
+        'devices': results,
+    }
+
+
+def main(argv=None):
+    # Startup includes the interpreter start, the imports and loading the testbed
+    start = process_start()
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--testbed', dest='testbed', required=True)
+    parser.add_argument('--output', help='write the JSON result here instead of stdout')
+    parser.add_argument('--cpu-threshold', type=int, default=CPU_THRESHOLD)
+    parser.add_argument('--expected-ospf-state', default=EXPECTED_OSPF_STATE)
+    parser.add_argument('--workers', type=int, default=16)
+    parser.add_argument('--restconf', action='store_true',
+                        help='read OSPF neighbors over RESTCONF where the testbed has a '
+                             'restconf connection (restconf.py)')
+    parser.add_argument('--digests', metavar='FILE',
+                        help='output digests kept between sweeps, unchanged outputs reuse '
+                             'their verdict (output_digest.py)')
+    args = parser.parse_args(argv)
+
+    # Only the topology loader is needed, not the full genie testbed
+    from pyats.topology import loader
+    testbed = loader.load(args.testbed)
+
+    structured = None
+    if args.restconf:
+        from restconf import StructuredCollector
+        structured = StructuredCollector()
+
+    digests = None
+    if args.digests:
+        from output_digest import OutputDigests
+        digests = OutputDigests(args.digests)
+
+    result = sweep(testbed, cpu_threshold=args.cpu_threshold,
+                   expected_ospf_state=args.expected_ospf_state, workers=args.workers,
+                   structured=structured, digests=digests, start=start)
+    if structured is not None:
+        structured.close()
+    if digests is not None:
+        digests.save()
+    log.info(f"Sweep of {len(result['devices'])} devices done in {result['duration']}s, "
+             f"startup to first command {result['startup_to_first_command']}s")
+
+    if args.output:
+        with open(args.output, 'w') as output_file:
+            json.dump(result, output_file)
+    else:
+        print(json.dumps(result))
+
+    return 0 if result['ok'] else 1
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    sys.exit(main())
@@ -0,0 +1,241 @@
+#!/usr/bin/env python
+
+"""Job-level device x check health matrix, updated live while tasks run.
+
+Every task script of a job appends one JSON line per device and check to
+a shared results stream as soon as the check concludes (the report_result
+post-processor). The job tails that stream in a background thread
+(HealthMatrixAggregator), keeps one matrix for all tasks in memory and
+rewrites it atomically every few seconds, so a long job can be watched
+while it runs:
+
+    python health_matrix.py <job runinfo dir>/health_matrix.json --watch 5
+
+The matrix file is JSON:
+
+    {"updated": "...", "checks": ["ping_test", ...],
+     "devices": {"R1": {"ping_test": "passed", ...}},
+     "counts": {"ping_test": {"passed": 2, "failed": 0, ...}},
+     "unhealthy": ["R2"]}
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from datetime import datetime
+
+log = logging.getLogger(__name__)
+
+VERDICTS = ('passed', 'passx', 'skipped', 'blocked', 'aborted', 'failed', 'errored')
+UNHEALTHY = ('failed', 'errored', 'aborted', 'blocked')
+
+STREAM_FILE = 'results_stream.jsonl'
+MATRIX_FILE = 'health_matrix.json'
+
+
+class ResultStream(object):
+    """Append-only writer of check results, one JSON line per result
+
+    Each line goes out in a single append so several task processes can
+    share the stream.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, 'a', encoding='utf-8')
+        self._lock = threading.Lock()
+
+    def record(self, device_name, check, verdict, task=None):
+        line = json.dumps({'device': device_name, 'check': check, 'verdict': verdict,
+                           'task': task, 'timestamp': time.time()}) + '\n'
+        with self._lock:
+            self._file.write(line)
+            self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+
+def report_result(section):
+    """aetest post-processor streaming a per-device test result
+
+    Apply it with ``@aetest.processors.post(report_result)`` on the tests
+    of a looped testcase; it does nothing unless the script was given a
+    ``result_stream`` or a ``checkpoint`` (checkpoint.py), which get the
+    same record. A verdict replayed from the checkpoint is only streamed.
+    """
+    device_name = section.parameters.get('device_name')
+    if device_name is None:
+        return
+    checkpoint = section.parameters.get('checkpoint')
+    completed = section.parameters.get('completed') or {}
+    if section.uid in completed.get(device_name, {}):
+        # Replayed from the checkpoint on resume, already in it
+        checkpoint = None
+    for stream in (section.parameters.get('result_stream'), checkpoint):
+        if stream is not None:
+            stream.record(device_name, section.uid, str(section.result),
+                          section.parameters.get('task_name'))
+
+
+class HealthMatrix(object):
+    """Latest verdict per device and check, with counts kept up to date"""
+
+    def __init__(self):
+        self.devices = {}
+        self.checks = []
+        self.counts = {}
+        self.updated = None
+
+    def update(self, device_name, check, verdict):
+        """Record a verdict in constant time, replacing the previous one"""
+        row = self.devices.setdefault(device_name, {})
+        counts = self.counts.get(check)
+        if counts is None:
+            self.checks.append(check)
+            counts = self.counts[check] = dict.fromkeys(VERDICTS, 0)
+        previous = row.get(check)
+        if previous is not None:
+            counts[previous] -= 1
+        row[check] = verdict
+        counts[verdict] = counts.get(verdict, 0) + 1
+        self.updated = datetime.now().isoformat()
+
+    def unhealthy(self):
+        return sorted(name for name, row in self.devices.items()
+                      if any(verdict in UNHEALTHY for verdict in row.values()))
+
+    def to_dict(self):
+        return {'updated': self.updated, 'checks': self.checks, 'devices': self.devices,
+                'counts': self.counts, 'unhealthy': self.unhealthy()}
+
+    def write(self, path):
+        """Replace the matrix file atomically so readers never see half of it"""
+        temporary = f"{path}.tmp"
+        with open(temporary, 'w') as matrix_file:
+            json.dump(self.to_dict(), matrix_file)
+        os.replace(temporary, path)
+
+
+class HealthMatrixAggregator(object):
+    """Tails a result stream into a HealthMatrix and writes it periodically"""
+
+    def __init__(self, stream_path, matrix_path, interval=2.0, poll=0.5):
+        self.stream_path = stream_path
+        self.matrix_path = matrix_path
+        self.interval = interval
+        self.poll = poll
+        self.matrix = HealthMatrix()
+        self._offset = 0
+        self._partial = b''
+        self._dirty = False
+        self._written = 0.0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def drain(self):
+        """Apply every complete line appended since the last call"""
+        with open(self.stream_path, 'rb') as stream:
+            stream.seek(self._offset)
+            data = stream.read()
+        if not data:
+            return 0
+        self._offset += len(data)
+        lines = (self._partial + data).split(b'\n')
+        self._partial = lines.pop()
+        for line in lines:
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+                self.matrix.update(record['device'], record['check'], record['verdict'])
+            except (ValueError, KeyError) as e:
+                log.warning(f"Skipping malformed result line: {str(e)}")
+        self._dirty = self._dirty or bool(lines)
+        return len(lines)
+
+    def flush(self, force=False):
+        now = time.monotonic()
+        if self._dirty and (force or now - self._written >= self.interval):
+            self.matrix.write(self.matrix_path)
+            self._dirty = False
+            self._written = now
+
+    def _run(self):
+        while not self._stop.wait(self.poll):
+            try:
+                self.drain()
+                self.flush()
+            except OSError as e:
+                log.warning(f"Error updating the health matrix: {str(e)}")
+
+    def start(self):
+        # The stream may not have been written yet
+        open(self.stream_path, 'a').close()
+        self._thread = threading.Thread(target=self._run, name='health-matrix', daemon=True)
+        self._thread.start()
+        log.info(f"Writing the live health matrix to {self.matrix_path}")
+        return self
+
+    def stop(self):
+        """Stop tailing and write the final matrix"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.drain()
+        self._dirty = True
+        self.flush(force=True)
+        return self.matrix
+
+
+def format_matrix(matrix):
+    """Render a matrix dict as a text table, one row per device"""
+    checks = matrix['checks']
+    width = max([len(name) for name in matrix['devices']] + [6])
+    lines = [' ' * width + '  ' + '  '.join(checks)]
+    for name in sorted(matrix['devices']):
+        row = matrix['devices'][name]
+        lines.append(f"{name:<{width}}  " + '  '.join(
+            f"{row.get(check, '-'):<{len(check)}}" for check in checks))
+    lines.append(f"Updated {matrix['updated']}, unhealthy: "
+                 f"{', '.join(matrix['unhealthy']) or 'none'}")
+    return '\n'.join(lines)
+
+
+def _load(path):
+    """Load a matrix file, or build the matrix from a result stream"""
+    if path.endswith('.jsonl'):
+        aggregator = HealthMatrixAggregator(path, None)
+        aggregator.drain()
+        return aggregator.matrix.to_dict()
+    with open(path) as matrix_file:
+        return json.load(matrix_file)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('path', help='health_matrix.json or a results_stream.jsonl')
+    parser.add_argument('--watch', type=float, help='redraw every this many seconds')
+    args = parser.parse_args(argv)
+
+    while True:
+        try:
+            print(format_matrix(_load(args.path)))
+        except FileNotFoundError:
+            log.info(f"Waiting for {args.path}")
+        if not args.watch:
+            return 0
+        try:
+            time.sleep(args.watch)
+        except KeyboardInterrupt:
+            return 0
+        print()
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    sys.exit(main())
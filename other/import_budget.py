@@ -0,0 +1,198 @@
+#!/usr/bin/env python
+
+"""Import-time budget for the project's scripts and jobs.
+
+Imports every script in a fresh interpreter with ``python -X importtime``
+and fails when its cumulative import time exceeds the budget, or when it
+pulls in a module that must only be loaded lazily (genie and its parser
+tree):
+
+    python import_budget.py
+    python import_budget.py --budget-scale 2 --verbose
+
+The modules a bare interpreter loads at startup (site, encodings, ...)
+are left out of every total. Scripts that need pyats are skipped where it
+is not installed, any other import failure is a violation.
+
+Exits non-zero on any violation so it can gate CI. The pytest suite checks
+the lazy imports of every script (tests/test_import_budget.py); the
+wall-clock budgets only run on request, with ``pytest -m timing``.
+"""
+
+import argparse
+import functools
+import importlib.util
+import logging
+import os
+import re
+import subprocess
+import sys
+
+log = logging.getLogger(__name__)
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+# Import budgets in milliseconds: plain scripts and modules, and the ones
+# loading pyats.aetest or pyats.easypy at module level
+BUDGET = 100
+PYATS_BUDGET = 2500
+
+# Script path (relative to the project root) -> import budget in milliseconds
+SCRIPTS = {
+    'other/escript.py': PYATS_BUDGET,
+    'other/auto_script.py': PYATS_BUDGET,
+    'other/auto_job.py': BUDGET,
+    'other/capture.py': BUDGET,
+    'other/check_testcase.py': PYATS_BUDGET,
+    'other/checkpoint.py': BUDGET,
+    'other/checks.py': BUDGET,
+    'other/connection_pipeline.py': BUDGET,
+    'other/evaluators.py': BUDGET,
+    'other/fast_sweep.py': BUDGET,
+    'other/health_matrix.py': BUDGET,
+    'other/interface_stats.py': BUDGET,
+    'other/lean_results.py': BUDGET,
+    'other/memory_bench.py': BUDGET,
+    'other/mock_device.py': BUDGET,
+    'other/monitor.py': BUDGET,
+    'other/offline_eval.py': BUDGET,
+    'other/ospf_topology.py': BUDGET,
+    'other/output_digest.py': BUDGET,
+    'other/parse_utils.py': BUDGET,
+    'other/platforms.py': BUDGET,
+    'other/rate_limit.py': BUDGET,
+    'other/reachability.py': BUDGET,
+    'other/restconf.py': BUDGET,
+    'other/result_cache.py': BUDGET,
+    'other/results_export.py': BUDGET,
+    'other/route_table.py': BUDGET,
+    'other/session_broker.py': BUDGET,
+    'other/state_baseline.py': BUDGET,
+    'other/synthetic_outputs.py': BUDGET,
+    'other/telemetry.py': BUDGET,
+    'pyats_easypy/jobs/all_tests_job.py': BUDGET,
+    'pyats_easypy/tests/connectivity/test_basic.py': PYATS_BUDGET,
+    'pyats_easypy/tests/routing/test_ospf.py': PYATS_BUDGET,
+    'pyats_easypy_manual_load/job.py': PYATS_BUDGET,
+    'pyats_easypy_manual_load/script.py': PYATS_BUDGET,
+    'pyats_easypy_single_dir/auto_job_set.py': BUDGET,
+    'pyats_easypy_single_dir/auto_script1.py': PYATS_BUDGET,
+    'pyats_easypy_single_dir/auto_script2.py': PYATS_BUDGET,
+}
+
+# Modules that no script may import at module level (pyats.aetest itself
+# already depends on pyats.log, so only the genie tree is policed)
+LAZY_MODULES = ('genie',)
+
+IMPORTTIME_LINE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$')
+
+
+class ImportBudgetError(Exception):
+    """A script failed to import"""
+
+
+def _importtime(code):
+    """Run code under -X importtime, return [(cumulative microseconds, top level, name)]"""
+    process = subprocess.run([sys.executable, '-X', 'importtime', '-c', code],
+                             capture_output=True, text=True)
+    if process.returncode != 0:
+        raise ImportBudgetError(process.stderr.strip().splitlines()[-1])
+
+    imports = []
+    for line in process.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if match:
+            imports.append((int(match.group(2)), len(match.group(3)) == 1, match.group(4)))
+    return imports
+
+
+@functools.lru_cache(maxsize=None)
+def startup_modules():
+    """Names of the modules a bare interpreter imports before running any code"""
+    return frozenset(name for _, _, name in _importtime('pass'))
+
+
+def measure(script):
+    """Import a script in a fresh interpreter
+
+    Returns (cumulative microseconds, set of imported module names), the
+    interpreter startup modules left out of the total. Raises ImportBudgetError
+    when the script cannot be imported.
+    """
+    path = os.path.normpath(os.path.join(ROOT, script))
+    module = os.path.splitext(os.path.basename(path))[0]
+    code = (f"import sys; sys.path.insert(0, {os.path.dirname(path)!r}); "
+            f"import {module}")
+
+    total, modules = 0, set()
+    startup = startup_modules()
+    for cumulative, top_level, name in _importtime(code):
+        modules.add(name)
+        # Only top level imports, nested ones are already in their cumulative
+        if top_level and name not in startup:
+            total += cumulative
+    return total, modules
+
+
+def eager_imports(modules):
+    """The lazy-only modules among the imported module names, sorted"""
+    return sorted(name for name in modules
+                  if any(name == lazy or name.startswith(lazy + '.') for lazy in LAZY_MODULES))
+
+
+def needs_pyats(script):
+    return SCRIPTS.get(script) == PYATS_BUDGET
+
+
+def check(scripts, budget_scale=1.0, rounds=1):
+    """Measure every script, best of rounds, and return the list of violation messages"""
+    violations = []
+    for script, budget_ms in scripts.items():
+        try:
+            total, modules = min((measure(script) for _ in range(rounds)),
+                                 key=lambda measured: measured[0])
+        except ImportBudgetError as e:
+            violations.append(f"{script} fails to import: {str(e)}")
+            continue
+        elapsed_ms = total / 1000
+        budget_ms = budget_ms * budget_scale
+        log.info(f"{script}: {elapsed_ms:.1f}ms (budget {budget_ms:.0f}ms)")
+
+        if elapsed_ms > budget_ms:
+            violations.append(f"{script} imports in {elapsed_ms:.1f}ms, "
+                              f"over its {budget_ms:.0f}ms budget")
+        eager = eager_imports(modules)
+        if eager:
+            violations.append(f"{script} eagerly imports {', '.join(eager[:5])}")
+    return violations
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('scripts', nargs='*', help='limit the check to these scripts')
+    parser.add_argument('--budget-scale', type=float, default=1.0,
+                        help='multiply every budget, for slow CI runners')
+    parser.add_argument('--rounds', type=int, default=1,
+                        help='import every script this many times, the fastest counts')
+    parser.add_argument('--verbose', action='store_true')
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.WARNING,
+                        format='%(message)s')
+    scripts = {script: budget for script, budget in SCRIPTS.items()
+               if not args.scripts or script in args.scripts}
+    if importlib.util.find_spec('pyats') is None:
+        skipped = [script for script in scripts if needs_pyats(script)]
+        if skipped:
+            log.warning(f"pyats is not installed, skipping {len(skipped)} scripts")
+        scripts = {script: budget for script, budget in scripts.items()
+                   if script not in skipped}
+
+    violations = check(scripts, args.budget_scale, args.rounds)
+    for violation in violations:
+        log.error(violation)
+    return 1 if violations else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,207 @@
+#!/usr/bin/env python
+
+"""Per-interface counters from 'show interfaces', with deltas and anomalies.
+
+parse_interfaces() turns the full ``show interfaces`` output into an
+InterfaceSample: interface names plus one ``array('q')`` column per counter
+(rates, packets, errors, CRC, drops), filled in a single regex pass over
+the output. delta() subtracts two samples column by column, and
+anomalies() flags the interfaces whose error or drop rate over the
+interval is above a threshold, for thousands of interfaces per device:
+
+    python interface_stats.py --benchmark 5000
+"""
+
+import argparse
+import logging
+import operator
+import random
+import re
+import sys
+import time
+from array import array
+
+log = logging.getLogger(__name__)
+
+# Gauges are instantaneous values, the other columns are running counters
+GAUGES = ('input_rate', 'input_pps', 'output_rate', 'output_pps')
+COUNTERS = ('input_packets', 'output_packets', 'input_errors', 'crc',
+            'output_errors', 'input_drops', 'output_drops')
+COLUMNS = GAUGES + COUNTERS
+
+# Defaults of anomalies(): errors or drops per packet, over a minimum volume
+ERROR_RATE_THRESHOLD = 0.001
+DROP_RATE_THRESHOLD = 0.01
+MIN_PACKETS = 1000
+
+# One alternative per line of interest, anchored at line starts so the
+# scan skips the other lines quickly
+INTERFACE_LINE = re.compile(
+    r'^(?:(?P<name>\S+) is (?:administratively )?\w+, line protocol is'
+    r'|\s+(?:Input queue: \d+/\d+/(?P<input_drops>\d+)/\d+'
+    r'.*?Total output drops: (?P<output_drops>\d+)'
+    r'|\d+ \w+ input rate (?P<input_rate>\d+) bits/sec, (?P<input_pps>\d+) packets/sec'
+    r'|\d+ \w+ output rate (?P<output_rate>\d+) bits/sec, (?P<output_pps>\d+) packets/sec'
+    r'|(?P<input_packets>\d+) packets input'
+    r'|(?P<output_packets>\d+) packets output'
+    r'|(?P<input_errors>\d+) input errors, (?P<crc>\d+) CRC'
+    r'|(?P<output_errors>\d+) output errors))',
+    re.MULTILINE)
+
+# Group names filled by each alternative of INTERFACE_LINE
+_FIELDS = [('input_drops', 'output_drops'), ('input_rate', 'input_pps'),
+           ('output_rate', 'output_pps'), ('input_packets',), ('output_packets',),
+           ('input_errors', 'crc'), ('output_errors',)]
+
+
+class InterfaceSample(object):
+    """Counters of every interface of one device at one point in time"""
+
+    def __init__(self, timestamp=None):
+        self.timestamp = time.time() if timestamp is None else timestamp
+        self.names = []
+        self.index = {}
+        self.columns = {column: array('q') for column in COLUMNS}
+
+    def __len__(self):
+        return len(self.names)
+
+    def add(self, name):
+        self.index[name] = len(self.names)
+        self.names.append(name)
+        for column in self.columns.values():
+            column.append(0)
+
+    def row(self, name):
+        """{counter: value} of one interface"""
+        position = self.index[name]
+        return {column: values[position] for column, values in self.columns.items()}
+
+    def aligned(self, names):
+        """Columns reordered to the given interface names, 0 for unknown ones"""
+        if names == self.names:
+            return self.columns
+        positions = [self.index.get(name) for name in names]
+        return {column: array('q', [values[position] if position is not None else 0
+                                    for position in positions])
+                for column, values in self.columns.items()}
+
+
+def parse_interfaces(output, timestamp=None):
+    """Parse full 'show interfaces' output into an InterfaceSample"""
+    sample = InterfaceSample(timestamp)
+    columns = sample.columns
+    position = -1
+    for match in INTERFACE_LINE.finditer(output):
+        name = match.group('name')
+        if name is not None:
+            sample.add(name)
+            position += 1
+            continue
+        if position < 0:
+            continue
+        for fields in _FIELDS:
+            if match.group(fields[0]) is not None:
+                for field in fields:
+                    columns[field][position] = int(match.group(field))
+                break
+    return sample
+
+
+class InterfaceDelta(object):
+    """Counter increases of every interface between two samples"""
+
+    def __init__(self, names, columns, interval, gauges, index=None):
+        self.names = names
+        self.index = index if index is not None else {
+            name: position for position, name in enumerate(names)}
+        self.columns = columns      # Counter -> array('q') of increases
+        self.interval = interval    # Seconds between the samples
+        self.gauges = gauges        # Gauge -> array('q') of the latest sample
+
+    def row(self, name):
+        """{counter: increase, gauge: latest value} of one interface"""
+        position = self.index[name]
+        return {column: values[position] for column, values
+                in list(self.columns.items()) + list(self.gauges.items())}
+
+    def totals(self):
+        """{counter: increase, gauge: latest value} summed over every interface"""
+        return {column: sum(values) for column, values
+                in list(self.columns.items()) + list(self.gauges.items())}
+
+
+def delta(previous, current):
+    """Counter increases from previous to current, aligned on current's interfaces
+
+    A counter lower than before was cleared (or the interface flapped), its
+    increase is then the current value. previous None gives the totals
+    since the counters were last cleared.
+    """
+    if previous is None:
+        previous = InterfaceSample(current.timestamp)
+    before = previous.aligned(current.names)
+    columns = {}
+    for counter in COUNTERS:
+        increases = array('q', map(operator.sub, current.columns[counter], before[counter]))
+        if increases and min(increases) < 0:
+            increases = array('q', [value if value >= 0 else total for value, total
+                                    in zip(increases, current.columns[counter])])
+        columns[counter] = increases
+    return InterfaceDelta(current.names, columns, current.timestamp - previous.timestamp,
+                          {gauge: current.columns[gauge] for gauge in GAUGES}, current.index)
+
+
+def anomalies(interface_delta, error_rate=ERROR_RATE_THRESHOLD,
+              drop_rate=DROP_RATE_THRESHOLD, min_packets=MIN_PACKETS):
+    """[(interface, reason)] of the interfaces with abnormal error or drop rates"""
+    columns = interface_delta.columns
+    packets = array('q', map(operator.add, columns['input_packets'], columns['output_packets']))
+    errors = array('q', map(operator.add, columns['input_errors'], columns['output_errors']))
+    drops = array('q', map(operator.add, columns['input_drops'], columns['output_drops']))
+
+    flagged = []
+    # Only interfaces with errors or drops need a closer look
+    for position in (index for index, value in enumerate(map(operator.or_, errors, drops))
+                     if value):
+        name = interface_delta.names[position]
+        if packets[position] < min_packets:
+            continue
+        volume = max(packets[position], 1)
+        if errors[position] / volume > error_rate:
+            flagged.append((name, f"{errors[position]} errors in {packets[position]} packets "
+                                  f"({errors[position] / volume:.2%}, "
+                                  f"{columns['crc'][position]} CRC)"))
+        if drops[position] / volume > drop_rate:
+            flagged.append((name, f"{drops[position]} drops in {packets[position]} packets "
+                                  f"({drops[position] / volume:.2%})"))
+    return flagged
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--benchmark', type=int, default=5000,
+                        help='number of synthetic interfaces on one device')
+    args = parser.parse_args(argv)
+
+    from synthetic_outputs import interfaces
+
+    first_output = interfaces(args.benchmark, base=random.randint(1000, 2000))
+    second_output = interfaces(args.benchmark, base=random.randint(3000, 4000))
+
+    start = time.perf_counter()
+    first = parse_interfaces(first_output, timestamp=0)
+    second = parse_interfaces(second_output, timestamp=300)
+    parsed = time.perf_counter()
+    flagged = anomalies(delta(first, second))
+    checked = time.perf_counter()
+
+    log.info(f"{len(second)} interfaces: two samples parsed in {parsed - start:.3f}s, "
+             f"delta and anomaly check in {checked - parsed:.3f}s, "
+             f"{len(flagged)} anomalies")
+    return 0
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    sys.exit(main())
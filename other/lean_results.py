@@ -0,0 +1,81 @@
+#!/usr/bin/env python
+
+"""Compact per-device result records for memory-lean runs of 10k+ devices.
+
+Each device keeps one byte per test (verdict code) in a ``__slots__``
+record, plus truncated messages for failed tests only. Raw outputs are not
+retained: they are evaluated, optionally spilled to the output capture on
+disk (capture.py), and dropped.
+"""
+
+import sys
+
+VERDICT_CODES = {'passed': 1, 'failed': 2, 'skipped': 3, 'errored': 4}
+VERDICT_NAMES = {code: name for name, code in VERDICT_CODES.items()}
+
+# Failure messages are cut to this many characters (ACL listings can be long)
+MESSAGE_LIMIT = 240
+
+
+def truncate(message, limit=MESSAGE_LIMIT):
+    if len(message) <= limit:
+        return message
+    return message[:limit - 15] + f"... (+{len(message) - limit + 15} chars)"
+
+
+class DeviceResult(object):
+    """Verdicts of one device: a bytearray of codes indexed like the test list"""
+
+    __slots__ = ('device', 'codes', 'failures')
+
+    def __init__(self, device, test_count):
+        self.device = sys.intern(device)
+        self.codes = bytearray(test_count)
+        self.failures = None  # (test index, truncated message) pairs, failures only
+
+    @property
+    def failed(self):
+        return VERDICT_CODES['failed'] in self.codes or VERDICT_CODES['errored'] in self.codes
+
+
+class ResultStore(object):
+    """All device results of a run, in compact form"""
+
+    def __init__(self, tests):
+        self.tests = tuple(sys.intern(test) for test in tests)
+        self._index = {test: index for index, test in enumerate(self.tests)}
+        self.results = []
+
+    def record(self, device, verdicts, failures=None):
+        """Store a device's verdicts ({test: 'passed'|...}) and failure messages"""
+        result = DeviceResult(device, len(self.tests))
+        for test, verdict in verdicts.items():
+            index = self._index.get(test)
+            if index is not None:
+                result.codes[index] = VERDICT_CODES[verdict]
+        if failures:
+            result.failures = tuple((self._index[test], truncate(message))
+                                    for test, message in failures.items()
+                                    if test in self._index)
+        self.results.append(result)
+        return result
+
+    def counts(self):
+        """Number of results per test and verdict"""
+        counts = {test: dict.fromkeys(VERDICT_CODES, 0) for test in self.tests}
+        for result in self.results:
+            for index, code in enumerate(result.codes):
+                if code:
+                    counts[self.tests[index]][VERDICT_NAMES[code]] += 1
+        return counts
+
+    def failed_devices(self):
+        return [result.device for result in self.results if result.failed]
+
+    def failures(self, device):
+        """{test: message} of one device's failures"""
+        for result in self.results:
+            if result.device == device:
+                return {self.tests[index]: message
+                        for index, message in result.failures or ()}
+        return {}
@@ -0,0 +1,130 @@
+#!/usr/bin/env python
+
+"""Peak RSS benchmark of per-device result retention.
+
+Runs the Sanity_Check registry checks (checks.py) for N simulated devices
+of the mock IOS fleet (mock_device.py), once keeping what Sanity_Check
+retains per device without memory-lean mode and once with the compact
+ResultStore records, each in a fresh interpreter, and reports the peak RSS
+growth per 1000 devices:
+
+    python memory_bench.py --devices 1000 5000 10000
+    python memory_bench.py --devices 10000 --budget-mb 2
+
+The checks, their outputs and the ResultStore are the real ones, but aetest
+does not run: the full mode is a model of what the testcase and aetest keep
+per device, not a measurement of them.
+
+With ``--budget-mb`` it exits non-zero when lean mode exceeds that many MB
+per 1000 devices.
+"""
+
+import argparse
+import json
+import logging
+import os
+import resource
+import subprocess
+import sys
+import time
+from types import SimpleNamespace
+
+from checks import run_checks
+from evaluators import PC_IPS
+from lean_results import ResultStore
+from mock_device import MAX_DEVICES, MockCLI, MockProfile, VirtualDevice
+
+log = logging.getLogger(__name__)
+
+# Sanity_Check.tests answered by the check registry, in execution order
+TESTS = ('verify_interface_status', 'ping_test', 'ping_peer_ip', 'ping_pc_hosts',
+         'verify_ospf_neighbors', 'verify_ospf_routes', 'verify_no_acls',
+         'verify_basic_config', 'verify_cpu_memory')
+
+
+def _peak_rss_kb():
+    # ru_maxrss is in kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def _check_device(virtual_device):
+    """Run TESTS on one simulated device, returns (verdicts, failure messages)"""
+    cli = MockCLI(virtual_device)
+    device = SimpleNamespace(name=virtual_device.name, os='ios', platform=None,
+                             connections=SimpleNamespace(
+                                 cli=SimpleNamespace(ip=virtual_device.router_id)))
+    results = run_checks(device, TESTS, lambda command: cli.render(command)[0])
+    verdicts = {test: result['verdict'] for test, result in results.items()}
+    failures = {test: result['message'] for test, result in results.items()
+                if result['verdict'] != 'passed'}
+    return verdicts, failures
+
+
+def run_mode(mode, device_count):
+    """Check device_count devices in one mode, returns peak RSS growth in KB"""
+    # Every tenth device runs hot and cannot reach the PCs, so failure
+    # messages are retained too
+    healthy = MockProfile(jitter=0)
+    degraded = MockProfile(jitter=0, cpu=(85, 99), unreachable=PC_IPS.values())
+    baseline = _peak_rss_kb()
+    kept = []
+    store = ResultStore(TESTS)
+
+    for index in range(1, device_count + 1):
+        profile = degraded if index % 10 == 0 else healthy
+        virtual_device = VirtualDevice(index, device_count, profile)
+        started = {test: time.perf_counter() for test in TESTS}
+        verdicts, failures = _check_device(virtual_device)
+        if mode == 'full':
+            # Sanity_Check drops the outputs at the device's cleanup, but
+            # keeps its _verdicts and _started, and aetest the full reason
+            # of every failed test, until the end of the run
+            kept.append((verdicts, started, list(failures.values())))
+        else:
+            # As Sanity_Check.record_results does in memory-lean mode
+            store.record(virtual_device.name, verdicts, failures)
+
+    return _peak_rss_kb() - baseline
+
+
+def measure(mode, device_count):
+    """Run one mode in a fresh interpreter so peak RSS is not shared"""
+    process = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), '--child', mode, str(device_count)],
+        capture_output=True, text=True, check=True,
+        cwd=os.path.dirname(os.path.abspath(__file__)))
+    return json.loads(process.stdout)['peak_kb']
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--devices', type=int, nargs='+', default=[1000, 5000, 10000],
+                        help=f'device counts, up to {MAX_DEVICES}')
+    parser.add_argument('--budget-mb', type=float,
+                        help='maximum lean peak RSS per 1000 devices')
+    parser.add_argument('--child', nargs=2, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        mode, device_count = args.child
+        print(json.dumps({'peak_kb': run_mode(mode, int(device_count))}))
+        return 0
+
+    over_budget = False
+    for device_count in args.devices:
+        per_thousand = {}
+        for mode in ('full', 'lean'):
+            peak_kb = measure(mode, device_count)
+            per_thousand[mode] = peak_kb / 1024 / (device_count / 1000)
+        log.info(f"{device_count} devices: full {per_thousand['full']:.2f} MB/1000 devices, "
+                 f"lean {per_thousand['lean']:.2f} MB/1000 devices")
+        if args.budget_mb is not None and per_thousand['lean'] > args.budget_mb:
+            log.error(f"Lean mode uses {per_thousand['lean']:.2f} MB per 1000 devices, "
+                      f"over the {args.budget_mb} MB budget")
+            over_budget = True
+    return 1 if over_budget else 0
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    sys.exit(main())
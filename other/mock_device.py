@@ -0,0 +1,822 @@
+#!/usr/bin/env python
+
+"""Local mock IOS devices for deterministic performance testing.
+
+Hosts N virtual IOS routers (R1..RN) on one box, one TCP port each, that
+emulate the IOS prompts and answer every command the suite issues with
+templated output: ping, show ip interface brief, show ip interface,
+show interfaces, show ip ospf neighbor, show ip ospf, show ip route ospf,
+show running-config, show processes cpu, show memory statistics,
+show version, show clock, with ``| include/exclude/begin/section``
+filters and IOS keyword abbreviations (``sh ip int br``).
+
+The routers form an OSPF ring: every router is FULL with its two ring
+neighbors, learns the LAN of the nearest routers and R1/R2 match the
+expectations of evaluators.py, so the Sanity_Check suite passes as-is.
+
+    python mock_device.py --devices 2000 --base-port 20001 --testbed-out mock.yaml
+    python escript.py --testbed mock.yaml
+
+Each command answers after a per-command latency with jitter, set in a
+YAML profile (all keys optional)::
+
+    latency:              # seconds, longest matching command prefix wins
+      default: 0.02
+      ping: 0.5
+      show running-config: 0.2
+    jitter: 0.2           # +/- fraction of the latency
+    seed: 0               # jitter, CPU and ping loss are reproducible
+    ping_loss: 0.0        # probability of losing each ping probe
+    unreachable: [172.16.9.9]
+    cpu: [1, 15]          # 5 second CPU range in percent
+    responses:            # fixed outputs, formatted with {hostname} and {index}
+      show clock: "*10:00:00.000 UTC Mon Oct 19 2026"
+
+``--protocol ssh`` (default, needs paramiko) serves a real SSH shell;
+``--protocol telnet`` serves plain telnet from a single event loop and is
+the lighter choice for several thousand devices.
+"""
+
+import argparse
+import functools
+import logging
+import random
+import re
+import resource
+import selectors
+import socket
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+
+from route_table import int_to_ip
+
+log = logging.getLogger(__name__)
+
+DEFAULT_LATENCY = {
+    'default': 0.02,
+    'ping': 0.5,
+    'show running-config': 0.2,
+    'show interfaces': 0.1,
+    'show ip route': 0.05,
+}
+
+# Route entries learned by each router, nearest ring routers first
+ROUTE_LIMIT = 500
+
+# LAN addresses are 172.(16 + index / 256).(index % 256).0/24
+MAX_DEVICES = 60000
+
+# Exec commands as IOS keywords, longest first so 'show ip interface brief'
+# wins over 'show ip interface'; remaining tokens are passed as arguments
+EXEC_COMMANDS = sorted([
+    ('show', 'version'),
+    ('show', 'clock'),
+    ('show', 'ip', 'interface', 'brief'),
+    ('show', 'ip', 'interface'),
+    ('show', 'interfaces'),
+    ('show', 'ip', 'ospf', 'neighbor'),
+    ('show', 'ip', 'ospf'),
+    ('show', 'ip', 'route', 'ospf'),
+    ('show', 'ip', 'route'),
+    ('show', 'running-config'),
+    ('show', 'processes', 'cpu'),
+    ('show', 'memory', 'statistics'),
+    ('ping',),
+], key=len, reverse=True)
+
+PING_OPTIONS = re.compile(r'\b(repeat|size|timeout)\s+(\d+)')
+
+INVALID_INPUT = "% Invalid input detected at '^' marker.\n"
+
+# Telnet protocol bytes
+IAC, DONT, DO, WONT, WILL, SB, SE = 255, 254, 253, 252, 251, 250, 240
+ECHO, SGA = 1, 3
+
+
+class MockProfile(object):
+    """Latency, jitter and response settings shared by every virtual device"""
+
+    def __init__(self, latency=None, jitter=0.2, seed=0, ping_loss=0.0,
+                 unreachable=(), cpu=(1, 15), responses=None, latency_scale=1.0):
+        self.latency = dict(DEFAULT_LATENCY, **(latency or {}))
+        self.jitter = jitter
+        self.seed = seed
+        self.ping_loss = ping_loss
+        self.unreachable = set(unreachable)
+        self.cpu = tuple(cpu)
+        self.responses = responses or {}
+        self.latency_scale = latency_scale
+        self._prefixes = sorted(self.latency, key=len, reverse=True)
+
+    @classmethod
+    def load(cls, path, **overrides):
+        import yaml
+
+        with open(path) as profile_file:
+            settings = yaml.safe_load(profile_file) or {}
+        settings.update(overrides)
+        return cls(**settings)
+
+    def delay(self, command, rng):
+        """Latency of one command in seconds, jittered with the device rng"""
+        base = self.latency['default']
+        for prefix in self._prefixes:
+            if command.startswith(prefix):
+                base = self.latency[prefix]
+                break
+        jitter = rng.uniform(-self.jitter, self.jitter) if self.jitter else 0
+        return max(0.0, base * (1 + jitter) * self.latency_scale)
+
+
+def _link_address(link, host):
+    """Address of host 1 or 2 on the /30 of ring link number link"""
+    return int_to_ip((10 << 24) + 4 * (link - 1) + host)
+
+
+def _lan_network(index):
+    return f"172.{16 + (index >> 8)}.{index & 255}.0"
+
+
+def _uptime(seconds):
+    """IOS style age: 00:12:34, 2d03h or 1w2d"""
+    seconds = int(seconds)
+    days, hours = seconds // 86400, seconds // 3600 % 24
+    if days >= 7:
+        return f"{days // 7}w{days % 7}d"
+    if days:
+        return f"{days}d{hours:02d}h"
+    return f"{hours:02d}:{seconds // 60 % 60:02d}:{seconds % 60:02d}"
+
+
+class VirtualDevice(object):
+    """One emulated router of the ring, outputs are rendered on demand"""
+
+    def __init__(self, index, count, profile, started=None):
+        self.index = index
+        self.count = count
+        self.name = f"R{index}"
+        self.profile = profile
+        self.rng = random.Random(f"{profile.seed}-{index}")
+        now = time.time()
+        self.booted = (started or now) - self.rng.randint(3600, 30 * 86400)
+        self.config_changed = self.booted + 60
+        self.router_id = int_to_ip((10 << 24) | (255 << 16) | index)
+
+    def links(self):
+        """[(peer index, local address, peer address, interface)] of the ring links"""
+        n, i = self.count, self.index
+        if n < 2:
+            links = []
+        elif n == 2:
+            links = [(3 - i, _link_address(1, i), _link_address(1, 3 - i))]
+        else:
+            following, previous = i % n + 1, (i - 2) % n + 1
+            links = [(following, _link_address(i, 1), _link_address(i, 2)),
+                     (previous, _link_address(previous, 2), _link_address(previous, 1))]
+        return [link + (f"GigabitEthernet0/{slot}",) for slot, link in enumerate(links)]
+
+    def interfaces(self):
+        """[(name, address, prefix length)] of the up interfaces"""
+        interfaces = [('Loopback0', self.router_id, 32)]
+        links = self.links()
+        interfaces.extend((name, address, 30) for _, address, _, name in links)
+        lan = _lan_network(self.index).rsplit('.', 1)[0] + '.1'
+        interfaces.append((f"GigabitEthernet0/{len(links)}", lan, 24))
+        return interfaces
+
+    def routes(self):
+        """[(network, metric, next hop, interface)] of the OSPF routes, nearest first"""
+        n, i = self.count, self.index
+        links = self.links()
+        if not links:
+            return []
+        routes, seen = [], {i}
+        for distance in range(1, n // 2 + 1):
+            for peer, link in ((i + distance - 1) % n + 1, links[0]), \
+                              ((i - distance - 1) % n + 1, links[-1]):
+                if peer not in seen:
+                    seen.add(peer)
+                    routes.append((_lan_network(peer), distance + 1, link[2], link[3]))
+            if len(routes) >= ROUTE_LIMIT:
+                break
+        return routes[:ROUTE_LIMIT]
+
+    # Renderers, one per EXEC_COMMANDS entry
+
+    def show_version(self, args):
+        return (f"Cisco IOS Software, IOSv Software (VIOS-ADVENTERPRISEK9-M), "
+                f"Version 15.9(3)M6, RELEASE SOFTWARE (fc1)\n"
+                f"Technical Support: http://www.cisco.com/techsupport\n"
+                f"ROM: Bootstrap program is IOSv\n\n"
+                f"{self.name} uptime is {_uptime(time.time() - self.booted)}\n"
+                f"System returned to ROM by reload\n"
+                f'System image file is "flash0:/vios-adventerprisek9-m"\n\n'
+                f"cisco IOSv (revision 1.0) with 460137K/62464K bytes of memory.\n"
+                f"Processor board ID 9{self.index:010d}\n"
+                f"{len(self.interfaces()) - 1} Gigabit Ethernet interfaces\n"
+                f"Configuration register is 0x0\n")
+
+    def show_clock(self, args):
+        now = datetime.now(timezone.utc)
+        return f"*{now:%H:%M:%S}.{now.microsecond // 1000:03d} UTC {now:%a %b %d %Y}\n"
+
+    def show_ip_interface_brief(self, args):
+        lines = ["Interface              IP-Address      OK? Method Status                Protocol"]
+        for name, address, _ in self.interfaces():
+            lines.append(f"{name:<22} {address:<15} YES NVRAM  up                    up      ")
+        return '\n'.join(lines) + '\n'
+
+    def show_ip_interface(self, args):
+        lines = []
+        for name, address, length in self.interfaces():
+            lines.extend([
+                f"{name} is up, line protocol is up",
+                f"  Internet address is {address}/{length}",
+                "  Broadcast address is 255.255.255.255",
+                "  MTU is 1500 bytes",
+                "  Helper address is not set",
+                "  Outgoing Common access list is not set ",
+                "  Outgoing access list is not set",
+                "  Inbound Common access list is not set ",
+                "  Inbound  access list is not set",
+                "  Proxy ARP is enabled",
+            ])
+        return '\n'.join(lines) + '\n'
+
+    def show_interfaces(self, args):
+        elapsed = time.time() - self.booted
+        lines = []
+        for slot, (name, address, length) in enumerate(self.interfaces()):
+            # Counters grow with the uptime so successive samples have deltas
+            packets_in = int(elapsed * (3 + slot))
+            packets_out = int(elapsed * (2 + slot))
+            mac = f"5254.00{self.index >> 8 & 255:02x}.{self.index & 255:02x}{slot:02x}"
+            lines.extend([
+                f"{name} is up, line protocol is up ",
+                f"  Hardware is iGbE, address is {mac} (bia {mac})",
+                f"  Internet address is {address}/{length}",
+                "  MTU 1500 bytes, BW 1000000 Kbit/sec, DLY 10 usec, ",
+                "     reliability 255/255, txload 1/255, rxload 1/255",
+                "  Encapsulation ARPA, loopback not set",
+                "  Keepalive set (10 sec)",
+                "  Last input 00:00:00, output 00:00:00, output hang never",
+                '  Last clearing of "show interface" counters never',
+                "  Input queue: 0/75/0/0 (size/max/drops/flushes); Total output drops: 0",
+                "  Queueing strategy: fifo",
+                "  Output queue: 0/40 (size/max)",
+                f"  5 minute input rate {(3 + slot) * 800} bits/sec, {3 + slot} packets/sec",
+                f"  5 minute output rate {(2 + slot) * 800} bits/sec, {2 + slot} packets/sec",
+                f"     {packets_in} packets input, {packets_in * 100} bytes, 0 no buffer",
+                f"     Received {packets_in // 10} broadcasts (0 IP multicasts)",
+                "     0 runts, 0 giants, 0 throttles ",
+                "     0 input errors, 0 CRC, 0 frame, 0 overrun, 0 ignored",
+                "     0 watchdog, 0 multicast, 0 pause input",
+                f"     {packets_out} packets output, {packets_out * 100} bytes, 0 underruns",
+                "     0 output errors, 0 collisions, 1 interface resets",
+                "     0 unknown protocol drops",
+                "     0 babbles, 0 late collision, 0 deferred",
+                "     0 lost carrier, 0 no carrier, 0 pause output",
+                "     0 output buffer failures, 0 output buffers swapped out",
+            ])
+        return '\n'.join(lines) + '\n'
+
+    def show_ip_ospf_neighbor(self, args):
+        lines = ["", "Neighbor ID     Pri   State           Dead Time   Address         Interface"]
+        for peer, _, peer_address, interface in self.links():
+            peer_id = int_to_ip((10 << 24) | (255 << 16) | peer)
+            role = 'DR' if peer > self.index else 'BDR'
+            dead = f"00:00:{self.rng.randint(31, 39)}"
+            lines.append(f"{peer_id:<15} {1:>3}   {'FULL/' + role:<15} {dead}    "
+                         f"{peer_address:<15} {interface}")
+        return '\n'.join(lines) + '\n'
+
+    def show_ip_ospf(self, args):
+        return (f' Routing Process "ospf 1" with ID {self.router_id}\n'
+                f" Start time: 00:00:09.326, Time elapsed: {_uptime(time.time() - self.booted)}\n"
+                " Supports only single TOS(TOS0) routes\n"
+                " Supports opaque LSA\n"
+                " Router is not originating router-LSAs with maximum metric\n"
+                " Number of areas in this router is 1. 1 normal 0 stub 0 nssa\n"
+                "    Area BACKBONE(0)\n"
+                f"        Number of interfaces in this area is {len(self.interfaces())}\n")
+
+    def show_ip_route_ospf(self, args):
+        lines = ["Codes: L - local, C - connected, S - static, R - RIP, M - mobile, B - BGP",
+                 "       D - EIGRP, EX - EIGRP external, O - OSPF, IA - OSPF inter area ",
+                 "       N1 - OSPF NSSA external type 1, N2 - OSPF NSSA external type 2",
+                 "       E1 - OSPF external type 1, E2 - OSPF external type 2",
+                 "",
+                 "Gateway of last resort is not set",
+                 ""]
+        age = _uptime(time.time() - self.config_changed)
+        groups = {}
+        for route in self.routes():
+            groups.setdefault(route[0].rsplit('.', 2)[0], []).append(route)
+        for major in sorted(groups, key=lambda network: [int(part) for part in network.split('.')]):
+            routes = groups[major]
+            lines.append(f"      {major}.0.0/16 is variably subnetted, {len(routes)} subnets, 1 masks")
+            for network, metric, next_hop, interface in routes:
+                lines.append(f"O        {network}/24 [110/{metric}] via {next_hop}, {age}, {interface}")
+        return '\n'.join(lines) + '\n'
+
+    def show_ip_route(self, args):
+        if args[:1] and 'ospf'.startswith(args[0]):
+            return self.show_ip_route_ospf(args[1:])
+        output = self.show_ip_route_ospf(args)
+        connected = [f"C        {address}/{length} is directly connected, {name}"
+                     for name, address, length in self.interfaces()]
+        return output + '\n'.join(connected) + '\n'
+
+    def show_running_config(self, args):
+        changed = datetime.fromtimestamp(self.config_changed, timezone.utc)
+        lines = ["Building configuration...", "",
+                 "Current configuration : 2048 bytes", "!",
+                 f"! Last configuration change at {changed:%H:%M:%S} UTC {changed:%a %b %d %Y} by cisco",
+                 "!", "version 15.9",
+                 "service timestamps debug datetime msec",
+                 "service timestamps log datetime msec", "!",
+                 f"hostname {self.name}", "!",
+                 "boot-start-marker", "boot-end-marker", "!",
+                 "logging buffered 16384", "!"]
+        for name, address, length in self.interfaces():
+            mask = int_to_ip((0xFFFFFFFF << (32 - length)) & 0xFFFFFFFF)
+            lines.extend([f"interface {name}", f" ip address {address} {mask}"])
+            if name != 'Loopback0':
+                lines.extend([" duplex auto", " speed auto", " media-type rj45"])
+            lines.append("!")
+        lines.extend(["router ospf 1", f" router-id {self.router_id}",
+                      " network 10.0.0.0 0.255.255.255 area 0",
+                      " network 172.16.0.0 0.15.255.255 area 0", "!",
+                      "ip forward-protocol nd", "!",
+                      "ntp server 10.255.255.254", "!",
+                      "line con 0", " exec-timeout 0 0", "line vty 0 4", " login local",
+                      " transport input ssh telnet", "!", "end"])
+        return '\n'.join(lines) + '\n'
+
+    def show_processes_cpu(self, args):
+        low, high = self.profile.cpu
+        five_seconds = self.rng.randint(low, high)
+        interrupt = self.rng.randint(0, five_seconds)
+        return (f"CPU utilization for five seconds: {five_seconds}%/{interrupt}%; "
+                f"one minute: {max(low, five_seconds - 1)}%; five minutes: {low}%\n"
+                " PID Runtime(ms)     Invoked      uSecs   5Sec   1Min   5Min TTY Process \n"
+                "   1           4          41         97  0.00%  0.00%  0.00%   0 Chunk Manager    \n"
+                "   2        1234       45678         27  0.00%  0.00%  0.00%   0 Load Meter       \n")
+
+    def show_memory_statistics(self, args):
+        used = 78523220 + self.rng.randint(0, 1 << 20)
+        return ("                Head    Total(b)     Used(b)     Free(b)   Lowest(b)  Largest(b)\n"
+                f"Processor  E8B8C6C0   383456576   {used:>9}   {383456576 - used:>9}   "
+                "303868012   304217772\n"
+                "      I/O   4000000    62914560    12478880    50435680    50386152    50417716\n")
+
+    def ping(self, args):
+        target = args[0] if args else ''
+        options = dict(PING_OPTIONS.findall(' '.join(args[1:])))
+        repeat = int(options.get('repeat', 5))
+        size = int(options.get('size', 100))
+        timeout = int(options.get('timeout', 2))
+        if target in self.profile.unreachable:
+            replies = [False] * repeat
+        else:
+            replies = [self.rng.random() >= self.profile.ping_loss for _ in range(repeat)]
+        received = sum(replies)
+        lines = ["Type escape sequence to abort.",
+                 f"Sending {repeat}, {size}-byte ICMP Echos to {target}, timeout is {timeout} seconds:",
+                 ''.join('!' if reply else '.' for reply in replies)]
+        summary = f"Success rate is {received * 100 // repeat if repeat else 0} percent ({received}/{repeat})"
+        if received:
+            rtts = sorted(self.rng.randint(1, 9) for _ in range(received))
+            summary += f", round-trip min/avg/max = {rtts[0]}/{sum(rtts) // received}/{rtts[-1]} ms"
+        lines.append(summary)
+        return '\n'.join(lines) + '\n'
+
+
+def _match_keywords(tokens, keywords):
+    """True when every keyword is abbreviated by the matching token"""
+    return len(tokens) >= len(keywords) and all(
+        keyword.startswith(token) for token, keyword in zip(tokens, keywords))
+
+
+def _apply_filter(output, pipe):
+    """Apply an IOS output modifier like 'include CPU' or 'section ospf'"""
+    modifier, _, pattern = pipe.strip().partition(' ')
+    try:
+        regex = re.compile(pattern.strip())
+        search = regex.search
+    except re.error:
+        search = lambda line: pattern.strip() in line
+    lines = output.splitlines()
+    if 'include'.startswith(modifier):
+        lines = [line for line in lines if search(line)]
+    elif 'exclude'.startswith(modifier):
+        lines = [line for line in lines if not search(line)]
+    elif 'begin'.startswith(modifier):
+        for position, line in enumerate(lines):
+            if search(line):
+                lines = lines[position:]
+                break
+        else:
+            lines = []
+    elif 'section'.startswith(modifier):
+        kept, inside = [], False
+        for line in lines:
+            if not line.startswith(' '):
+                inside = bool(search(line))
+            if inside:
+                kept.append(line)
+        lines = kept
+    elif 'count'.startswith(modifier):
+        lines = [f"Number of lines which match regexp = {sum(1 for line in lines if search(line))}"]
+    else:
+        return None
+    return '\n'.join(lines) + '\n' if lines else ''
+
+
+class MockCLI(object):
+    """IOS prompt state machine of one session, independent of the transport"""
+
+    def __init__(self, device):
+        self.device = device
+        self.mode = 'exec'
+        self.closed = False
+        self._enable_password = False
+
+    @property
+    def prompt(self):
+        if self.mode == 'user':
+            return f"{self.device.name}>"
+        if self.mode == 'exec':
+            return f"{self.device.name}#"
+        return f"{self.device.name}({self.mode})#"
+
+    def greeting(self):
+        return f"\r\n{self.prompt}".encode()
+
+    def render(self, line):
+        """(output text, canonical command) of an exec command line"""
+        command, *pipes = line.split('|')
+        tokens = command.split()
+        profile = self.device.profile
+        for keywords in EXEC_COMMANDS:
+            if _match_keywords(tokens, keywords):
+                canonical = ' '.join(keywords)
+                response = profile.responses.get(line.strip(), profile.responses.get(canonical))
+                if response is not None:
+                    output = response.format(hostname=self.device.name, index=self.device.index)
+                else:
+                    renderer = getattr(self.device, canonical.replace(' ', '_').replace('-', '_'))
+                    output = renderer(tokens[len(keywords):])
+                break
+        else:
+            return INVALID_INPUT, line.strip()
+        for pipe in pipes:
+            output = _apply_filter(output, pipe)
+            if output is None:
+                return INVALID_INPUT, canonical
+        return output, canonical
+
+    def handle(self, line):
+        """Process one input line, returns (bytes to send, latency in seconds)"""
+        line = line.strip()
+        tokens = line.split()
+        output, latency = '', 0.0
+
+        if self._enable_password:
+            self._enable_password = False
+            self.mode = 'exec'
+        elif not tokens:
+            pass
+        elif self.mode == 'user' and _match_keywords(tokens, ('enable',)):
+            self._enable_password = True
+            return b"Password: ", 0.0
+        elif self.mode not in ('user', 'exec'):
+            output = self._configure(tokens)
+        elif tokens[0] in ('exit', 'logout', 'quit'):
+            self.closed = True
+            return b"", 0.0
+        elif _match_keywords(tokens, ('configure', 'terminal')) and self.mode == 'exec':
+            self.mode = 'config'
+            self.device.config_changed = time.time()
+            output = "Enter configuration commands, one per line.  End with CNTL/Z.\n"
+        elif tokens[0] == 'enable' or _match_keywords(tokens, ('terminal',)):
+            pass
+        elif tokens[0] == 'disable':
+            self.mode = 'user'
+        else:
+            output, canonical = self.render(line)
+            latency = self.device.profile.delay(canonical, self.device.rng)
+            if canonical == 'ping':
+                # Every lost probe waits out the ping timeout
+                timeout = int(dict(PING_OPTIONS.findall(line)).get('timeout', 2))
+                probes = next((row for row in output.splitlines()
+                               if row and set(row) <= {'!', '.'}), '')
+                latency += probes.count('.') * timeout * self.device.profile.latency_scale
+
+        output = output.replace('\n', '\r\n')
+        return (output + self.prompt).encode(), latency
+
+    def _configure(self, tokens):
+        if tokens[0] == 'do':
+            return self.render(' '.join(tokens[1:]))[0]
+        if tokens[0] == 'end' or tokens[0] == '\x1a':
+            self.mode = 'exec'
+        elif tokens[0] == 'exit':
+            self.mode = 'config' if self.mode != 'config' else 'exec'
+        elif 'interface'.startswith(tokens[0]) and len(tokens) > 1:
+            self.mode = 'config-if'
+        elif tokens[0] == 'line' and len(tokens) > 1:
+            self.mode = 'config-line'
+        elif tokens[0] == 'router' and len(tokens) > 1:
+            self.mode = 'config-router'
+        self.device.config_changed = time.time()
+        return ''
+
+
+class _LineBuffer(object):
+    """Assemble input lines from raw bytes, with echo and telnet option stripping"""
+
+    def __init__(self):
+        self._line = bytearray()
+        self._last = None
+        self._state = None
+
+    def feed(self, data, echo=True):
+        """Returns (bytes to echo, completed lines)"""
+        echoed, lines = bytearray(), []
+        for byte in data:
+            state = self._state
+            if state == 'iac':
+                self._state = ('option' if byte in (WILL, WONT, DO, DONT) else
+                               'sb' if byte == SB else None)
+                if byte != IAC:
+                    continue
+            elif state == 'option':
+                self._state = None
+                continue
+            elif state == 'sb':
+                if byte == IAC:
+                    self._state = 'sb-iac'
+                continue
+            elif state == 'sb-iac':
+                self._state = None if byte == SE else 'sb'
+                continue
+            elif byte == IAC:
+                self._state = 'iac'
+                continue
+
+            if byte in (10, 13, 0):
+                # \r\n, \r\0 and \n\r end a single line
+                if self._last in (10, 13) and byte != self._last:
+                    self._last = None
+                    continue
+                if byte != 0:
+                    lines.append(self._line.decode(errors='replace'))
+                    self._line = bytearray()
+                    echoed += b"\r\n"
+            elif byte in (8, 127):
+                if self._line:
+                    self._line.pop()
+                    if echo:
+                        echoed += b"\b \b"
+            elif byte == 26:
+                # Ctrl-Z leaves configuration mode
+                lines.append('end')
+                self._line = bytearray()
+                echoed += b"^Z\r\n"
+            else:
+                self._line.append(byte)
+                if echo:
+                    echoed.append(byte)
+            self._last = byte
+        return bytes(echoed), lines
+
+
+class MockFleet(object):
+    """The virtual devices and their ports"""
+
+    def __init__(self, count, profile=None, host='127.0.0.1', base_port=20001):
+        if not 1 <= count <= MAX_DEVICES:
+            raise ValueError(f"Device count must be between 1 and {MAX_DEVICES}")
+        self.profile = profile or MockProfile()
+        self.host = host
+        self.base_port = base_port
+        started = time.time()
+        self.devices = [VirtualDevice(index, count, self.profile, started)
+                        for index in range(1, count + 1)]
+
+    def port(self, device):
+        return self.base_port + device.index - 1
+
+    def testbed(self, protocol='ssh'):
+        """Testbed dict pointing every device at its mock port"""
+        credentials = {'default': {'username': 'cisco', 'password': 'cisco'},
+                       'enable': {'password': 'cisco'}}
+        return {'devices': {
+            device.name: {
+                'connections': {'cli': {'ip': self.host, 'port': self.port(device),
+                                        'protocol': protocol}},
+                'credentials': credentials,
+                'os': 'ios',
+                'platform': 'IOSv',
+                'type': 'ios',
+            } for device in self.devices}}
+
+    def write_testbed(self, path, protocol='ssh'):
+        import yaml
+
+        with open(path, 'w') as testbed_file:
+            testbed_file.write('---\n')
+            yaml.safe_dump(self.testbed(protocol), testbed_file, default_flow_style=False)
+        log.info(f"Wrote mock testbed with {len(self.devices)} devices to {path}")
+
+
+async def _telnet_session(device, reader, writer):
+    import asyncio
+
+    cli = MockCLI(device)
+    buffer = _LineBuffer()
+    pending = []
+
+    async def readline(echo=True):
+        while not pending:
+            data = await reader.read(4096)
+            if not data:
+                return None
+            echoed, lines = buffer.feed(data, echo)
+            writer.write(echoed)
+            pending.extend(lines)
+        return pending.pop(0)
+
+    try:
+        writer.write(bytes([IAC, WILL, ECHO, IAC, WILL, SGA]))
+        writer.write(b"\r\nUser Access Verification\r\n\r\nUsername: ")
+        if await readline() is None:
+            return
+        writer.write(b"Password: ")
+        if await readline(echo=False) is None:
+            return
+        writer.write(cli.greeting())
+        while not cli.closed:
+            line = await readline(echo=not cli._enable_password)
+            if line is None:
+                break
+            output, latency = cli.handle(line)
+            if latency:
+                await asyncio.sleep(latency)
+            writer.write(output)
+            await writer.drain()
+    except ConnectionError:
+        pass
+    finally:
+        writer.close()
+
+
+async def serve_telnet(fleet):
+    """Serve every device of the fleet over telnet from this event loop"""
+    import asyncio
+
+    servers = []
+    for device in fleet.devices:
+        servers.append(await asyncio.start_server(
+            functools.partial(_telnet_session, device), fleet.host, fleet.port(device),
+            backlog=64))
+    log.info(f"Serving {len(servers)} telnet devices on {fleet.host}:"
+             f"{fleet.base_port}-{fleet.base_port + len(servers) - 1}")
+    await asyncio.gather(*(server.serve_forever() for server in servers))
+
+
+def _ssh_session(sock, device, host_key):
+    import paramiko
+
+    class Server(paramiko.ServerInterface):
+        def __init__(self):
+            self.shell = threading.Event()
+
+        def get_allowed_auths(self, username):
+            return 'password'
+
+        def check_auth_password(self, username, password):
+            return paramiko.AUTH_SUCCESSFUL
+
+        def check_channel_request(self, kind, chanid):
+            if kind == 'session':
+                return paramiko.OPEN_SUCCEEDED
+            return paramiko.OPEN_FAILED_ADMINISTRATIVELY_PROHIBITED
+
+        def check_channel_pty_request(self, channel, term, width, height,
+                                      pixelwidth, pixelheight, modes):
+            return True
+
+        def check_channel_shell_request(self, channel):
+            self.shell.set()
+            return True
+
+    transport = paramiko.Transport(sock)
+    transport.add_server_key(host_key)
+    server = Server()
+    try:
+        transport.start_server(server=server)
+        channel = transport.accept(30)
+        if channel is None or not server.shell.wait(10):
+            return
+        cli = MockCLI(device)
+        buffer = _LineBuffer()
+        channel.sendall(cli.greeting())
+        while not cli.closed:
+            data = channel.recv(4096)
+            if not data:
+                break
+            echoed, lines = buffer.feed(data, echo=not cli._enable_password)
+            if echoed:
+                channel.sendall(echoed)
+            for line in lines:
+                output, latency = cli.handle(line)
+                if latency:
+                    time.sleep(latency)
+                channel.sendall(output)
+                if cli.closed:
+                    break
+    except Exception as e:
+        log.debug(f"SSH session to {device.name} ended: {str(e)}")
+    finally:
+        transport.close()
+
+
+def serve_ssh(fleet, stop=None):
+    """Serve every device over SSH: one accept loop, one thread per session"""
+    try:
+        import paramiko
+    except ImportError:
+        raise RuntimeError("paramiko is required for --protocol ssh, install it from "
+                           "requirements.txt or use --protocol telnet")
+
+    host_key = paramiko.RSAKey.generate(2048)
+    selector = selectors.DefaultSelector()
+    for device in fleet.devices:
+        listener = socket.create_server((fleet.host, fleet.port(device)), backlog=64)
+        listener.setblocking(False)
+        selector.register(listener, selectors.EVENT_READ, device)
+    log.info(f"Serving {len(fleet.devices)} SSH devices on {fleet.host}:"
+             f"{fleet.base_port}-{fleet.base_port + len(fleet.devices) - 1}")
+
+    stop = stop or threading.Event()
+    while not stop.is_set():
+        for key, _ in selector.select(timeout=1):
+            try:
+                connection, _ = key.fileobj.accept()
+            except BlockingIOError:
+                continue
+            connection.setblocking(True)
+            threading.Thread(target=_ssh_session, args=(connection, key.data, host_key),
+                             daemon=True).start()
+
+
+def _raise_file_limit(needed):
+    """Lift the open file soft limit, every device holds a listening socket"""
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if soft < hard:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+    if hard != resource.RLIM_INFINITY and hard < needed:
+        log.warning(f"Open file limit {hard} is below the {needed} needed, "
+                    f"raise it with ulimit -n")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--devices', type=int, default=2)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--base-port', type=int, default=20001,
+                        help='port of R1, R<n> listens on base port + n - 1')
+    parser.add_argument('--protocol', choices=('ssh', 'telnet'), default='ssh')
+    parser.add_argument('--profile', help='YAML latency and response profile')
+    parser.add_argument('--latency-scale', type=float, default=1.0,
+                        help='multiply every latency, 0 answers immediately')
+    parser.add_argument('--testbed-out', help='write a testbed for the mock devices here')
+    args = parser.parse_args(argv)
+
+    if args.profile:
+        profile = MockProfile.load(args.profile, latency_scale=args.latency_scale)
+    else:
+        profile = MockProfile(latency_scale=args.latency_scale)
+    fleet = MockFleet(args.devices, profile, args.host, args.base_port)
+    if args.testbed_out:
+        fleet.write_testbed(args.testbed_out, args.protocol)
+
+    _raise_file_limit(args.devices * 2 + 64)
+    try:
+        if args.protocol == 'ssh':
+            serve_ssh(fleet)
+        else:
+            import asyncio
+            asyncio.run(serve_telnet(fleet))
+    except KeyboardInterrupt:
+        log.info("Mock devices stopped")
+    return 0
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(message)s')
+    sys.exit(main())
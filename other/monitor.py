@@ -0,0 +1,291 @@
+#!/usr/bin/env python
+
+"""Continuous monitoring of the Sanity_Check checks with per-check schedules.
+
+Keeps one session per device open and polls each check on its own interval
+(CPU every 30s, OSPF every 2 minutes, interface error rates every 5
+minutes, ACL/config hourly by default). Checks
+of a device that fall due within ``--coalesce`` seconds of each other are
+run in a single device visit, and a command shared by several due checks is
+issued once (the check registry, checks.py). The latest results are served as JSON over HTTP:
+
+    python monitor.py --testbed testbed.yaml --port 8080 --interval verify_cpu_memory=15
+
+    GET /results            every device
+    GET /results/<device>   one device
+    GET /health             scheduler state and rate limit queueing delay
+
+Commands go through the testbed rate limits (rate_limit.py). With
+``--restconf``, devices with a restconf testbed connection are read over
+RESTCONF for the interface, OSPF and route checks (restconf.py). With
+``--telemetry-port``, devices pushing dial-out telemetry have their CPU and
+interface checks answered from the latest sample (telemetry.py); a device
+is only connected to when a due check needs its CLI.
+"""
+
+import argparse
+import heapq
+import json
+import logging
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from checks import CHECKS, run_checks
+from output_digest import OutputDigests
+from evaluators import CPU_THRESHOLD, EXPECTED_OSPF_STATE
+from rate_limit import CommandGovernor
+
+log = logging.getLogger(__name__)
+
+# Polling interval per check, in seconds
+DEFAULT_INTERVALS = {
+    'verify_cpu_memory': 30,
+    'verify_interface_status': 60,
+    'ping_test': 60,
+    'verify_ospf_neighbors': 120,
+    'verify_ospf_routes': 120,
+    'verify_interface_errors': 300,
+    'verify_no_acls': 3600,
+    'verify_basic_config': 3600,
+}
+
+
+class Monitor(object):
+    """Scheduler polling every device's checks on their own intervals"""
+
+    def __init__(self, testbed, intervals=None, cpu_threshold=CPU_THRESHOLD,
+                 expected_ospf_state=EXPECTED_OSPF_STATE, workers=16, coalesce=5,
+                 governor=None, structured=None):
+        self.testbed = testbed
+        self.governor = governor or CommandGovernor.from_testbed(testbed)
+        self.intervals = dict(DEFAULT_INTERVALS, **(intervals or {}))
+        self.settings = {'cpu_threshold': cpu_threshold,
+                         'expected_ospf_state': expected_ospf_state,
+                         # Device -> latest interface counters, for the error deltas
+                         'interface_samples': {},
+                         'structured': structured,
+                         # Outputs unchanged since the previous visit keep their verdict
+                         'digests': OutputDigests()}
+        self.coalesce = coalesce
+        self.results = {name: {} for name in testbed.devices}
+        self.visits = 0
+        # Devices with a visit running, cleared when the visit reschedules
+        self._in_flight = set()
+        self._pool = ThreadPoolExecutor(max_workers=workers)
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._wakeup = threading.Event()
+
+        # Next due time per device and check, staggered so devices do not
+        # all hit the scheduler at the same instant
+        now = time.monotonic()
+        self._due = {}
+        self._queue = []
+        for index, name in enumerate(testbed.devices):
+            offset = index * 0.01
+            self._due[name] = {check: now + offset for check in self.intervals}
+            heapq.heappush(self._queue, (now + offset, name))
+
+    def _visit(self, device_name, checks):
+        """Run the due checks of one device in a single visit"""
+        device = self.testbed.devices[device_name]
+        start = time.monotonic()
+        connection_error = []
+
+        def execute(command):
+            # Connect on the first command, checks answered from structured
+            # data need no session
+            if connection_error:
+                raise connection_error[0]
+            if not device.is_connected():
+                try:
+                    device.connect(log_stdout=False)
+                except Exception as e:
+                    connection_error.append(
+                        ConnectionError(f"Failed to connect to {device_name}: {str(e)}"))
+                    raise connection_error[0]
+            return self.governor.execute(device.execute, device_name, command)
+
+        # A command shared by several due checks is issued once
+        outputs = {}
+        try:
+            results = run_checks(device, checks, execute, self.settings, outputs=outputs)
+            verdicts = {check: (result['verdict'], result['message'], result['duration'])
+                        for check, result in results.items()}
+            self._store(device_name, verdicts)
+            log.debug(f"Visited {device_name} for {len(checks)} checks, "
+                      f"{len(outputs)} commands in {time.monotonic() - start:.2f}s")
+        except Exception as e:
+            # The pool would keep the exception in the future unseen
+            log.error(f"Visit of {device_name} failed: {str(e)}")
+        finally:
+            # A failed visit is retried on the checks' next interval
+            self._reschedule(device_name, checks)
+
+    def _store(self, device_name, verdicts):
+        timestamp = datetime.now().isoformat()
+        with self._lock:
+            self.visits += 1
+            for check, (verdict, message, duration) in verdicts.items():
+                self.results[device_name][check] = {
+                    'verdict': verdict, 'message': message,
+                    'duration': round(duration, 3), 'timestamp': timestamp}
+
+    def _reschedule(self, device_name, checks):
+        now = time.monotonic()
+        with self._lock:
+            due = self._due[device_name]
+            for check in checks:
+                due[check] = now + self.intervals[check]
+            # Under the same lock as the push, so run() cannot pop the new
+            # entry while the device still looks busy and drop it
+            self._in_flight.discard(device_name)
+            heapq.heappush(self._queue, (min(due.values()), device_name))
+        self._wakeup.set()
+
+    def run(self):
+        """Dispatch device visits until stop() is called"""
+        while not self._stop.is_set():
+            with self._lock:
+                now = time.monotonic()
+                ready = []
+                while self._queue and self._queue[0][0] <= now:
+                    _, device_name = heapq.heappop(self._queue)
+                    if device_name in self._in_flight:
+                        continue
+                    due = self._due[device_name]
+                    checks = [check for check, when in due.items()
+                              if when <= now + self.coalesce]
+                    if checks:
+                        self._in_flight.add(device_name)
+                        ready.append((device_name, checks))
+                    else:
+                        heapq.heappush(self._queue, (min(due.values()), device_name))
+                delay = self._queue[0][0] - now if self._queue else 1
+
+            for device_name, checks in ready:
+                self._pool.submit(self._visit, device_name, checks)
+
+            self._wakeup.wait(max(0.05, min(delay, 1)))
+            self._wakeup.clear()
+
+    def stop(self):
+        self._stop.set()
+        self._wakeup.set()
+        self._pool.shutdown(wait=True)
+        for device in self.testbed.devices.values():
+            try:
+                if device.is_connected():
+                    device.disconnect()
+            except Exception as e:
+                log.warning(f"Error disconnecting from {device.name}: {str(e)}")
+
+    def snapshot(self, device_name=None):
+        """Copy of the latest results, for one device or all of them"""
+        with self._lock:
+            if device_name is not None:
+                return json.loads(json.dumps(self.results[device_name]))
+            return json.loads(json.dumps(self.results))
+
+    def health(self):
+        with self._lock:
+            return {'devices': len(self.results), 'visits': self.visits,
+                    'queued': len(self._queue), 'intervals': self.intervals,
+                    'queueing': self.governor.metrics()['fleet']}
+
+
+def serve_http(monitor, host='127.0.0.1', port=8080):
+    """Serve the latest results as JSON from a background thread"""
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            parts = [part for part in self.path.split('?')[0].split('/') if part]
+            if parts == ['health']:
+                body, status = monitor.health(), 200
+            elif parts == ['results']:
+                body, status = monitor.snapshot(), 200
+            elif len(parts) == 2 and parts[0] == 'results' and parts[1] in monitor.results:
+                body, status = monitor.snapshot(parts[1]), 200
+            else:
+                body, status = {'error': f"Not found: {self.path}"}, 404
+            payload = json.dumps(body).encode()
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, format, *args):
+            log.debug(format % args)
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    log.info(f"Serving monitor results on http://{host}:{server.server_port}/results")
+    return server
+
+
+def _parse_interval(value):
+    check, _, seconds = value.partition('=')
+    if check not in CHECKS or not seconds:
+        raise argparse.ArgumentTypeError(
+            f"Expected CHECK=SECONDS with CHECK one of {', '.join(CHECKS)}")
+    return check, float(seconds)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--testbed', dest='testbed', required=True)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--interval', type=_parse_interval, action='append', default=[],
+                        help='override a check interval, e.g. verify_cpu_memory=15')
+    parser.add_argument('--coalesce', type=float, default=5,
+                        help='run checks due within this many seconds in one visit')
+    parser.add_argument('--workers', type=int, default=16)
+    parser.add_argument('--cpu-threshold', type=int, default=CPU_THRESHOLD)
+    parser.add_argument('--restconf', action='store_true',
+                        help='read interfaces, OSPF and routes over RESTCONF where the '
+                             'testbed has a restconf connection (restconf.py)')
+    parser.add_argument('--telemetry-port', type=int, default=None,
+                        help='receive dial-out telemetry on this port and answer CPU and '
+                             'interface checks from it (telemetry.py)')
+    args = parser.parse_args(argv)
+
+    from pyats.topology import loader
+    testbed = loader.load(args.testbed)
+
+    structured, collector, receiver = [], None, None
+    if args.telemetry_port is not None:
+        from telemetry import TelemetryReceiver, TelemetryStore
+        receiver = TelemetryReceiver(TelemetryStore(), port=args.telemetry_port).start()
+        structured.append(receiver.store)
+    if args.restconf:
+        from restconf import StructuredCollector
+        collector = StructuredCollector()
+        structured.append(collector)
+
+    monitor = Monitor(testbed, dict(args.interval), cpu_threshold=args.cpu_threshold,
+                      workers=args.workers, coalesce=args.coalesce,
+                      structured=structured or None)
+    server = serve_http(monitor, args.host, args.port)
+    try:
+        monitor.run()
+    except KeyboardInterrupt:
+        log.info("Stopping monitor")
+    finally:
+        server.shutdown()
+        monitor.stop()
+        if collector is not None:
+            collector.close()
+        if receiver is not None:
+            receiver.stop()
+    return 0
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(message)s')
+    sys.exit(main())
@@ -0,0 +1,138 @@
+#!/usr/bin/env python
+
+"""Re-evaluate Sanity_Check verdicts against captured outputs, offline.
+
+Run escript.py with a ``capture_file`` script argument to record outputs:
+
+    python escript.py --testbed testbed.yaml --capture_file run1.jsonl
+
+then replay the evaluation logic with new thresholds, without any device:
+
+    python offline_eval.py run1.jsonl --cpu-threshold 60 --output diff.json
+
+Only the evaluation is replayed, so a 5000 device capture is re-evaluated
+in seconds. The verdicts are diffed against the ones of the original run.
+"""
+
+import argparse
+import json
+import logging
+import sys
+import time
+from types import SimpleNamespace
+
+from capture import load_capture
+from checks import CHECKS, DEFAULT_SETTINGS
+from evaluators import CPU_THRESHOLD, EXPECTED_OSPF_STATE
+
+log = logging.getLogger(__name__)
+
+
+def _ping_targets(tests, test):
+    """Targets of the pings captured for a test"""
+    return [command.split()[1] for command, _ in tests.get(test, {}).get('outputs', [])
+            if command.startswith('ping ')]
+
+
+def _replay_device(device_name, tests):
+    """Stand-in for a captured device, its management IP read back from ping_test"""
+    pings = _ping_targets(tests, 'ping_test')
+    cli = SimpleNamespace(ip=pings[0] if pings else None)
+    return SimpleNamespace(name=device_name, os='ios', platform=None,
+                           connections=SimpleNamespace(cli=cli))
+
+
+def replay(devices, cpu_threshold=CPU_THRESHOLD, expected_ospf_state=EXPECTED_OSPF_STATE):
+    """Re-evaluate every captured test and diff against the original verdicts
+
+    Each test is replayed through the evaluation of its check (checks.py)
+    on the outputs captured for its commands. Returns a list of result
+    dicts, one per device and test. Tests that errored during the original
+    run (no usable output) keep their verdict.
+    """
+    settings = dict(DEFAULT_SETTINGS, cpu_threshold=cpu_threshold,
+                    expected_ospf_state=expected_ospf_state)
+    results = []
+    for device_name, tests in devices.items():
+        device = _replay_device(device_name, tests)
+        # The peers pinged live may have come from the OSPF graph of the run
+        peers = _ping_targets(tests, 'ping_peer_ip')
+        device_settings = settings
+        if peers:
+            device_settings = dict(settings, peer_ips=dict(settings['peer_ips'],
+                                                           **{device_name: peers}))
+        for test, entry in tests.items():
+            original = entry['verdict']
+            if test not in CHECKS or original is None:
+                continue
+
+            if not original['replayable'] or not entry['outputs']:
+                verdict, message = original['verdict'], original['message']
+                replayed = False
+            else:
+                try:
+                    passed, message = CHECKS[test].evaluate(device, dict(entry['outputs']),
+                                                            device_settings)
+                    verdict = 'passed' if passed else 'failed'
+                except Exception as e:
+                    verdict = 'errored'
+                    message = f"Error re-evaluating {test} on {device_name}: {str(e)}"
+                replayed = True
+
+            results.append({
+                'device': device_name,
+                'test': test,
+                'original': original['verdict'],
+                'verdict': verdict,
+                'changed': verdict != original['verdict'],
+                'replayed': replayed,
+                'message': message,
+            })
+    return results
+
+
+def summarize(results):
+    """Count verdicts and changes of a replay"""
+    summary = {'total': len(results), 'changed': 0, 'not_replayed': 0,
+               'passed': 0, 'failed': 0, 'errored': 0}
+    for result in results:
+        summary[result['verdict']] += 1
+        summary['changed'] += result['changed']
+        summary['not_replayed'] += not result['replayed']
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('capture_file', help='capture written by escript.py')
+    parser.add_argument('--cpu-threshold', type=int, default=CPU_THRESHOLD)
+    parser.add_argument('--expected-ospf-state', default=EXPECTED_OSPF_STATE)
+    parser.add_argument('--output', help='write the full verdict diff as JSON')
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    devices = load_capture(args.capture_file)
+    results = replay(devices, cpu_threshold=args.cpu_threshold,
+                     expected_ospf_state=args.expected_ospf_state)
+    elapsed = time.perf_counter() - start
+
+    for result in results:
+        if result['changed']:
+            log.info(f"{result['device']} {result['test']}: "
+                     f"{result['original']} -> {result['verdict']} ({result['message']})")
+
+    summary = summarize(results)
+    log.info(f"Re-evaluated {summary['total']} tests on {len(devices)} devices "
+             f"in {elapsed:.2f}s: {summary['changed']} changed, "
+             f"{summary['not_replayed']} kept from the original run")
+
+    if args.output:
+        with open(args.output, 'w') as output_file:
+            json.dump({'summary': summary, 'results': results}, output_file, indent=2)
+
+    return 1 if summary['changed'] else 0
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    sys.exit(main())
@@ -0,0 +1,268 @@
+#!/usr/bin/env python
+
+"""Fleet-wide OSPF adjacency graph built from 'show ip ospf neighbor'.
+
+Every device contributes its router ID and neighbor table; the graph keeps
+router IDs as integer indexes and the adjacencies as compact CSR arrays
+(``offsets``/``targets``/``full``, each row sorted by neighbor), so
+symmetry, missing adjacencies and partitions are checked for the whole
+fleet in one near-linear pass over the arrays instead of a 'FULL'
+substring check per device. The neighbor addresses of each device are the
+targets of its ping_peer_ip check (checks.py).
+
+    python ospf_topology.py --benchmark 5000
+"""
+
+import argparse
+import logging
+import sys
+import time
+from array import array
+from bisect import bisect_left
+
+from parse_utils import OSPF_NEIGHBOR_LINE, OSPF_ROUTER_ID
+
+log = logging.getLogger(__name__)
+
+ROUTER_ID_COMMAND = 'show ip ospf | include ID'
+
+
+def parse_ospf_neighbors(output):
+    """Parse 'show ip ospf neighbor' into (neighbor_id, state, address, interface)"""
+    return [match.group('neighbor_id', 'state', 'address', 'interface')
+            for match in OSPF_NEIGHBOR_LINE.finditer(output)]
+
+
+def parse_router_id(output):
+    """Extract the OSPF router ID from 'show ip ospf | include ID'"""
+    match = OSPF_ROUTER_ID.search(output)
+    return match.group(1) if match else None
+
+
+class OSPFTopology(object):
+    """Adjacency graph of the whole fleet, indexed by router ID"""
+
+    def __init__(self, expected_state='FULL'):
+        self.expected_state = expected_state
+        self._index = {}       # Router ID -> node index
+        self.router_ids = []   # Node index -> router ID
+        self.devices = {}      # Node index -> device name, for fleet devices only
+        self._nodes = {}       # Device name -> node index
+        self._edges = []       # (source, target, full, neighbor address) before build()
+        self.offsets = self.targets = self.full = self.addresses = None
+
+    def __contains__(self, device_name):
+        return device_name in self._nodes
+
+    def _node(self, router_id):
+        node = self._index.get(router_id)
+        if node is None:
+            node = self._index[router_id] = len(self.router_ids)
+            self.router_ids.append(router_id)
+        return node
+
+    def add_device(self, device_name, router_id, neighbor_output):
+        """Add one device's neighbor table, returns the parsed neighbors
+
+        A device without router ID cannot be matched with the neighbor
+        tables of its peers and is left out, like one already added.
+        """
+        neighbors = parse_ospf_neighbors(neighbor_output)
+        if device_name in self._nodes:
+            return neighbors
+        if router_id is None:
+            log.warning(f"No OSPF router ID on {device_name}, left out of the OSPF graph")
+            return neighbors
+        source = self._node(router_id)
+        self.devices[source] = device_name
+        self._nodes[device_name] = source
+        for neighbor_id, state, address, interface in neighbors:
+            self._edges.append((source, self._node(neighbor_id),
+                                state == self.expected_state, address))
+        self.offsets = None
+        return neighbors
+
+    @staticmethod
+    def _counting_sort(edges, column, node_count):
+        """Stable sort of edges on a node column, returns (edges, row offsets)"""
+        offsets = array('l', [0]) * (node_count + 1)
+        for edge in edges:
+            offsets[edge[column] + 1] += 1
+        for node in range(node_count):
+            offsets[node + 1] += offsets[node]
+        cursor = array('l', offsets)
+        ordered = [None] * len(edges)
+        for edge in edges:
+            ordered[cursor[edge[column]]] = edge
+            cursor[edge[column]] += 1
+        return ordered, offsets
+
+    def build(self):
+        """Pack the collected edges into CSR arrays, rows sorted by target, O(V + E)"""
+        node_count = len(self.router_ids)
+        by_target, _ = self._counting_sort(self._edges, 1, node_count)
+        ordered, self.offsets = self._counting_sort(by_target, 0, node_count)
+        self.targets = array('l', (target for _, target, _, _ in ordered))
+        self.full = bytearray(full for _, _, full, _ in ordered)
+        self.addresses = [address for _, _, _, address in ordered]
+        return self
+
+    def _ensure_built(self):
+        if self.offsets is None or len(self.offsets) != len(self.router_ids) + 1:
+            self.build()
+
+    def neighbors(self, node, full_only=True):
+        """Indexes of the neighbors of a node"""
+        self._ensure_built()
+        return [self.targets[position]
+                for position in range(self.offsets[node], self.offsets[node + 1])
+                if self.full[position] or not full_only]
+
+    def _adjacencies(self, node):
+        """(neighbor, in the expected state) of every neighbor listed by node, each once"""
+        position, end = self.offsets[node], self.offsets[node + 1]
+        while position < end:
+            target, full = self.targets[position], self.full[position]
+            position += 1
+            # Parallel links to the same neighbor are adjacent in the sorted row
+            while position < end and self.targets[position] == target:
+                full |= self.full[position]
+                position += 1
+            yield target, bool(full)
+
+    def _adjacency(self, source, target):
+        """Whether source lists target in the expected state, None when not at all"""
+        end = self.offsets[source + 1]
+        position = bisect_left(self.targets, target, self.offsets[source], end)
+        listed = False
+        while position < end and self.targets[position] == target:
+            if self.full[position]:
+                return True
+            listed = True
+            position += 1
+        return False if listed else None
+
+    def asymmetric(self):
+        """Adjacencies seen in the expected state from one fleet device only
+
+        Returns [(device, neighbor router ID, reason)]. Neighbors outside the
+        fleet cannot be cross-checked and are ignored.
+        """
+        self._ensure_built()
+        issues = []
+        for source, name in self.devices.items():
+            for target, full in self._adjacencies(source):
+                if not full or target not in self.devices:
+                    continue
+                reverse = self._adjacency(target, source)
+                if reverse:
+                    continue
+                reason = ('not listed by the neighbor' if reverse is None
+                          else 'not in the expected state on the neighbor')
+                issues.append((name, self.router_ids[target], reason))
+        return issues
+
+    def isolated(self):
+        """Fleet devices without any neighbor in the expected state"""
+        self._ensure_built()
+        return [name for node, name in self.devices.items()
+                if not any(full for _, full in self._adjacencies(node))]
+
+    def missing(self, expected_adjacencies):
+        """Expected (device, device) adjacencies that are not up on both ends"""
+        self._ensure_built()
+        missing = []
+        for first, second in expected_adjacencies:
+            a, b = self._nodes.get(first), self._nodes.get(second)
+            if a is None or b is None or not (self._adjacency(a, b) and self._adjacency(b, a)):
+                missing.append((first, second))
+        return missing
+
+    def partitions(self):
+        """Connected components of the fleet over symmetric adjacencies
+
+        Union-find with path halving, near-linear in the number of edges.
+        Returns a list of sorted device name lists, largest first.
+        """
+        self._ensure_built()
+        parent = list(range(len(self.router_ids)))
+
+        def find(node):
+            while parent[node] != node:
+                parent[node] = parent[parent[node]]
+                node = parent[node]
+            return node
+
+        for source in self.devices:
+            for target, full in self._adjacencies(source):
+                if full and source < target and self._adjacency(target, source):
+                    root_a, root_b = find(source), find(target)
+                    if root_a != root_b:
+                        parent[root_b] = root_a
+
+        components = {}
+        for node, name in self.devices.items():
+            components.setdefault(find(node), []).append(name)
+        return sorted((sorted(names) for names in components.values()),
+                      key=len, reverse=True)
+
+    def peer_addresses(self, device_name):
+        """Interface addresses of a device's neighbors in the expected state"""
+        node = self._nodes.get(device_name)
+        if node is None:
+            return []
+        self._ensure_built()
+        return list(dict.fromkeys(
+            self.addresses[position]
+            for position in range(self.offsets[node], self.offsets[node + 1])
+            if self.full[position]))
+
+    def report(self, expected_adjacencies=None):
+        """Run every fleet-wide check and return a dict of findings"""
+        self._ensure_built()
+        return {
+            'devices': len(self.devices),
+            'adjacencies': len(self._edges),
+            'asymmetric': self.asymmetric(),
+            'isolated': self.isolated(),
+            'missing': self.missing(expected_adjacencies or []),
+            'partitions': self.partitions(),
+        }
+
+
+def _synthetic_topology(device_count):
+    """Ring of devices with one chord each, rendered as IOS neighbor tables"""
+    header = ('Neighbor ID     Pri   State           Dead Time   Address         Interface\n')
+    topology = OSPFTopology()
+    for index in range(device_count):
+        lines = [header]
+        for peer in ((index - 1) % device_count, (index + 1) % device_count,
+                     (index + device_count // 2) % device_count):
+            lines.append(f"10.{peer >> 16 & 255}.{peer >> 8 & 255}.{peer & 255}"
+                         f"    1   FULL/DR         00:00:36    172.16.{peer & 255}.1"
+                         f"      GigabitEthernet0/{peer & 7}\n")
+        topology.add_device(f"R{index}", f"10.{index >> 16 & 255}.{index >> 8 & 255}."
+                                         f"{index & 255}", ''.join(lines))
+    return topology
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--benchmark', type=int, default=5000,
+                        help='number of synthetic devices')
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    topology = _synthetic_topology(args.benchmark)
+    parsed = time.perf_counter()
+    report = topology.report()
+    done = time.perf_counter()
+    log.info(f"{report['devices']} devices, {report['adjacencies']} adjacencies: "
+             f"parsed in {parsed - start:.2f}s, checked in {done - parsed:.2f}s, "
+             f"{len(report['asymmetric'])} asymmetric, {len(report['partitions'])} partition(s)")
+    return 0
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    sys.exit(main())
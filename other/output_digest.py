@@ -0,0 +1,166 @@
+#!/usr/bin/env python
+
+"""Digests of normalized command outputs, so unchanged outputs skip evaluation.
+
+Most outputs only change in fields no check reads: the dead timer of
+``show ip ospf neighbor``, route ages in ``show ip route ospf``, memory
+counters. normalize() masks those volatile fields and digest() hashes the
+rest (blake2b, 8 bytes). OutputDigests keeps the digest per device and
+command, and per check the verdict evaluated from them: when a check's
+outputs normalize to the same digests under the same settings, its
+previous verdict is reused without parsing (checks.evaluate_check, the
+``digests`` setting). The digests persist between runs in one JSON file:
+
+    python fast_sweep.py --testbed testbed.yaml --digests digests.json
+
+The benchmark compares digesting with parsing and evaluating a large
+neighbor and route table:
+
+    python output_digest.py --neighbors 500 --routes 20000
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import os
+import re
+import sys
+import threading
+import time
+
+log = logging.getLogger(__name__)
+
+DIGEST_SIZE = 8
+
+# IOS ages and timers (00:00:35, 2d03h, 1w2d) in their column, matched from
+# the literal before them so the scan stays fast on large tables
+ROUTE_AGE = (re.compile(r', (?:\d\d:\d\d:\d\d|\d+[wd]\d+[dh]),'), ', #,')
+DEAD_TIME = (re.compile(r' (?:\d\d:\d\d:\d\d|\d+[wd]\d+[dh]) '), ' # ')
+NUMBERS = (re.compile(r'\d+'), '#')
+
+# IOS command -> (pattern, replacement) of the volatile fields masked before
+# hashing. Only fields that no evaluation (evaluators.py) nor its message
+# reads belong here.
+VOLATILE = {
+    'show ip ospf neighbor': (DEAD_TIME,),
+    'show ip route ospf': (ROUTE_AGE,),
+    # verify_cpu_memory judges the CPU line only
+    'show memory statistics | include Processor': (NUMBERS,),
+}
+
+
+def normalize(command, output):
+    """Output of command with its volatile fields masked"""
+    for pattern, replacement in VOLATILE.get(command, ()):
+        output = pattern.sub(replacement, output)
+    return output
+
+
+def digest(command, output):
+    """Hex digest of the normalized output of command"""
+    return hashlib.blake2b(normalize(command, output).encode(),
+                           digest_size=DIGEST_SIZE).hexdigest()
+
+
+class OutputDigests(object):
+    """Output digests per device and command, with the verdict of each check
+
+    Verdicts are stored under a key combining the digests of the check's
+    commands and the settings it was evaluated with.
+    """
+
+    def __init__(self, path=None):
+        self.path = path
+        self.commands = {}  # Device -> {command: digest}
+        self.verdicts = {}  # Device -> {check: [key, passed, message]}
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        if path and os.path.exists(path):
+            with open(path, encoding='utf-8') as digests_file:
+                stored = json.load(digests_file)
+            self.commands = stored.get('commands', {})
+            self.verdicts = stored.get('verdicts', {})
+            log.info(f"Loaded output digests of {len(self.commands)} devices from {path}")
+
+    def key(self, device_name, commands, outputs, settings_key=''):
+        """Verdict key of the outputs of commands, recording their digests"""
+        digests = [digest(command, outputs[command]) for command in commands]
+        with self._lock:
+            self.commands.setdefault(device_name, {}).update(zip(commands, digests))
+        return hashlib.blake2b('\n'.join(digests + [settings_key]).encode(),
+                               digest_size=DIGEST_SIZE).hexdigest()
+
+    def lookup(self, device_name, check, key):
+        """(passed, message) stored for check under key, None when it changed"""
+        with self._lock:
+            stored = self.verdicts.get(device_name, {}).get(check)
+            if stored is None or stored[0] != key:
+                self.misses += 1
+                return None
+            self.hits += 1
+            return stored[1], stored[2]
+
+    def record(self, device_name, check, key, passed, message):
+        with self._lock:
+            self.verdicts.setdefault(device_name, {})[check] = [key, passed, message]
+
+    def save(self, path=None):
+        """Write the digests to path (default: the loaded file), atomically"""
+        path = path or self.path
+        with self._lock:
+            data = json.dumps({'commands': self.commands, 'verdicts': self.verdicts},
+                              separators=(',', ':'))
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as digests_file:
+            digests_file.write(data)
+        os.replace(tmp_path, path)
+        log.info(f"Saved output digests of {len(self.commands)} devices to {path} "
+                 f"({self.hits} verdicts reused, {self.misses} evaluated)")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--neighbors', type=int, default=500)
+    parser.add_argument('--routes', type=int, default=20000)
+    parser.add_argument('--rounds', type=int, default=5)
+    args = parser.parse_args(argv)
+
+    from types import SimpleNamespace
+
+    from checks import run_checks
+    from synthetic_outputs import ospf_neighbors, routes
+
+    route_output, prefixes = routes(args.routes)
+    device = SimpleNamespace(name='R1', os='ios', platform=None)
+    settings = {'expected_networks': {'R1': prefixes[:100]}}
+    checks = ['verify_ospf_neighbors', 'verify_ospf_routes']
+
+    def outputs(round_number):
+        # Every round sees new dead timers and route ages, nothing else changes
+        return {'show ip ospf neighbor': ospf_neighbors(args.neighbors,
+                                                        31 + round_number % 9),
+                'show ip route ospf': route_output.replace('00:12:34',
+                                                           f"00:12:{10 + round_number}")}
+
+    timings = {'parsed': [], 'digested': []}
+    digests = OutputDigests()
+    for round_number in range(args.rounds):
+        for mode in ('parsed', 'digested'):
+            run_settings = dict(settings, digests=digests if mode == 'digested' else None)
+            round_outputs = outputs(round_number)
+            start = time.perf_counter()
+            results = run_checks(device, checks, None, run_settings, outputs=round_outputs)
+            timings[mode].append(time.perf_counter() - start)
+    verdicts = ', '.join(f"{name} {result['verdict']}" for name, result in results.items())
+    log.info(f"{args.neighbors} neighbors and {args.routes} routes: parse and evaluate "
+             f"{min(timings['parsed']) * 1000:.1f}ms, digest of unchanged outputs "
+             f"{min(timings['digested'][1:] or timings['digested']) * 1000:.1f}ms "
+             f"({digests.hits} verdicts reused, {digests.misses} evaluated; {verdicts})")
+    return 0
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    sys.exit(main())
@@ -0,0 +1,76 @@
+#!/usr/bin/env python
+
+"""Precompiled patterns shared by the output parsers.
+
+Every pattern the evaluators, route_table.py and ospf_topology.py scan
+command outputs with is compiled once here, at import, instead of the
+``split``/``lower()``/line loop idioms each check used to carry.
+
+The patterns scan the str outputs device.execute returns: ``finditer``
+walks the output in place, no line is copied. Scanning bytes or a
+memoryview instead needs an encode of the whole output and a decode of
+every captured field, no faster on 100k routes or 5000 interfaces.
+
+tests/test_parse_bench.py measures the parsers on large outputs against a
+budget.
+"""
+
+import re
+
+
+# show ip interface brief: any interface or protocol reported down; a
+# case-insensitive regex cannot use the fast literal search that ``in``
+# does, spelling out the few cases IOS prints is several times faster
+DOWN = ('down', 'Down', 'DOWN')
+
+# CPU utilization for five seconds: 5%/0%; one minute: 3%; five minutes: 2%
+CPU_PERCENT = re.compile(r'(\d+)%')
+
+# Success rate is 80 percent (4/5), round-trip min/avg/max = 1/2/4 ms
+PING_SUMMARY = re.compile(
+    r'Success rate is (?P<rate>\d+) percent \((?P<received>\d+)/(?P<sent>\d+)\)'
+    r'(?:, round-trip min/avg/max = (?P<min>\d+)/(?P<avg>\d+)/(?P<max>\d+) ms)?')
+
+#   Inbound  access list is 101
+#   Outgoing access list is not set
+# IOS pads the capitalized forms with two spaces, a line naming no list
+# ('is not set') is no binding
+ACL_LINE = re.compile(
+    r'^(?![^\n]*is not set)[ \t]*(?P<line>[^\n]*?'
+    r'(?:(?:in|out)(?:bound|put) |(?:In|Out)(?:bound|put)  )access(?= list)'
+    r'[^\n]*?list is[ \t]*(?P<acl>[^\n]*?))[ \t\r]*$',
+    re.MULTILINE)
+
+# O        172.16.2.0/24 [110/2] via 172.16.0.2, 00:12:34, GigabitEthernet0/1
+# O IA     10.1.1.0 [110/3] via 10.0.0.2, 00:01:02, GigabitEthernet0/2
+#       172.16.0.0/24 is subnetted, 2 subnets
+#       10.0.0.0/8 is variably subnetted, 4 subnets, 2 masks
+# O E2     192.168.100.0/24
+#            [110/20] via 10.0.0.2, 00:01:02, GigabitEthernet0/2
+# IOS wraps a long entry after its network, the pattern spans that line break
+ROUTE_LINE = re.compile(
+    r'^(?:[ \t]+\d+\.\d+\.\d+\.\d+/(?P<subnet_length>\d+) is (?P<variably>variably )?subnetted'
+    r'|(?P<code>[A-Za-z*+%&][A-Za-z0-9*+%&]*(?: [A-Za-z0-9]+)?)[ \t]+'
+    r'(?P<network>\d+\.\d+\.\d+\.\d+)(?:/(?P<length>\d+))?[ \t]*\r?\n?[ \t]+'
+    r'(?:\[(?P<distance>\d+)/(?P<metric>\d+)\][ \t]+via[ \t]+(?P<next_hop>\d+\.\d+\.\d+\.\d+)'
+    r'|is directly connected))',
+    re.MULTILINE)
+
+# Neighbor ID     Pri   State           Dead Time   Address         Interface
+# 2.2.2.2           1   FULL/DR         00:00:36    172.16.0.2      GigabitEthernet0/0
+# 3.3.3.3           0   FULL/  -        00:00:33    10.0.0.3        Serial0/0
+# NX-OS indents its rows
+OSPF_NEIGHBOR_LINE = re.compile(
+    r'^[ \t]*(?P<neighbor_id>\d+\.\d+\.\d+\.\d+)[ \t]+(?P<priority>\d+)[ \t]+'
+    r'(?P<state>[A-Z0-9-]+)(?:/[ \t]*\S+)?[ \t]+(?P<dead_time>\S+)[ \t]+'
+    r'(?P<address>\d+\.\d+\.\d+\.\d+)[ \t]+(?P<interface>\S+)[ \t\r]*$',
+    re.MULTILINE)
+
+# Routing Process "ospf 1" with ID 1.1.1.1
+OSPF_ROUTER_ID = re.compile(r'with ID (\d+\.\d+\.\d+\.\d+)')
+
+# ! Last configuration change at 10:01:02 UTC Mon Oct 19 2026 by cisco
+# !Running configuration last done at: Mon Oct 19 10:01:02 2026 (NX-OS)
+CONFIG_CHANGE = re.compile(
+    r'(?:Last configuration change at|last done at:)[ \t]*(?P<changed>[^\r\n]*?)[ \t\r]*$',
+    re.MULTILINE)
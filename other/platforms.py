@@ -0,0 +1,217 @@
+#!/usr/bin/env python
+
+"""Per-OS command variants of the checks, chosen from the testbed os/platform.
+
+The checks (checks.py) are written against IOS commands and outputs. A
+Dialect maps each of those commands to the one the device's OS
+understands, and adapts the variant's output back to the IOS form the
+evaluators read, so a mixed fleet never sends a command its devices reject
+(and retry). The dialect is picked from the testbed ``os`` field, or an
+``os/platform`` entry when a platform needs its own variants, before any
+command runs; unknown OSes fall back to IOS.
+
+Variants may share a device command, e.g. NX-OS reads both CPU and memory
+from ``show system resources``: Dialect.executor() sends it once.
+"""
+
+import logging
+import re
+
+log = logging.getLogger(__name__)
+
+DEFAULT_OS = 'ios'
+
+# ping <target> [repeat N] [timeout T] [size S], as built by reachability.PingPolicy
+IOS_PING = re.compile(r'^ping (?P<target>\S+)(?: repeat (?P<repeat>\d+))?'
+                      r'(?: timeout (?P<timeout>\d+))?(?: size (?P<size>\d+))?$')
+
+NXOS_CPU_STATES = re.compile(
+    r'CPU states\s*:\s*[\d.]+% user,\s*[\d.]+% kernel,\s*(?P<idle>[\d.]+)% idle')
+NXOS_MEMORY = re.compile(r'Memory usage:\s*(?P<total>\d+)K total,\s*(?P<used>\d+)K used,'
+                         r'\s*(?P<free>\d+)K free')
+NXOS_PING_SUMMARY = re.compile(
+    r'(?P<sent>\d+) packets transmitted, (?P<received>\d+) packets received'
+    r'(?:.*\n.*round-trip min/avg/max = (?P<min>[\d.]+)/(?P<avg>[\d.]+)/(?P<max>[\d.]+) ms)?')
+NXOS_ROUTE = re.compile(r'^(?P<prefix>\d+\.\d+\.\d+\.\d+/\d+), ubest/mbest')
+NXOS_NEXT_HOP = re.compile(r'^\s+\*via (?P<next_hop>\d+\.\d+\.\d+\.\d+), (?P<interface>[^,]+), '
+                           r'\[(?P<distance>\d+)/(?P<metric>\d+)\]')
+NXOS_ACCESS_GROUP = re.compile(r'^\s*ip access-group (?P<name>\S+) (?P<direction>in|out)\s*$',
+                               re.MULTILINE)
+
+
+def _nxos_cpu(output):
+    """'show system resources' as the IOS CPU utilization line"""
+    match = NXOS_CPU_STATES.search(output)
+    if match is None:
+        return output
+    return f"CPU utilization for five seconds: {round(100 - float(match.group('idle')))}%"
+
+
+def _nxos_memory(output):
+    """'show system resources' as the IOS Processor memory line"""
+    match = NXOS_MEMORY.search(output)
+    if match is None:
+        return output
+    total, used, free = (int(match.group(field)) * 1024 for field in ('total', 'used', 'free'))
+    return f"Processor  {total}  {used}  {free}"
+
+
+def _nxos_ping(output):
+    """NX-OS ping statistics as the IOS success rate summary"""
+    match = NXOS_PING_SUMMARY.search(output)
+    if match is None:
+        return output
+    sent, received = int(match.group('sent')), int(match.group('received'))
+    summary = (f"Success rate is {received * 100 // sent if sent else 0} percent "
+               f"({received}/{sent})")
+    if match.group('avg') is not None:
+        summary += (f", round-trip min/avg/max = {round(float(match.group('min')))}/"
+                    f"{round(float(match.group('avg')))}/{round(float(match.group('max')))} ms")
+    return summary
+
+
+def _nxos_routes(output):
+    """NX-OS route entries as IOS 'O <prefix> [d/m] via <next hop>' lines"""
+    lines, prefix = [], None
+    for line in output.splitlines():
+        match = NXOS_ROUTE.match(line)
+        if match is not None:
+            prefix = match.group('prefix')
+            continue
+        match = NXOS_NEXT_HOP.match(line)
+        if match is not None and prefix is not None:
+            lines.append(f"O        {prefix} [{match.group('distance')}/{match.group('metric')}] "
+                         f"via {match.group('next_hop')}, {match.group('interface')}")
+    return '\n'.join(lines)
+
+
+def _nxos_acls(output):
+    """'ip access-group' config lines as IOS access list lines"""
+    return '\n'.join(
+        f"{'Inbound' if match.group('direction') == 'in' else 'Outbound'}  access list is "
+        f"{match.group('name')}" for match in NXOS_ACCESS_GROUP.finditer(output))
+
+
+def _ping_command(count, size):
+    """Rewrite of an IOS ping with the OS keywords for its probe count and size"""
+    def rewrite(match):
+        command = f"ping {match.group('target')}"
+        if match.group('repeat'):
+            command += f" {count} {match.group('repeat')}"
+        if match.group('timeout'):
+            command += f" timeout {match.group('timeout')}"
+        if match.group('size'):
+            command += f" {size} {match.group('size')}"
+        return command
+    return rewrite
+
+
+class Dialect(object):
+    """Command variants and output adapters of one OS
+
+    ``variants`` maps an IOS command to the command to send, or to
+    ``(command, adapt(output))`` when the output must be turned back into
+    its IOS form. ``ping`` rewrites a matched IOS ping into the OS syntax,
+    and ``adapt_ping`` its output.
+    """
+
+    def __init__(self, name, variants=None, ping=None, adapt_ping=None):
+        self.name = name
+        self.variants = variants or {}
+        self.ping = ping
+        self.adapt_ping = adapt_ping
+
+    def command(self, command):
+        """(command to send, adapt(output) or None) for an IOS command"""
+        if command.startswith('ping '):
+            match = IOS_PING.match(command)
+            if match is None or self.ping is None:
+                return command, None
+            return self.ping(match), self.adapt_ping
+        variant = self.variants.get(command, command)
+        if isinstance(variant, tuple):
+            return variant
+        return variant, None
+
+    def commands(self, commands):
+        """Device commands for IOS commands, each once in first-use order"""
+        return list(dict.fromkeys(self.command(command)[0] for command in commands))
+
+    def executor(self, execute, shared=None):
+        """Wrap execute(command) to run IOS commands in this dialect
+
+        Outputs come back in IOS form. A device command several variants
+        share is sent once, its output kept in ``shared`` (device command
+        -> output) which callers can keep across executors of a device;
+        pings are always sent, as early stop repeats the same command.
+        """
+        if not self.variants and self.ping is None:
+            return execute
+        shared = {} if shared is None else shared
+
+        def execute_variant(command):
+            variant, adapt = self.command(command)
+            if variant.startswith('ping '):
+                output = execute(variant)
+            elif variant in shared:
+                output = shared[variant]
+            else:
+                output = shared[variant] = execute(variant)
+            return adapt(output) if adapt is not None else output
+        return execute_variant
+
+
+DIALECTS = {
+    'ios': Dialect('ios'),
+    # IOS-XE (CSR1000v, C8000V, Catalyst) keeps the IOS show commands
+    'iosxe': Dialect('iosxe'),
+    # XR pings take 'count' instead of 'repeat', the summary line is the IOS one
+    'iosxr': Dialect('iosxr', {
+        'show ip interface brief': 'show ipv4 interface brief',
+        'show ip ospf neighbor': 'show ospf neighbor',
+        'show ip route ospf': 'show route ospf',
+        # XR reports the common ACL first, drop it so the interface ACL is read
+        'show ip interface | inc access list': (
+            'show ipv4 interface | include access list',
+            lambda output: output.replace('common access list is not set, ', '')),
+        'show memory statistics | include Processor': 'show memory summary | include Physical',
+    }, ping=_ping_command('count', 'size')),
+    'nxos': Dialect('nxos', {
+        'show ip ospf neighbor': 'show ip ospf neighbors',
+        'show ip route ospf': ('show ip route ospf', _nxos_routes),
+        'show ip interface | inc access list': (
+            'show running-config interface | include access-group', _nxos_acls),
+        'show processes cpu | include CPU': ('show system resources', _nxos_cpu),
+        'show memory statistics | include Processor': ('show system resources', _nxos_memory),
+        # '!Running configuration last done at: ...', read by result_cache.py
+        'show running-config | include Last configuration change':
+            'show running-config | include last.done',
+    }, ping=_ping_command('count', 'packet-size'), adapt_ping=_nxos_ping),
+}
+
+
+def device_os(device):
+    """(os, platform) of a testbed device, lowercased, None when not set"""
+    os_name = getattr(device, 'os', None)
+    platform = getattr(device, 'platform', None)
+    return (os_name.lower() if os_name else None, platform.lower() if platform else None)
+
+
+def dialect_for(device):
+    """Dialect of a testbed device from its os and platform"""
+    os_name, platform = device_os(device)
+    if os_name and platform and f"{os_name}/{platform}" in DIALECTS:
+        return DIALECTS[f"{os_name}/{platform}"]
+    if os_name in DIALECTS:
+        return DIALECTS[os_name]
+    if os_name:
+        log.debug(f"No command variants for os {os_name} of {device.name}, using IOS")
+    return DIALECTS[DEFAULT_OS]
+
+
+def group_by_dialect(devices):
+    """{dialect name: [devices]} of testbed devices, in testbed order"""
+    groups = {}
+    for device in devices:
+        groups.setdefault(dialect_for(device).name, []).append(device)
+    return groups
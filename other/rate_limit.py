@@ -0,0 +1,195 @@
+#!/usr/bin/env python
+
+"""Rate limiting and concurrency guards for commands sent to devices.
+
+Concurrent checks can fire interface, route, config and ping commands at
+the same router at once and spike its control plane CPU. A CommandGovernor
+sits in front of ``device.execute`` and enforces, in this order:
+
+- a cap per device
+- a token bucket per device (sustained commands per second plus burst)
+- a cap per site (``custom.site`` of the device)
+- a global cap on commands in flight across the fleet
+
+The per-device guards come first, so a busy or throttled device waits
+without holding a site or global slot that an idle device could use.
+
+Limits come from the testbed custom attributes, per-device values
+overriding the testbed-wide ones::
+
+    testbed:
+      custom:
+        rate_limits:
+          global_concurrency: 64
+          site_concurrency: 8
+          device_concurrency: 1
+          commands_per_second: 2
+          burst: 4
+    devices:
+      R1:
+        custom:
+          site: lab1
+          rate_limits:
+            commands_per_second: 1
+
+The suites create one from the testbed in their common setup, as the
+``governor`` script parameter, and send each command through it:
+
+    governor.execute(device.execute, device.name, command)
+
+The time each command waited for the guards is recorded, see metrics().
+"""
+
+import logging
+import threading
+import time
+
+log = logging.getLogger(__name__)
+
+DEFAULT_LIMITS = {
+    'global_concurrency': 64,
+    'site_concurrency': 8,
+    'device_concurrency': 1,
+    'commands_per_second': 2.0,
+    'burst': 4,
+}
+
+# Queueing delays kept per device for percentiles
+DELAY_SAMPLES = 256
+
+
+class TokenBucket(object):
+    """Thread-safe token bucket, rate tokens per second up to burst"""
+
+    def __init__(self, rate, burst):
+        self.rate = float(rate)
+        self.burst = float(burst)
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Take one token, sleeping until one is available"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+def _custom(obj):
+    custom = getattr(obj, 'custom', None) or {}
+    return custom if isinstance(custom, dict) else dict(custom)
+
+
+class _DelayStats(object):
+    __slots__ = ('count', 'total', 'maximum', 'samples')
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.maximum = 0.0
+        self.samples = []
+
+    def add(self, delay):
+        self.count += 1
+        self.total += delay
+        self.maximum = max(self.maximum, delay)
+        if len(self.samples) >= DELAY_SAMPLES:
+            self.samples[self.count % DELAY_SAMPLES] = delay
+        else:
+            self.samples.append(delay)
+
+    def summary(self):
+        samples = sorted(self.samples)
+        return {
+            'commands': self.count,
+            'mean_delay': round(self.total / self.count, 4) if self.count else 0.0,
+            'p95_delay': round(samples[int(len(samples) * 0.95)], 4) if samples else 0.0,
+            'max_delay': round(self.maximum, 4),
+        }
+
+
+class CommandGovernor(object):
+    """Global, per-site and per-device guards in front of device.execute"""
+
+    def __init__(self, limits=None, device_limits=None, sites=None):
+        self.limits = dict(DEFAULT_LIMITS, **(limits or {}))
+        self.device_limits = device_limits or {}  # Device -> limit overrides
+        self.sites = sites or {}                  # Device -> site name
+        self._global = threading.BoundedSemaphore(int(self.limits['global_concurrency']))
+        self._site_guards = {}
+        self._device_guards = {}
+        self._lock = threading.Lock()
+        self._stats = {}
+
+    @classmethod
+    def from_testbed(cls, testbed):
+        """Read the limits from the testbed and device custom attributes"""
+        limits = _custom(testbed).get('rate_limits', {})
+        device_limits, sites = {}, {}
+        for name, device in testbed.devices.items():
+            custom = _custom(device)
+            device_limits[name] = custom.get('rate_limits', {})
+            if custom.get('site'):
+                sites[name] = custom['site']
+        return cls(limits, device_limits, sites)
+
+    def _limit(self, device_name, key):
+        return self.device_limits.get(device_name, {}).get(key, self.limits[key])
+
+    def _guards(self, device_name):
+        """(site semaphore or None, device semaphore, device bucket), created once"""
+        with self._lock:
+            guards = self._device_guards.get(device_name)
+            if guards is None:
+                site = self.sites.get(device_name)
+                if site is not None and site not in self._site_guards:
+                    self._site_guards[site] = threading.BoundedSemaphore(
+                        int(self.limits['site_concurrency']))
+                guards = self._device_guards[device_name] = (
+                    self._site_guards.get(site),
+                    threading.BoundedSemaphore(int(self._limit(device_name, 'device_concurrency'))),
+                    TokenBucket(self._limit(device_name, 'commands_per_second'),
+                                self._limit(device_name, 'burst')),
+                )
+                self._stats[device_name] = _DelayStats()
+            return guards
+
+    def execute(self, execute, device_name, command, **kwargs):
+        """Run execute(command) once every guard admits it"""
+        site_guard, device_guard, bucket = self._guards(device_name)
+        requested = time.monotonic()
+        # Always acquire in device -> site -> global order to avoid deadlocks,
+        # the shared slots are only taken once the device itself is ready
+        with device_guard:
+            bucket.acquire()
+            if site_guard is not None:
+                site_guard.acquire()
+            try:
+                with self._global:
+                    delay = time.monotonic() - requested
+                    with self._lock:
+                        self._stats[device_name].add(delay)
+                    return execute(command, **kwargs)
+            finally:
+                if site_guard is not None:
+                    site_guard.release()
+
+    def metrics(self):
+        """Queueing delay per device and for the whole fleet, in seconds"""
+        with self._lock:
+            fleet = _DelayStats()
+            devices = {}
+            for name, stats in self._stats.items():
+                devices[name] = stats.summary()
+                fleet.count += stats.count
+                fleet.total += stats.total
+                fleet.maximum = max(fleet.maximum, stats.maximum)
+                fleet.samples.extend(stats.samples)
+            return {'fleet': fleet.summary(), 'devices': devices}
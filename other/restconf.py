@@ -0,0 +1,377 @@
+#!/usr/bin/env python
+
+"""Model-driven collection (RESTCONF) of interfaces, OSPF and routes, with CLI fallback.
+
+Devices with a ``restconf`` connection in the testbed (IOS-XE, e.g. the
+C8000V of testbed_explained.yaml) are read over RESTCONF as YANG JSON,
+which needs no CLI rendering on the device nor regex parsing here:
+
+    connections:
+        restconf:
+            protocol: https
+            ip: devnetsandboxiosxe.cisco.com
+            port: 443
+            verify: false
+
+StructuredCollector returns the same structures as the CLI parsers
+(InterfaceSample, OSPF neighbor tuples, RouteTable), so the checks
+(checks.py) evaluate either source. A device without that connection, or
+whose RESTCONF request fails, is read from the CLI for the rest of the run.
+escript.py, the CheckTestcase suites (check_testcase.py), monitor.py and
+fast_sweep.py use it when given a ``restconf`` argument.
+
+The benchmark compares both paths against a local stand-in server serving
+the same synthetic tables as CLI text and as YANG JSON:
+
+    python restconf.py --interfaces 2000 --routes 20000
+"""
+
+import argparse
+import base64
+import json
+import logging
+import sys
+import threading
+import time
+
+from interface_stats import InterfaceSample, parse_interfaces
+from ospf_topology import parse_ospf_neighbors
+from route_table import RouteTable, format_prefix, parse_prefix, parse_routes
+
+log = logging.getLogger(__name__)
+
+# Structured data kind -> RESTCONF data resource
+RESTCONF_PATHS = {
+    'interfaces': 'Cisco-IOS-XE-interfaces-oper:interfaces',
+    'ospf_neighbors': 'Cisco-IOS-XE-ospf-oper:ospf-oper-data/ospf-state',
+    'routes': 'ietf-routing:routing-state/routing-instance=default/ribs/rib=ipv4-default',
+}
+
+# Structured data kind -> (CLI command, parser), the fallback
+CLI_SOURCES = {
+    'interfaces': ('show interfaces', parse_interfaces),
+    'ospf_neighbors': ('show ip ospf neighbor', parse_ospf_neighbors),
+    'routes': ('show ip route ospf', parse_routes),
+}
+
+YANG_JSON = 'application/yang-data+json'
+
+
+class RestconfError(Exception):
+    pass
+
+
+class RestconfClient(object):
+    """RESTCONF GETs over one kept-alive HTTP(S) connection"""
+
+    def __init__(self, host, port=443, username=None, password=None, protocol='https',
+                 verify=True, timeout=10):
+        import http.client
+
+        if protocol == 'https':
+            import ssl
+
+            context = ssl.create_default_context()
+            if not verify:
+                context.check_hostname = False
+                context.verify_mode = ssl.CERT_NONE
+            self._connection = http.client.HTTPSConnection(host, port, timeout=timeout,
+                                                           context=context)
+        else:
+            self._connection = http.client.HTTPConnection(host, port, timeout=timeout)
+        self._headers = {'Accept': YANG_JSON}
+        if username is not None:
+            token = base64.b64encode(f"{username}:{password}".encode()).decode()
+            self._headers['Authorization'] = f"Basic {token}"
+        self.requests = 0
+        self.bytes = 0
+        self.seconds = 0.0
+
+    @classmethod
+    def from_device(cls, device, timeout=10):
+        """Client for the device's ``restconf`` testbed connection"""
+        connection = device.connections['restconf']
+        credentials = device.credentials['default']
+        password = credentials.get('password')
+        return cls(connection['ip'], int(connection.get('port', 443)),
+                   credentials.get('username'), getattr(password, 'plaintext', password),
+                   connection.get('protocol', 'https'), connection.get('verify', True), timeout)
+
+    def get(self, path):
+        """Decoded JSON of a data resource, {} when the device has none"""
+        import http.client
+
+        start = time.perf_counter()
+        try:
+            self._connection.request('GET', f"/restconf/data/{path}", headers=self._headers)
+            response = self._connection.getresponse()
+            body = response.read()
+        except (OSError, http.client.HTTPException) as e:
+            self._connection.close()
+            raise RestconfError(f"RESTCONF request for {path} failed: {str(e)}")
+        self.requests += 1
+        self.bytes += len(body)
+        self.seconds += time.perf_counter() - start
+        if response.status == 204 or (response.status == 404 and not body):
+            return {}
+        if response.status != 200:
+            raise RestconfError(f"RESTCONF request for {path} returned {response.status}: "
+                                f"{body[:200].decode(errors='replace')}")
+        try:
+            return json.loads(body)
+        except ValueError as e:
+            raise RestconfError(f"Invalid RESTCONF reply for {path}: {str(e)}")
+
+    def close(self):
+        self._connection.close()
+
+
+def _value(values, key):
+    # YANG JSON encodes 64-bit counters as strings
+    return int(values.get(key, 0))
+
+
+def interface_values(stats):
+    """{InterfaceSample column: value} of Cisco-IOS-XE-interfaces-oper statistics"""
+    return {
+        'input_rate': _value(stats, 'rx-kbps') * 1000,
+        'input_pps': _value(stats, 'rx-pps'),
+        'output_rate': _value(stats, 'tx-kbps') * 1000,
+        'output_pps': _value(stats, 'tx-pps'),
+        'input_packets': (_value(stats, 'in-unicast-pkts') + _value(stats, 'in-multicast-pkts')
+                          + _value(stats, 'in-broadcast-pkts')),
+        'output_packets': (_value(stats, 'out-unicast-pkts') + _value(stats, 'out-multicast-pkts')
+                           + _value(stats, 'out-broadcast-pkts')),
+        'input_errors': _value(stats, 'in-errors'),
+        'crc': _value(stats, 'in-crc-errors'),
+        'output_errors': _value(stats, 'out-errors'),
+        'input_drops': _value(stats, 'in-discards'),
+        'output_drops': _value(stats, 'out-discards'),
+    }
+
+
+def interfaces_from_yang(data):
+    """Cisco-IOS-XE-interfaces-oper interfaces as an InterfaceSample"""
+    sample = InterfaceSample()
+    columns = sample.columns
+    for interface in data.get('Cisco-IOS-XE-interfaces-oper:interfaces', {}).get('interface', []):
+        sample.add(interface['name'])
+        for column, value in interface_values(interface.get('statistics', {})).items():
+            columns[column][-1] = value
+    return sample
+
+
+def ospf_neighbors_from_yang(data):
+    """ospf-state neighbors as parse_ospf_neighbors tuples, state 'ospf-nbr-full' -> 'FULL'"""
+    neighbors = []
+    state = data.get('Cisco-IOS-XE-ospf-oper:ospf-state', {})
+    for instance in state.get('ospf-instance', []):
+        for area in instance.get('ospf-area', []):
+            for interface in area.get('ospf-interface', []):
+                for neighbor in interface.get('ospf-neighbor', []):
+                    neighbors.append((
+                        neighbor['neighbor-id'],
+                        neighbor.get('state', '').replace('ospf-nbr-', '').upper(),
+                        neighbor.get('address'),
+                        interface['name']))
+    return neighbors
+
+
+def routes_from_yang(data):
+    """OSPF routes of the ietf-routing IPv4 RIB as a RouteTable"""
+    table = RouteTable()
+    rib = data.get('ietf-routing:rib', [{}])
+    routes = rib[0].get('routes', {}).get('route', []) if rib else []
+    for route in routes:
+        if 'ospf' not in route.get('source-protocol', ''):
+            continue
+        network, length = parse_prefix(route['destination-prefix'])
+        table.insert(network, length, {
+            'code': 'O',
+            'next_hop': route.get('next-hop', {}).get('next-hop-address'),
+            'distance': route.get('route-preference'),
+            'metric': route.get('metric'),
+        })
+    return table
+
+
+CONVERTERS = {
+    'interfaces': interfaces_from_yang,
+    'ospf_neighbors': ospf_neighbors_from_yang,
+    'routes': routes_from_yang,
+}
+
+
+class StructuredCollector(object):
+    """Structured device data over RESTCONF, None when the CLI must be used
+
+    Shared by every device of a run; each device keeps one RESTCONF
+    connection, and a device whose request failed stays on the CLI.
+    """
+
+    name = 'restconf'
+
+    def __init__(self, timeout=10):
+        self.timeout = timeout
+        self._clients = {}
+        self._cli_only = set()
+        self._lock = threading.Lock()
+
+    def supports(self, device):
+        if device.name in self._cli_only:
+            return False
+        try:
+            return 'restconf' in device.connections
+        except TypeError:
+            return False
+
+    def get(self, device, kind):
+        """Structured data of kind for device, or None to fall back to the CLI"""
+        if not self.supports(device):
+            return None
+        try:
+            with self._lock:
+                client = self._clients.get(device.name)
+                if client is None:
+                    client = self._clients[device.name] = RestconfClient.from_device(
+                        device, self.timeout)
+            return CONVERTERS[kind](client.get(RESTCONF_PATHS[kind]))
+        except (RestconfError, KeyError, ValueError, TypeError) as e:
+            log.warning(f"Falling back to CLI on {device.name}: {str(e)}")
+            with self._lock:
+                self._cli_only.add(device.name)
+            return None
+
+    def collect(self, device, kind, execute):
+        """Structured data of kind, from RESTCONF or else parsed from execute(command)"""
+        data = self.get(device, kind)
+        if data is not None:
+            return data
+        command, parser = CLI_SOURCES[kind]
+        return parser(execute(command))
+
+    def close(self):
+        with self._lock:
+            for client in self._clients.values():
+                client.close()
+            self._clients = {}
+
+
+def yang_statistics(row):
+    """Cisco-IOS-XE-interfaces-oper statistics of an InterfaceSample row"""
+    return {
+        'rx-kbps': str(row['input_rate'] // 1000), 'rx-pps': str(row['input_pps']),
+        'tx-kbps': str(row['output_rate'] // 1000), 'tx-pps': str(row['output_pps']),
+        'in-unicast-pkts': str(row['input_packets']), 'in-multicast-pkts': '0',
+        'in-broadcast-pkts': '0', 'out-unicast-pkts': str(row['output_packets']),
+        'out-multicast-pkts': '0', 'out-broadcast-pkts': '0',
+        'in-errors': str(row['input_errors']), 'in-crc-errors': str(row['crc']),
+        'out-errors': str(row['output_errors']),
+        'in-discards': str(row['input_drops']), 'out-discards': str(row['output_drops']),
+    }
+
+
+def _yang_interfaces(sample):
+    """The interfaces of an InterfaceSample as Cisco-IOS-XE-interfaces-oper JSON"""
+    return {'Cisco-IOS-XE-interfaces-oper:interfaces': {'interface': [
+        {'name': name, 'oper-status': 'if-oper-state-ready',
+         'statistics': yang_statistics(sample.row(name))} for name in sample.names]}}
+
+
+def _yang_routes(table):
+    """The routes of a RouteTable as an ietf-routing RIB"""
+    return {'ietf-routing:rib': [{'name': 'ipv4-default', 'routes': {'route': [
+        {'destination-prefix': format_prefix(key), 'source-protocol': 'ietf-ospf:ospfv2',
+         'route-preference': attributes['distance'], 'metric': attributes['metric'],
+         'next-hop': {'next-hop-address': attributes['next_hop']}}
+        for key, attributes in table.routes.items()]}}]}
+
+
+def _stand_in_server(interface_count, route_count):
+    """Local HTTP server serving the same tables as CLI text and as YANG JSON"""
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+    from urllib.parse import unquote
+
+    from synthetic_outputs import interfaces, routes
+
+    interfaces_cli = interfaces(interface_count, base=1000)
+    routes_cli, _ = routes(route_count)
+    resources = {
+        '/cli/show interfaces': (interfaces_cli.encode(), 'text/plain'),
+        '/cli/show ip route ospf': (routes_cli.encode(), 'text/plain'),
+        f"/restconf/data/{RESTCONF_PATHS['interfaces']}": (
+            json.dumps(_yang_interfaces(parse_interfaces(interfaces_cli))).encode(), YANG_JSON),
+        f"/restconf/data/{RESTCONF_PATHS['routes']}": (
+            json.dumps(_yang_routes(parse_routes(routes_cli))).encode(), YANG_JSON),
+    }
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def do_GET(self):
+            body, content_type = resources.get(unquote(self.path), (b'', 'text/plain'))
+            self.send_response(200 if body else 404)
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def _cli_get(connection, command):
+    from urllib.parse import quote
+
+    connection.request('GET', quote(f"/cli/{command}"))
+    return connection.getresponse().read()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--interfaces', type=int, default=2000,
+                        help='interfaces of the stand-in device')
+    parser.add_argument('--routes', type=int, default=20000,
+                        help='OSPF routes of the stand-in device')
+    parser.add_argument('--rounds', type=int, default=5)
+    args = parser.parse_args(argv)
+
+    import http.client
+
+    server = _stand_in_server(args.interfaces, args.routes)
+    port = server.server_address[1]
+    cli = http.client.HTTPConnection('127.0.0.1', port)
+    restconf = RestconfClient('127.0.0.1', port, protocol='http')
+
+    for kind, size in (('interfaces', args.interfaces), ('routes', args.routes)):
+        command, cli_parser = CLI_SOURCES[kind]
+        timings = {'cli': [], 'restconf': []}
+        for _ in range(args.rounds):
+            start = time.perf_counter()
+            body = _cli_get(cli, command)
+            cli_length = len(cli_parser(body.decode()))
+            timings['cli'].append(time.perf_counter() - start)
+
+            before = restconf.bytes
+            start = time.perf_counter()
+            structured_length = len(CONVERTERS[kind](restconf.get(RESTCONF_PATHS[kind])))
+            timings['restconf'].append(time.perf_counter() - start)
+        yang_bytes = restconf.bytes - before
+        log.info(f"{kind} ({size}): CLI {len(body)} bytes, fetch and parse "
+                 f"{min(timings['cli']) * 1000:.1f}ms ({cli_length} entries); "
+                 f"RESTCONF {yang_bytes} bytes, fetch and decode "
+                 f"{min(timings['restconf']) * 1000:.1f}ms ({structured_length} entries)")
+
+    cli.close()
+    restconf.close()
+    server.shutdown()
+    return 0
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    sys.exit(main())
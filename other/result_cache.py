@@ -0,0 +1,161 @@
+#!/usr/bin/env python
+
+"""Persistent verdicts of config-only checks, reused by repeated jobs.
+
+verify_basic_config and verify_no_acls only judge the device
+configuration, which rarely changes between two jobs, yet each run sends
+their ``show run`` and ``show ip interface`` commands again. Checks
+registered as ``cacheable`` (checks.py) keep their verdict per device in
+a ResultCache instead: a later run first reads the time of the last
+configuration change (one ``show running-config | include`` line) and
+reuses the cached verdict when it is younger than ``max_age`` and the
+configuration has not changed since, without sending the check's
+commands. The cache persists between runs in one JSON file:
+
+    python escript.py --testbed testbed.yaml --result_cache results.json --result_cache_max_age 1800
+
+The simulation runs the cacheable checks on mock devices (mock_device.py)
+three times, the last time after a configuration change on some of them,
+and sums the device time spent in commands:
+
+    python result_cache.py --devices 100 --changed 10
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+import threading
+import time
+
+from parse_utils import CONFIG_CHANGE
+
+log = logging.getLogger(__name__)
+
+DEFAULT_MAX_AGE = 3600
+
+# IOS, IOS-XE and IOS-XR print the last change in the running-config header,
+# NX-OS as 'last done at' (platforms.py)
+CONFIG_CHANGE_COMMAND = 'show running-config | include Last configuration change'
+
+
+def parse_config_change(output):
+    """Time of the last configuration change as printed, None when not reported"""
+    match = CONFIG_CHANGE.search(output)
+    return match.group('changed') if match else None
+
+
+class ResultCache(object):
+    """Cached verdicts per device and check, with the config change they saw
+
+    An entry is reused while it is younger than max_age seconds and the
+    device still reports the same last configuration change, under the
+    same settings.
+    """
+
+    def __init__(self, path=None, max_age=DEFAULT_MAX_AGE):
+        self.path = path
+        self.max_age = max_age
+        # Device -> {check: [time, config change, settings key, passed, message]}
+        self.entries = {}
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        if path and os.path.exists(path):
+            with open(path, encoding='utf-8') as cache_file:
+                self.entries = json.load(cache_file)
+            log.info(f"Loaded cached results of {len(self.entries)} devices from {path}")
+
+    def lookup(self, device_name, check, config_change, settings_key=''):
+        """(passed, message) cached for check, None when missing, expired or stale"""
+        with self._lock:
+            entry = self.entries.get(device_name, {}).get(check)
+            if (entry is None or time.time() - entry[0] > self.max_age
+                    or config_change is None or entry[1] != config_change
+                    or entry[2] != settings_key):
+                self.misses += 1
+                return None
+            self.hits += 1
+            return entry[3], entry[4]
+
+    def record(self, device_name, check, config_change, settings_key, passed, message):
+        """Cache a verdict, devices not reporting their config changes are not cached"""
+        if config_change is None:
+            return
+        with self._lock:
+            self.entries.setdefault(device_name, {})[check] = [
+                time.time(), config_change, settings_key, passed, message]
+
+    def save(self, path=None):
+        """Write the unexpired entries to path (default: the loaded file), atomically"""
+        path = path or self.path
+        now = time.time()
+        with self._lock:
+            entries = {device_name: fresh for device_name, fresh in (
+                (device_name, {check: entry for check, entry in checks.items()
+                               if now - entry[0] <= self.max_age})
+                for device_name, checks in self.entries.items()) if fresh}
+            data = json.dumps(entries, separators=(',', ':'))
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as cache_file:
+            cache_file.write(data)
+        os.replace(tmp_path, path)
+        log.info(f"Saved cached results of {len(entries)} devices to {path} "
+                 f"({self.hits} reused, {self.misses} evaluated)")
+
+
+class _SimulatedDevice(object):
+    """Testbed device answering from a mock CLI, summing the command latencies"""
+
+    def __init__(self, virtual_device):
+        from mock_device import MockCLI
+
+        self.name = virtual_device.name
+        self.os = 'ios'
+        self.platform = None
+        self.cli = MockCLI(virtual_device)
+        self.cli.handle('enable')
+        self.device_time = 0.0
+
+    def execute(self, command):
+        output, latency = self.cli.handle(command)
+        self.device_time += latency
+        return output.decode().replace('\r\n', '\n').rsplit('\n', 1)[0]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--devices', type=int, default=100)
+    parser.add_argument('--changed', type=int, default=10,
+                        help='devices whose configuration changes before the last run')
+    parser.add_argument('--max-age', type=float, default=DEFAULT_MAX_AGE)
+    args = parser.parse_args(argv)
+
+    from checks import CHECKS, run_checks
+    from mock_device import MockFleet
+
+    checks = [name for name, check in CHECKS.items() if check.cacheable]
+    devices = [_SimulatedDevice(device) for device in MockFleet(args.devices).devices]
+    cache = ResultCache(max_age=args.max_age)
+    for run in ('cold', 'warm', 'changed'):
+        if run == 'changed':
+            for device in devices[:args.changed]:
+                device.execute('configure terminal')
+                device.execute('end')
+        hits, device_time = cache.hits, sum(device.device_time for device in devices)
+        verdicts = {}
+        for device in devices:
+            for result in run_checks(device, checks, device.execute,
+                                     {'result_cache': cache}).values():
+                verdicts[result['verdict']] = verdicts.get(result['verdict'], 0) + 1
+        log.info(f"{run}: {sum(device.device_time for device in devices) - device_time:.1f}s "
+                 f"of device time for {len(checks)} checks on {len(devices)} devices, "
+                 f"{cache.hits - hits} verdicts cached "
+                 f"({', '.join(f'{count} {verdict}' for verdict, count in verdicts.items())})")
+    return 0
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    sys.exit(main())
@@ -0,0 +1,137 @@
+#!/usr/bin/env python
+
+"""Columnar export of Sanity_Check results for long-term analytics.
+
+Turns an output capture (see capture.py) into one row per device and test:
+
+    run_id, timestamp, device, test, verdict, duration,
+    cpu_percent, ospf_neighbors, ospf_routes, message
+
+and appends it to a Parquet dataset as one zstd-compressed file per run,
+partitioned by day, so months of history for thousands of devices can be
+queried without parsing reports or logs:
+
+    python results_export.py run1.jsonl --dataset results/
+
+    import pyarrow.dataset as ds
+    ds.dataset('results/', partitioning='hive').to_table(
+        filter=ds.field('verdict') == 'failed')
+
+escript.py exports automatically at cleanup when both ``capture_file`` and
+``results_dataset`` script arguments are given.
+"""
+
+import argparse
+import logging
+import os
+import sys
+import time
+import uuid
+from datetime import datetime, timezone
+
+from capture import load_capture
+from evaluators import parse_cpu_usage
+from ospf_topology import parse_ospf_neighbors
+from route_table import parse_routes
+
+log = logging.getLogger(__name__)
+
+COLUMNS = ['run_id', 'timestamp', 'device', 'test', 'verdict', 'duration',
+           'cpu_percent', 'ospf_neighbors', 'ospf_routes', 'message']
+
+
+def _metrics(test, outputs):
+    """Key metrics of a test from its captured outputs, None when not applicable"""
+    metrics = {'cpu_percent': None, 'ospf_neighbors': None, 'ospf_routes': None}
+    for command, output in outputs:
+        try:
+            if test == 'verify_cpu_memory' and command.startswith('show processes cpu'):
+                metrics['cpu_percent'] = parse_cpu_usage(output)
+            elif test == 'verify_ospf_neighbors' and command == 'show ip ospf neighbor':
+                metrics['ospf_neighbors'] = len(parse_ospf_neighbors(output))
+            elif test == 'verify_ospf_routes' and command.startswith('show ip route'):
+                metrics['ospf_routes'] = len(parse_routes(output))
+        except (ValueError, IndexError):
+            continue
+    return metrics
+
+
+def rows_from_capture(devices, run_id=None):
+    """Build the result columns from a loaded capture, as {column: [values]}"""
+    run_id = run_id or uuid.uuid4().hex[:12]
+    columns = {column: [] for column in COLUMNS}
+    for device_name, tests in devices.items():
+        for test, entry in tests.items():
+            verdict = entry['verdict']
+            if verdict is None:
+                continue
+            timestamp = verdict.get('timestamp') or time.time()
+            row = {
+                'run_id': run_id,
+                'timestamp': datetime.fromtimestamp(timestamp, timezone.utc),
+                'device': device_name,
+                'test': test,
+                'verdict': verdict['verdict'],
+                'duration': verdict.get('duration'),
+                'message': verdict['message'],
+            }
+            row.update(_metrics(test, entry['outputs']))
+            for column in COLUMNS:
+                columns[column].append(row[column])
+    return columns
+
+
+def export(columns, dataset):
+    """Append one run to the Parquet dataset, returns the written file path"""
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise RuntimeError("pyarrow is required for the results export, "
+                           "install it from requirements.txt")
+
+    schema = pa.schema([
+        ('run_id', pa.string()),
+        ('timestamp', pa.timestamp('s', tz='UTC')),
+        ('device', pa.dictionary(pa.int32(), pa.string())),
+        ('test', pa.dictionary(pa.int8(), pa.string())),
+        ('verdict', pa.dictionary(pa.int8(), pa.string())),
+        ('duration', pa.float32()),
+        ('cpu_percent', pa.int16()),
+        ('ospf_neighbors', pa.int16()),
+        ('ospf_routes', pa.int32()),
+        ('message', pa.string()),
+    ])
+    table = pa.Table.from_pydict(columns, schema=schema)
+
+    run_id = columns['run_id'][0] if columns['run_id'] else uuid.uuid4().hex[:12]
+    day = datetime.now(timezone.utc).strftime('%Y-%m-%d')
+    directory = os.path.join(dataset, f"date={day}")
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"run-{run_id}.parquet")
+    pq.write_table(table, path, compression='zstd')
+    return path
+
+
+def export_capture(capture_file, dataset, run_id=None):
+    """Export a capture file to the dataset, returns (path, row count)"""
+    columns = rows_from_capture(load_capture(capture_file), run_id)
+    return export(columns, dataset), len(columns['device'])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('capture_file', help='capture written by escript.py')
+    parser.add_argument('--dataset', required=True, help='Parquet dataset directory')
+    parser.add_argument('--run-id', help='defaults to a random id')
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    path, rows = export_capture(args.capture_file, args.dataset, args.run_id)
+    log.info(f"Wrote {rows} results to {path} in {time.perf_counter() - start:.2f}s")
+    return 0
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    sys.exit(main())
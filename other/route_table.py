@@ -0,0 +1,186 @@
+#!/usr/bin/env python
+
+"""Indexed IPv4 route table built once from 'show ip route'.
+
+Routes are parsed into a binary prefix trie keyed by (network, mask length)
+with an exact-match index next to it, so membership is a dict lookup,
+longest-prefix match walks at most 32 trie levels, and expected/actual
+route diffs are set operations. This replaces substring scans of the whole
+output per prefix, which also matched 172.16.2.0 inside 172.16.2.0/25 or
+172.16.20.0.
+
+    python route_table.py --benchmark 100000
+"""
+
+import argparse
+import logging
+import random
+import sys
+import time
+from array import array
+
+from parse_utils import ROUTE_LINE
+
+log = logging.getLogger(__name__)
+
+
+def ip_to_int(address):
+    first, second, third, fourth = address.split('.')
+    return (int(first) << 24) | (int(second) << 16) | (int(third) << 8) | int(fourth)
+
+
+def int_to_ip(value):
+    return f"{value >> 24 & 255}.{value >> 16 & 255}.{value >> 8 & 255}.{value & 255}"
+
+
+def parse_prefix(prefix):
+    """'10.1.0.0/16' -> (network int, 16), a bare address has length None"""
+    address, _, length = prefix.partition('/')
+    length = int(length) if length else None
+    network = ip_to_int(address)
+    if length is not None:
+        network &= (0xFFFFFFFF << (32 - length)) & 0xFFFFFFFF
+    return network, length
+
+
+class RouteTable(object):
+    """Prefix trie of IPv4 routes with an exact-match index
+
+    Trie nodes live in parallel arrays (``zero``/``one`` child indexes and
+    the route stored at the node), node 0 being the root.
+    """
+
+    def __init__(self):
+        self._zero = array('l', [0])
+        self._one = array('l', [0])
+        self._route = [None]
+        self.routes = {}      # (network, length) -> route attributes
+        self._by_network = {}  # network -> set of lengths, for bare lookups
+
+    def __len__(self):
+        return len(self.routes)
+
+    def insert(self, network, length, attributes=None):
+        """Add a route, network is an int already masked to length"""
+        node = 0
+        for bit in range(31, 31 - length, -1):
+            children = self._one if network >> bit & 1 else self._zero
+            child = children[node]
+            if not child:
+                child = len(self._route)
+                self._zero.append(0)
+                self._one.append(0)
+                self._route.append(None)
+                children[node] = child
+            node = child
+        key = (network, length)
+        self._route[node] = key
+        self.routes[key] = attributes or {}
+        self._by_network.setdefault(network, set()).add(length)
+
+    def __contains__(self, prefix):
+        """'172.16.2.0/24' matches that exact route, a bare address any length"""
+        network, length = parse_prefix(prefix) if isinstance(prefix, str) else prefix
+        if length is None:
+            return network in self._by_network
+        return (network, length) in self.routes
+
+    def longest_match(self, address):
+        """Most specific route covering an address, as (network, length) or None"""
+        target = ip_to_int(address) if isinstance(address, str) else address
+        node, best = 0, self._route[0]
+        for bit in range(31, -1, -1):
+            node = (self._one if target >> bit & 1 else self._zero)[node]
+            if not node:
+                break
+            if self._route[node] is not None:
+                best = self._route[node]
+        return best
+
+    def diff(self, expected):
+        """Compare expected prefixes with the table
+
+        Returns (missing expected prefixes, extra routes not expected), with
+        bare expected addresses matching a route of any length.
+        """
+        missing, matched = [], set()
+        for prefix in expected:
+            network, length = parse_prefix(prefix)
+            if length is None:
+                lengths = self._by_network.get(network)
+                if not lengths:
+                    missing.append(prefix)
+                matched.update((network, found) for found in lengths or ())
+            elif (network, length) in self.routes:
+                matched.add((network, length))
+            else:
+                missing.append(prefix)
+        extra = [format_prefix(key) for key in self.routes if key not in matched]
+        return missing, extra
+
+
+def format_prefix(key):
+    network, length = key
+    return f"{int_to_ip(network)}/{length}"
+
+
+def parse_routes(output):
+    """Parse 'show ip route' output into a RouteTable"""
+    table = RouteTable()
+    subnet_length = None
+    for match in ROUTE_LINE.finditer(output):
+        (header_length, variably, code, network, length,
+         distance, metric, next_hop) = match.groups()
+        if code is None:
+            # Entries under a variably subnetted header carry their own mask
+            subnet_length = None if variably else int(header_length)
+            continue
+        network = ip_to_int(network)
+        if length is not None:
+            length = int(length)
+        elif subnet_length is not None:
+            length = subnet_length
+        else:
+            # Classful network without a subnetted header
+            first_octet = network >> 24
+            length = 8 if first_octet < 128 else 16 if first_octet < 192 else 24
+        network &= (0xFFFFFFFF << (32 - length)) & 0xFFFFFFFF
+        table.insert(network, length, {
+            'code': code.strip(),
+            'next_hop': next_hop,
+            'distance': int(distance) if distance else None,
+            'metric': int(metric) if metric else None,
+        })
+    return table
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--benchmark', type=int, default=100000,
+                        help='number of synthetic routes')
+    args = parser.parse_args(argv)
+
+    from synthetic_outputs import routes
+
+    output, prefixes = routes(args.benchmark)
+    start = time.perf_counter()
+    table = parse_routes(output)
+    parsed = time.perf_counter()
+
+    lookups = [int_to_ip(random.getrandbits(32)) for _ in range(args.benchmark)]
+    for address in lookups:
+        table.longest_match(address)
+    matched = time.perf_counter()
+
+    missing, extra = table.diff(prefixes[:len(prefixes) // 2])
+    diffed = time.perf_counter()
+
+    log.info(f"{len(table)} routes: parsed and indexed in {parsed - start:.2f}s, "
+             f"{len(lookups)} longest-prefix matches in {matched - parsed:.2f}s, "
+             f"diff in {diffed - matched:.2f}s ({len(missing)} missing, {len(extra)} extra)")
+    return 0
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    sys.exit(main())
@@ -0,0 +1,357 @@
+#!/usr/bin/env python
+
+"""Local session broker keeping device CLI sessions warm across job runs.
+
+Start the broker once with the same testbed as the jobs:
+
+    python session_broker.py --testbed testbed.yaml
+
+and pass the socket to the test script (``session_broker`` script argument).
+``common_setup.connect_to_devices`` then attaches to the warm sessions over
+the Unix socket instead of paying the SSH handshake, and falls back to a
+direct connection for any device the broker cannot serve.
+
+Requests are newline delimited JSON objects with an ``op`` key:
+
+    {"op": "ping"}
+    {"op": "connect", "devices": ["R1", "R2"]}
+    {"op": "execute", "device": "R1", "command": "show version"}
+    {"op": "status"}
+
+The default socket lives in a per-user directory only that user can enter
+(mode 0700), and any socket is created with mode 0600.
+
+Sessions idle for longer than ``idle_timeout`` are disconnected, and every
+``health_interval`` seconds idle sessions are probed with an empty command
+and dropped when they do not answer, so the next request reconnects them.
+A session is probed the same way before it is handed to a job, and before
+a command when it sat idle for longer than ``health_interval``.
+
+Commands from all jobs go through one CommandGovernor (rate_limit.py), so
+the rate limits of the testbed hold no matter how many jobs share the broker.
+"""
+
+import argparse
+import json
+import logging
+import os
+import socket
+import socketserver
+import stat
+import sys
+import tempfile
+import threading
+import time
+
+from rate_limit import CommandGovernor
+
+log = logging.getLogger(__name__)
+
+# Per user, in a private directory (see _private_directory)
+SOCKET_DIRECTORY = os.path.join(tempfile.gettempdir(), f"pyats-session-broker-{os.getuid()}")
+DEFAULT_SOCKET = os.path.join(SOCKET_DIRECTORY, 'broker.sock')
+
+# Seconds a client waits for an answer, rate limit queueing included
+DEFAULT_CLIENT_TIMEOUT = 300
+
+
+class BrokerError(Exception):
+    """Error reported by the session broker"""
+
+
+class _Session(object):
+    """A broker owned device session and its bookkeeping"""
+
+    def __init__(self, device):
+        self.device = device
+        self.lock = threading.Lock()
+        self.last_used = time.monotonic()
+        self.connected_at = None
+        self.commands = 0
+
+    def alive(self):
+        """True when the session answers an empty command
+
+        is_connected() only looks at the local end, it misses a session
+        the device or a firewall dropped in the meantime.
+        """
+        if not self.device.is_connected():
+            return False
+        try:
+            self.device.execute('')
+            return True
+        except Exception as e:
+            log.warning(f"Session to {self.device.name} does not answer: {str(e)}")
+            return False
+
+    def ensure_connected(self, probe=False):
+        """Connect unless connected, with probe reconnect a session that does not answer"""
+        if probe and self.connected_at is not None and not self.alive():
+            self.drop()
+        if not self.device.is_connected():
+            self.device.connect(log_stdout=False)
+            self.connected_at = time.monotonic()
+            log.info(f"Broker connected to {self.device.name}")
+
+    def drop(self):
+        try:
+            self.device.disconnect()
+        except Exception as e:
+            log.warning(f"Error disconnecting from {self.device.name}: {str(e)}")
+        self.connected_at = None
+
+
+class SessionBroker(object):
+    """Owns the device sessions and serves them over a Unix socket"""
+
+    def __init__(self, testbed, socket_path=DEFAULT_SOCKET, idle_timeout=900,
+                 health_interval=60):
+        self.testbed = testbed
+        self.socket_path = socket_path
+        self.idle_timeout = idle_timeout
+        self.health_interval = health_interval
+        self.sessions = {name: _Session(device)
+                         for name, device in testbed.devices.items()}
+        self.governor = CommandGovernor.from_testbed(testbed)
+        self._stop = threading.Event()
+        self._server = None
+
+    def handle(self, request):
+        """Dispatch one request and return the response dict"""
+        op = request.get('op')
+        if op == 'ping':
+            return {'ok': True}
+        if op == 'connect':
+            return {'ok': True, 'devices': {name: self._connect(name)
+                                            for name in request['devices']}}
+        if op == 'execute':
+            return self._execute(request['device'], request['command'])
+        if op == 'status':
+            return {'ok': True, 'devices': self.status(),
+                    'queueing': self.governor.metrics()['fleet']}
+        return {'ok': False, 'error': f"Unknown op {op!r}"}
+
+    def _connect(self, device_name):
+        session = self.sessions.get(device_name)
+        if session is None:
+            return f"Device {device_name} is not in the broker testbed"
+        with session.lock:
+            try:
+                session.ensure_connected(probe=True)
+                session.last_used = time.monotonic()
+                return 'connected'
+            except Exception as e:
+                return f"Failed to connect to {device_name}: {str(e)}"
+
+    def _execute(self, device_name, command):
+        session = self.sessions.get(device_name)
+        if session is None:
+            return {'ok': False, 'error': f"Device {device_name} is not in the broker testbed"}
+        with session.lock:
+            try:
+                session.ensure_connected(
+                    probe=time.monotonic() - session.last_used > self.health_interval)
+                output = self.governor.execute(session.device.execute, device_name, command)
+            except Exception as e:
+                # Drop a broken session so the next request reconnects it
+                if not session.device.is_connected():
+                    session.drop()
+                return {'ok': False, 'error': f"{type(e).__name__}: {str(e)}"}
+            finally:
+                session.last_used = time.monotonic()
+            session.commands += 1
+        return {'ok': True, 'output': output}
+
+    def status(self):
+        now = time.monotonic()
+        return {name: {'connected': session.connected_at is not None,
+                       'idle': round(now - session.last_used, 1),
+                       'commands': session.commands}
+                for name, session in self.sessions.items()}
+
+    def maintain(self):
+        """Evict idle sessions and drop dead ones, run from a background thread"""
+        while not self._stop.wait(self.health_interval):
+            now = time.monotonic()
+            for name, session in self.sessions.items():
+                if session.connected_at is None or not session.lock.acquire(blocking=False):
+                    continue
+                try:
+                    if now - session.last_used > self.idle_timeout:
+                        log.info(f"Evicting idle session to {name}")
+                        session.drop()
+                    elif not session.alive():
+                        log.warning(f"Session to {name} is dead, dropping it")
+                        session.drop()
+                finally:
+                    session.lock.release()
+
+    def serve_forever(self):
+        broker = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                for line in self.rfile:
+                    try:
+                        response = broker.handle(json.loads(line))
+                    except Exception as e:
+                        response = {'ok': False, 'error': f"Bad request: {str(e)}"}
+                    self.wfile.write(json.dumps(response).encode() + b'\n')
+                    self.wfile.flush()
+
+        if os.path.dirname(os.path.abspath(self.socket_path)) == SOCKET_DIRECTORY:
+            _private_directory(SOCKET_DIRECTORY)
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+        # The socket is created by bind(), with the umask's mode: no window in
+        # which another user could connect before a chmod
+        umask = os.umask(0o177)
+        try:
+            self._server = socketserver.ThreadingUnixStreamServer(self.socket_path, Handler)
+        finally:
+            os.umask(umask)
+        self._server.daemon_threads = True
+
+        threading.Thread(target=self.maintain, daemon=True).start()
+        log.info(f"Session broker listening on {self.socket_path}")
+        try:
+            self._server.serve_forever()
+        finally:
+            self.shutdown()
+
+    def shutdown(self):
+        self._stop.set()
+        if self._server:
+            self._server.server_close()
+            self._server = None
+        for session in self.sessions.values():
+            if session.connected_at is not None:
+                session.drop()
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+
+
+def _private_directory(path):
+    """Create path with mode 0700, refusing an existing one that is not private
+
+    Its name is predictable, another user may have created it first.
+    """
+    os.makedirs(path, mode=0o700, exist_ok=True)
+    status = os.lstat(path)
+    if (not stat.S_ISDIR(status.st_mode) or status.st_uid != os.getuid()
+            or status.st_mode & 0o077):
+        raise BrokerError(f"Socket directory {path} is not private to this user")
+
+
+class BrokerClient(object):
+    """Client side of the session broker protocol
+
+    A request not answered within timeout seconds raises BrokerError and
+    drops the connection, whose stream is out of step from then on; the
+    next request opens a new one.
+    """
+
+    def __init__(self, socket_path=DEFAULT_SOCKET, timeout=DEFAULT_CLIENT_TIMEOUT):
+        self.socket_path = socket_path
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._sock = self._file = None
+        self._connect()
+
+    def _connect(self):
+        self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._sock.settimeout(self.timeout)
+        try:
+            self._sock.connect(self.socket_path)
+        except OSError:
+            self._sock.close()
+            self._sock = None
+            raise
+        self._file = self._sock.makefile('rwb')
+
+    def request(self, **request):
+        with self._lock:
+            if self._file is None:
+                try:
+                    self._connect()
+                except OSError as e:
+                    raise BrokerError(f"Cannot reconnect to the session broker at "
+                                      f"{self.socket_path}: {str(e)}")
+            try:
+                self._file.write(json.dumps(request).encode() + b'\n')
+                self._file.flush()
+                line = self._file.readline()
+            except socket.timeout:
+                self._disconnect()
+                raise BrokerError(f"No answer from the session broker at {self.socket_path} "
+                                  f"within {self.timeout}s")
+        if not line:
+            raise BrokerError(f"Session broker at {self.socket_path} closed the connection")
+        response = json.loads(line)
+        if not response['ok']:
+            raise BrokerError(response['error'])
+        return response
+
+    def execute(self, device_name, command):
+        return self.request(op='execute', device=device_name, command=command)['output']
+
+    def _disconnect(self):
+        if self._file is not None:
+            self._file.close()
+            self._sock.close()
+            self._sock = self._file = None
+
+    def close(self):
+        with self._lock:
+            self._disconnect()
+
+
+def attach_to_broker(testbed, socket_path=DEFAULT_SOCKET, timeout=DEFAULT_CLIENT_TIMEOUT):
+    """Route the testbed devices' execute() through the session broker
+
+    Returns (client, names of the devices that need a direct connection),
+    or (None, all device names) when no broker is listening on socket_path.
+    """
+    device_names = list(testbed.devices.keys())
+    try:
+        client = BrokerClient(socket_path, timeout)
+        client.request(op='ping')
+    except (OSError, BrokerError) as e:
+        log.info(f"No session broker at {socket_path}: {str(e)}")
+        return None, device_names
+
+    states = client.request(op='connect', devices=device_names)['devices']
+    direct = []
+    for name in device_names:
+        if states[name] != 'connected':
+            log.warning(f"Broker cannot serve {name}: {states[name]}")
+            direct.append(name)
+            continue
+        device = testbed.devices[name]
+        device.execute = lambda command, _name=name, **kwargs: client.execute(_name, command)
+    return client, direct
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--testbed', dest='testbed', required=True)
+    parser.add_argument('--socket', default=DEFAULT_SOCKET)
+    parser.add_argument('--idle-timeout', type=int, default=900,
+                        help='disconnect sessions unused for this many seconds')
+    parser.add_argument('--health-interval', type=int, default=60)
+    args = parser.parse_args(argv)
+
+    from pyats.topology import loader
+    testbed = loader.load(args.testbed)
+
+    broker = SessionBroker(testbed, args.socket, args.idle_timeout, args.health_interval)
+    try:
+        broker.serve_forever()
+    except KeyboardInterrupt:
+        log.info("Session broker stopped")
+    return 0
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(message)s')
+    sys.exit(main())
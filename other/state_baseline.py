@@ -0,0 +1,205 @@
+#!/usr/bin/env python
+
+"""Baseline snapshots of normalized device state and drift detection.
+
+Builds structured per-device state (interfaces, OSPF neighbors, routes, ACL
+bindings, CPU) from a Sanity_Check output capture (see capture.py), stores
+it with a digest per section, and diffs later runs against it. Sections
+whose digest is unchanged are skipped without looking at their content, so
+5000 devices diff in seconds.
+
+    python state_baseline.py snapshot run1.jsonl --baseline baseline.jsonl
+    python state_baseline.py diff run2.jsonl --baseline baseline.jsonl --output drift.json
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import re
+import sys
+import time
+
+from capture import load_capture
+from evaluators import find_acls, parse_cpu_usage
+from ospf_topology import parse_ospf_neighbors
+from route_table import format_prefix, parse_routes
+
+log = logging.getLogger(__name__)
+
+# GigabitEthernet0/2     unassigned      YES NVRAM  administratively down down
+INTERFACE_LINE = re.compile(
+    r'^(?P<interface>\S+)\s+(?P<address>\S+)\s+(?:YES|NO)\s+\S+\s+'
+    r'(?P<status>administratively down|\S+)\s+(?P<protocol>\S+)\s*$',
+    re.MULTILINE)
+
+# CPU is bucketed in the digest so normal jitter is not reported as drift
+CPU_BUCKET = 10
+
+
+def parse_interfaces_brief(output):
+    """Parse 'show ip interface brief' into [interface, address, status, protocol]"""
+    return [[match.group('interface'), match.group('address'),
+             match.group('status'), match.group('protocol')]
+            for match in INTERFACE_LINE.finditer(output)
+            if match.group('interface') != 'Interface']
+
+
+def _output(tests, test, command_prefix):
+    """First captured output of a test whose command starts with command_prefix"""
+    for command, output in tests.get(test, {}).get('outputs', []):
+        if command.startswith(command_prefix):
+            return output
+    return None
+
+
+def normalize_state(tests):
+    """Build the normalized sections of one device from its captured tests
+
+    Sections whose command was not captured are left out. Lists are sorted
+    so that the digests do not depend on output ordering.
+    """
+    state = {}
+    output = _output(tests, 'verify_interface_status', 'show ip interface brief')
+    if output is not None:
+        state['interfaces'] = sorted(parse_interfaces_brief(output))
+
+    output = _output(tests, 'verify_ospf_neighbors', 'show ip ospf neighbor')
+    if output is not None:
+        # Dead timers change every second, keep identity and state only
+        state['ospf_neighbors'] = sorted(
+            [neighbor_id, neighbor_state, address, interface]
+            for neighbor_id, neighbor_state, address, interface
+            in parse_ospf_neighbors(output))
+
+    output = _output(tests, 'verify_ospf_routes', 'show ip route')
+    if output is not None:
+        routes = parse_routes(output).routes
+        state['routes'] = sorted([format_prefix(key), attributes.get('next_hop')]
+                                 for key, attributes in routes.items())
+
+    output = _output(tests, 'verify_no_acls', 'show ip interface')
+    if output is not None:
+        state['acl_bindings'] = sorted(find_acls(output))
+
+    output = _output(tests, 'verify_cpu_memory', 'show processes cpu')
+    if output is not None:
+        try:
+            state['cpu'] = parse_cpu_usage(output)
+        except (ValueError, IndexError):
+            pass
+    return state
+
+
+def section_digest(section, value):
+    """Stable digest of one normalized section"""
+    if section == 'cpu':
+        value = value // CPU_BUCKET
+    canonical = json.dumps(value, separators=(',', ':'), sort_keys=True)
+    return hashlib.blake2b(canonical.encode(), digest_size=16).hexdigest()
+
+
+def snapshot(devices):
+    """Normalized state and section digests for every captured device"""
+    records = {}
+    for device_name, tests in devices.items():
+        state = normalize_state(tests)
+        records[device_name] = {
+            'state': state,
+            'digests': {section: section_digest(section, value)
+                        for section, value in state.items()},
+        }
+    return records
+
+
+def save_baseline(records, path):
+    with open(path, 'w') as baseline_file:
+        for device_name, record in records.items():
+            baseline_file.write(json.dumps({'device': device_name, **record}) + '\n')
+
+
+def load_baseline(path):
+    records = {}
+    with open(path) as baseline_file:
+        for line in baseline_file:
+            if line.strip():
+                record = json.loads(line)
+                records[record.pop('device')] = record
+    return records
+
+
+def _diff_section(section, old, new):
+    if section == 'cpu':
+        return {'old': old, 'new': new}
+    old_items = {json.dumps(item) for item in old}
+    new_items = {json.dumps(item) for item in new}
+    return {'removed': [json.loads(item) for item in sorted(old_items - new_items)],
+            'added': [json.loads(item) for item in sorted(new_items - old_items)]}
+
+
+def diff(baseline, current):
+    """Compare a new snapshot to the baseline
+
+    Only sections whose digest changed are compared in detail. A baseline
+    section the new snapshot lacks (its command was not run, e.g. a cached
+    or skipped test) is reported as ``{'missing': True}``, it cannot be
+    vouched for. Returns {device: {section: changes}} plus the devices
+    missing from either side.
+    """
+    drift = {}
+    for device_name, record in current.items():
+        base = baseline.get(device_name)
+        if base is None:
+            continue
+        changes = {}
+        for section, base_digest in base['digests'].items():
+            digest = record['digests'].get(section)
+            if digest is None:
+                changes[section] = {'missing': True}
+            elif digest != base_digest:
+                changes[section] = _diff_section(section, base['state'][section],
+                                                 record['state'][section])
+        if changes:
+            drift[device_name] = changes
+    return {
+        'drift': drift,
+        'new_devices': sorted(set(current) - set(baseline)),
+        'missing_devices': sorted(set(baseline) - set(current)),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('mode', choices=['snapshot', 'diff'])
+    parser.add_argument('capture_file', help='capture written by escript.py')
+    parser.add_argument('--baseline', required=True, help='baseline JSON lines file')
+    parser.add_argument('--output', help='write the drift report as JSON (diff mode)')
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    current = snapshot(load_capture(args.capture_file))
+
+    if args.mode == 'snapshot':
+        save_baseline(current, args.baseline)
+        log.info(f"Saved baseline of {len(current)} devices to {args.baseline} "
+                 f"in {time.perf_counter() - start:.2f}s")
+        return 0
+
+    report = diff(load_baseline(args.baseline), current)
+    for device_name, changes in report['drift'].items():
+        log.info(f"{device_name}: " + ', '.join(
+            f"{section} {'missing' if change.get('missing') else 'changed'}"
+            for section, change in sorted(changes.items())))
+    log.info(f"Compared {len(current)} devices in {time.perf_counter() - start:.2f}s: "
+             f"{len(report['drift'])} drifted, {len(report['new_devices'])} new, "
+             f"{len(report['missing_devices'])} missing")
+
+    if args.output:
+        with open(args.output, 'w') as output_file:
+            json.dump(report, output_file, indent=2)
+    return 1 if report['drift'] or report['missing_devices'] else 0
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    sys.exit(main())
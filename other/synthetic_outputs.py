@@ -0,0 +1,92 @@
+#!/usr/bin/env python
+
+"""Synthetic command outputs for the benchmarks and stand-in servers.
+
+Large, realistic-looking IOS outputs (thousands of interfaces, routes or
+OSPF neighbors) generated in memory, shared by the ``--benchmark`` modes
+of interface_stats.py and route_table.py, output_digest.py, the restconf.py
+stand-in server and the parser benchmarks (tests/test_parse_bench.py).
+"""
+
+import random
+
+
+def _address(value):
+    return f"{value >> 24}.{value >> 16 & 255}.{value >> 8 & 255}.{value & 255}"
+
+
+def interfaces(interface_count, base=0):
+    """'show interfaces' with interface_count interfaces, a few of them erroring"""
+    blocks = []
+    for index in range(interface_count):
+        packets = base * (index + 1)
+        errors = packets // 50 if index % 97 == 0 else 0
+        blocks.append(
+            f"GigabitEthernet{index >> 6}/{index & 63} is up, line protocol is up \n"
+            f"  Hardware is iGbE, address is 5254.0000.{index:04x}\n"
+            f"  Input queue: 0/75/{errors // 2}/0 (size/max/drops/flushes); "
+            f"Total output drops: 0\n"
+            f"  5 minute input rate {index * 8} bits/sec, {index} packets/sec\n"
+            f"  5 minute output rate {index * 4} bits/sec, {index // 2} packets/sec\n"
+            f"     {packets} packets input, {packets * 100} bytes, 0 no buffer\n"
+            f"     {errors} input errors, {errors} CRC, 0 frame, 0 overrun, 0 ignored\n"
+            f"     {packets} packets output, {packets * 100} bytes, 0 underruns\n"
+            f"     0 output errors, 0 collisions, 1 interface resets\n")
+    return ''.join(blocks)
+
+
+def interface_brief(interface_count):
+    """'show ip interface brief' with interface_count interfaces, all up"""
+    lines = ["Interface              IP-Address      OK? Method Status                Protocol"]
+    for index in range(interface_count):
+        lines.append(f"GigabitEthernet{index >> 6}/{index & 63}   10.{index >> 8}.{index & 255}.1"
+                     f"      YES NVRAM  up                    up      ")
+    return '\n'.join(lines) + '\n'
+
+
+def acl_bindings(interface_count):
+    """'show ip interface | inc access list', an inbound ACL on every 500th interface"""
+    lines = []
+    for index in range(interface_count):
+        lines += ["  Outgoing access list is not set",
+                  "  Inbound  access list is not set" if index % 500 else
+                  f"  Inbound  access list is {100 + index // 500}"]
+    return '\n'.join(lines) + '\n'
+
+
+def routes(route_count):
+    """'show ip route ospf' with route_count random OSPF routes
+
+    Returns (output, list of the route prefixes).
+    """
+    lines = ['Gateway of last resort is not set', '']
+    seen = set()
+    while len(seen) < route_count:
+        length = random.choice((16, 20, 24, 24, 24, 28, 30, 32))
+        network = random.getrandbits(32) & (0xFFFFFFFF << (32 - length)) & 0xFFFFFFFF
+        if (network, length) in seen:
+            continue
+        seen.add((network, length))
+        lines.append(f"O        {_address(network)}/{length} [110/2] via 10.0.0.2, "
+                     f"00:12:34, GigabitEthernet0/1")
+    return '\n'.join(lines), [f"{_address(network)}/{length}" for network, length in seen]
+
+
+def ospf_neighbors(neighbor_count, dead_time=33):
+    """'show ip ospf neighbor' with neighbor_count FULL neighbors"""
+    lines = ["", "Neighbor ID     Pri   State           Dead Time   Address         Interface"]
+    for index in range(neighbor_count):
+        lines.append(f"10.255.{index >> 8}.{index & 255}  1   FULL/DR         "
+                     f"00:00:{dead_time}    10.0.{index >> 8}.{index & 255}      "
+                     f"GigabitEthernet0/{index}")
+    return '\n'.join(lines) + '\n'
+
+
+def pings(target_count):
+    """Successful 'ping' outputs of target_count targets, one after the other"""
+    return ''.join(
+        f"Type escape sequence to abort.\n"
+        f"Sending 5, 100-byte ICMP Echos to 10.0.{index >> 8}.{index & 255}, "
+        f"timeout is 2 seconds:\n!!!!!\n"
+        f"Success rate is 100 percent (5/5), round-trip min/avg/max = 1/2/4 ms\n"
+        for index in range(target_count))
@@ -0,0 +1,403 @@
+#!/usr/bin/env python
+
+"""Dial-out telemetry receiver keeping the latest CPU, memory and interface samples.
+
+Devices dial out to the receiver and push their CPU, memory and interface
+statistics periodically, so the checks that would poll them
+(verify_cpu_memory, verify_interface_errors, the performance metrics of
+escript.py) answer from the latest sample instead of opening a CLI session.
+
+Messages use the TCP dial-out framing of model-driven telemetry (JSON
+encoding): a 12 byte header (type, encoding, version, flags, length) and a
+payload whose ``data_json`` rows carry the YANG keys and content of one
+sensor path, named as in the IOS-XE operational models. gRPC dial-out
+sessions need a relay such as a telegraf cisco_telemetry_mdt input.
+
+TelemetryStore keeps a ring buffer of samples per device and sensor, and
+answers get(device, kind) like restconf.StructuredCollector while the
+latest sample is fresh, so it plugs into the checks' ``structured``
+setting (checks.py).
+
+A simulated fleet of publishers measures ingestion and the time to answer
+the checks from the samples:
+
+    python telemetry.py --simulate 500 --interfaces 48 --duration 5
+    python telemetry.py --port 57500
+"""
+
+import argparse
+import json
+import logging
+import statistics
+import struct
+import sys
+import threading
+import time
+from collections import deque
+
+from interface_stats import InterfaceSample
+from restconf import _value, interface_values, yang_statistics
+
+log = logging.getLogger(__name__)
+
+DEFAULT_PORT = 57500
+
+# Header of each message: type, encoding, version, flags and payload length
+HEADER = struct.Struct('>HHHHI')
+DATA_MESSAGE = 1
+JSON_ENCODING = 2
+MAX_MESSAGE = 16 * 1024 * 1024
+
+# Samples older than this are not used, the checks poll the CLI instead
+MAX_AGE = 60
+# Samples kept per device and sensor
+DEPTH = 32
+
+# Sensor path -> data kind
+SENSOR_PATHS = {
+    'Cisco-IOS-XE-process-cpu-oper:cpu-usage/cpu-utilization': 'cpu',
+    'Cisco-IOS-XE-memory-oper:memory-statistics/memory-statistic': 'memory',
+    'Cisco-IOS-XE-interfaces-oper:interfaces/interface': 'interfaces',
+}
+
+
+def _cpu(rows, timestamp):
+    """Five second CPU percentage"""
+    return _value(rows[0]['content'], 'five-seconds')
+
+
+def _memory(rows, timestamp):
+    """{'total', 'used', 'free'} bytes of the Processor pool"""
+    for row in rows:
+        if row.get('keys', {}).get('name') == 'Processor':
+            content = row['content']
+            return {'total': _value(content, 'total-memory'),
+                    'used': _value(content, 'used-memory'),
+                    'free': _value(content, 'free-memory')}
+    return None
+
+
+def _interfaces(rows, timestamp):
+    """InterfaceSample of every interface row"""
+    sample = InterfaceSample(timestamp)
+    columns = sample.columns
+    for row in rows:
+        sample.add(row['keys']['name'])
+        for column, value in interface_values(row['content'].get('statistics', {})).items():
+            columns[column][-1] = value
+    return sample
+
+
+# Data kind -> decode(data_json rows, timestamp)
+DECODERS = {
+    'cpu': _cpu,
+    'memory': _memory,
+    'interfaces': _interfaces,
+}
+
+
+class TelemetryStore(object):
+    """Ring buffers of the pushed samples, per device and data kind
+
+    Shared by the receiver thread, which adds samples, and the checks,
+    which read the latest one.
+    """
+
+    name = 'telemetry'
+
+    def __init__(self, depth=DEPTH, max_age=MAX_AGE):
+        self.depth = depth
+        self.max_age = max_age
+        self._buffers = {}  # (device, kind) -> deque of (timestamp, data)
+        self._lock = threading.Lock()
+
+    def add(self, device_name, kind, timestamp, data):
+        with self._lock:
+            buffer = self._buffers.get((device_name, kind))
+            if buffer is None:
+                buffer = self._buffers[(device_name, kind)] = deque(maxlen=self.depth)
+            buffer.append((timestamp, data))
+
+    def ingest(self, message):
+        """Store the sample of one decoded message, returns (device, kind, timestamp)
+
+        Returns None for sensor paths without a decoder.
+        """
+        kind = SENSOR_PATHS.get(message.get('encoding_path'))
+        rows = message.get('data_json') or []
+        if kind is None or not rows:
+            return None
+        timestamp = message['msg_timestamp'] / 1000
+        data = DECODERS[kind](rows, timestamp)
+        if data is None:
+            return None
+        device_name = message['node_id_str']
+        self.add(device_name, kind, timestamp, data)
+        return device_name, kind, timestamp
+
+    def latest(self, device_name, kind, max_age=None):
+        """(timestamp, data) of the latest sample, None when missing or stale"""
+        buffer = self._buffers.get((device_name, kind))
+        if not buffer:
+            return None
+        timestamp, data = buffer[-1]
+        max_age = self.max_age if max_age is None else max_age
+        if time.time() - timestamp > max_age:
+            return None
+        return timestamp, data
+
+    def history(self, device_name, kind):
+        """[(timestamp, data)] kept for a device, oldest first"""
+        with self._lock:
+            return list(self._buffers.get((device_name, kind), ()))
+
+    def get(self, device, kind):
+        """Latest data of kind for device, or None to fall back to the CLI"""
+        sample = self.latest(device.name, kind)
+        return None if sample is None else sample[1]
+
+    def devices(self):
+        with self._lock:
+            return sorted({device_name for device_name, _ in self._buffers})
+
+
+class TelemetryReceiver(object):
+    """Dial-out telemetry server feeding a TelemetryStore, run in a background thread
+
+    start() returns once the server listens; port 0 picks a free port,
+    read back from ``port``.
+    """
+
+    def __init__(self, store, host='0.0.0.0', port=DEFAULT_PORT):
+        self.store = store
+        self.host = host
+        self.port = port
+        self.messages = 0
+        self.bytes = 0
+        self.errors = 0
+        self.latencies = deque(maxlen=10000)  # Seconds from device timestamp to stored
+        self._loop = None
+        self._server = None
+        self._thread = None
+
+    async def _handle(self, reader, writer):
+        import asyncio
+
+        peer = writer.get_extra_info('peername')
+        try:
+            while True:
+                header = await reader.readexactly(HEADER.size)
+                message_type, encoding, _, _, length = HEADER.unpack(header)
+                if length > MAX_MESSAGE:
+                    raise ValueError(f"message of {length} bytes")
+                payload = await reader.readexactly(length)
+                self.bytes += HEADER.size + length
+                if message_type != DATA_MESSAGE or encoding != JSON_ENCODING:
+                    self.errors += 1
+                    continue
+                try:
+                    stored = self.store.ingest(json.loads(payload))
+                except (ValueError, KeyError, IndexError, TypeError) as e:
+                    self.errors += 1
+                    log.warning(f"Invalid telemetry message from {peer}: {str(e)}")
+                    continue
+                self.messages += 1
+                if stored is not None:
+                    self.latencies.append(time.time() - stored[2])
+        except (asyncio.IncompleteReadError, asyncio.CancelledError, ConnectionError):
+            pass
+        except ValueError as e:
+            self.errors += 1
+            log.warning(f"Dropping telemetry session from {peer}: {str(e)}")
+        finally:
+            writer.close()
+
+    def start(self):
+        import asyncio
+
+        self._loop = asyncio.new_event_loop()
+        ready = threading.Event()
+        failure = []
+
+        def serve():
+            asyncio.set_event_loop(self._loop)
+            try:
+                self._server = self._loop.run_until_complete(
+                    asyncio.start_server(self._handle, self.host, self.port))
+            except OSError as e:
+                failure.append(e)
+                ready.set()
+                return
+            self.port = self._server.sockets[0].getsockname()[1]
+            ready.set()
+            self._loop.run_forever()
+
+        self._thread = threading.Thread(target=serve, name='telemetry', daemon=True)
+        self._thread.start()
+        ready.wait()
+        if failure:
+            self._thread.join()
+            self._loop.close()
+            self._loop = None
+            raise failure[0]
+        log.info(f"Telemetry receiver listening on {self.host}:{self.port}")
+        return self
+
+    def _close(self):
+        import asyncio
+
+        self._server.close()
+        for task in asyncio.all_tasks(self._loop):
+            task.cancel()
+        self._loop.call_soon(self._loop.stop)
+
+    def stop(self):
+        if self._loop is None:
+            return
+        self._loop.call_soon_threadsafe(self._close)
+        self._thread.join(timeout=5)
+        self._loop.close()
+        self._loop = None
+
+    def summary(self):
+        """Messages, bytes, errors and ingest latency percentiles so far"""
+        latencies = sorted(self.latencies)
+        summary = {'messages': self.messages, 'bytes': self.bytes, 'errors': self.errors,
+                   'devices': len(self.store.devices())}
+        if latencies:
+            summary['latency_median'] = statistics.median(latencies)
+            summary['latency_p99'] = latencies[int(len(latencies) * 0.99)]
+        return summary
+
+
+def encode(device_name, path, rows, timestamp=None):
+    """One framed JSON message of rows of a sensor path"""
+    timestamp = time.time() if timestamp is None else timestamp
+    payload = json.dumps({
+        'node_id_str': device_name,
+        'subscription_id_str': 'pyats',
+        'encoding_path': path,
+        'msg_timestamp': int(timestamp * 1000),
+        'data_json': rows,
+    }).encode()
+    return HEADER.pack(DATA_MESSAGE, JSON_ENCODING, 1, 0, len(payload)) + payload
+
+
+def _simulated_messages(device_name, interface_count, tick):
+    """CPU, memory and interface messages of one simulated device at one tick"""
+    paths = {kind: path for path, kind in SENSOR_PATHS.items()}
+    packets = 1000 * (tick + 1)
+    return [
+        encode(device_name, paths['cpu'], [{'keys': {}, 'content': {
+            'five-seconds': 5 + tick % 10, 'one-minute': 6, 'five-minutes': 6}}]),
+        encode(device_name, paths['memory'], [{'keys': {'name': 'Processor'}, 'content': {
+            'total-memory': '2147483648', 'used-memory': '536870912',
+            'free-memory': '1610612736'}}]),
+        encode(device_name, paths['interfaces'], [
+            {'keys': {'name': f"GigabitEthernet0/{index}"}, 'content': {
+                'statistics': yang_statistics({
+                    'input_rate': 8000, 'input_pps': 10, 'output_rate': 4000, 'output_pps': 5,
+                    'input_packets': packets, 'output_packets': packets, 'input_errors': 0,
+                    'crc': 0, 'output_errors': 0, 'input_drops': 0, 'output_drops': 0})}}
+            for index in range(interface_count)]),
+    ]
+
+
+async def _publish(host, port, device_name, interface_count, interval, duration):
+    """Push the samples of one simulated device every interval for duration seconds"""
+    import asyncio
+
+    _, writer = await asyncio.open_connection(host, port)
+    tick, end = 0, time.monotonic() + duration
+    try:
+        while time.monotonic() < end:
+            for message in _simulated_messages(device_name, interface_count, tick):
+                writer.write(message)
+            await writer.drain()
+            tick += 1
+            await asyncio.sleep(interval)
+    finally:
+        writer.close()
+        await writer.wait_closed()
+
+
+def simulate(host, port, device_count, interface_count=48, interval=1.0, duration=5.0):
+    """Run device_count simulated publishers against a receiver until duration ends"""
+    import asyncio
+
+    async def fleet():
+        await asyncio.gather(*(
+            _publish(host, port, f"R{index + 1}", interface_count, interval, duration)
+            for index in range(device_count)))
+    asyncio.run(fleet())
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--host', default='0.0.0.0')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--simulate', type=int, default=0, metavar='DEVICES',
+                        help='push samples from this many simulated devices and report')
+    parser.add_argument('--interfaces', type=int, default=48,
+                        help='interfaces per simulated device')
+    parser.add_argument('--interval', type=float, default=1.0,
+                        help='seconds between samples of a simulated device, '
+                             'or between summaries when receiving')
+    parser.add_argument('--duration', type=float, default=5.0,
+                        help='seconds the simulated devices publish')
+    args = parser.parse_args(argv)
+
+    store = TelemetryStore()
+    if not args.simulate:
+        receiver = TelemetryReceiver(store, args.host, args.port).start()
+        try:
+            while True:
+                time.sleep(args.interval)
+                log.info(receiver.summary())
+        except KeyboardInterrupt:
+            pass
+        finally:
+            receiver.stop()
+        return 0
+
+    from types import SimpleNamespace
+
+    from checks import run_checks
+
+    receiver = TelemetryReceiver(store, '127.0.0.1', 0).start()
+    start = time.perf_counter()
+    simulate('127.0.0.1', receiver.port, args.simulate, args.interfaces, args.interval,
+             args.duration)
+    elapsed = time.perf_counter() - start
+    time.sleep(0.1)
+    summary = receiver.summary()
+    receiver.stop()
+    log.info(f"{summary['messages']} messages ({summary['bytes']} bytes) from "
+             f"{summary['devices']} devices in {elapsed:.1f}s, "
+             f"{summary['messages'] / elapsed:.0f} messages/s, {summary['errors']} errors, "
+             f"ingest latency median {summary.get('latency_median', 0) * 1000:.2f}ms, "
+             f"p99 {summary.get('latency_p99', 0) * 1000:.2f}ms")
+
+    def polled(command):
+        raise RuntimeError(f"'{command}' polled")
+
+    checks = ['verify_cpu_memory', 'verify_interface_errors']
+    verdicts = {}
+    start = time.perf_counter()
+    for device_name in store.devices():
+        device = SimpleNamespace(name=device_name, os='iosxe', platform=None)
+        results = run_checks(device, checks, polled, {'structured': store})
+        for result in results.values():
+            key = (result['verdict'], result.get('source', 'cli'))
+            verdicts[key] = verdicts.get(key, 0) + 1
+    answered = time.perf_counter() - start
+    log.info(f"{len(checks)} checks on {len(store.devices())} devices answered in "
+             f"{answered * 1000:.1f}ms: " + ', '.join(
+                 f"{count} {verdict} from {source}"
+                 for (verdict, source), count in sorted(verdicts.items())))
+    return 0
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    sys.exit(main())
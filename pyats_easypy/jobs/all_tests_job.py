@@ -1,19 +1,47 @@
 #!/usr/bin/env python
 
+import argparse
+import logging
 import os
-from pyats.easypy import run
-from genie.testbed import load
+import sys
+
+# Shared tooling modules live in other/
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'other'))
+
+from checkpoint import read_checkpoint
+from health_matrix import MATRIX_FILE, STREAM_FILE, HealthMatrixAggregator, ResultStream
+
+log = logging.getLogger(__name__)
 
 def main(runtime):
     """
     Main function that will be run by pyATS.
     Executes both connectivity and OSPF tests.
+
+    With --checkpoint, completed device x check results are checkpointed
+    to that file; with --resume, a rerun after an interrupted run only connects to and
+    tests what the checkpoint does not have yet (checkpoint.py). With
+    --restconf, devices with a restconf testbed connection are read over
+    RESTCONF (restconf.py).
     """
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--checkpoint', dest='checkpoint', default=None)
+    parser.add_argument('--resume', dest='resume', action='store_true')
+    parser.add_argument('--restconf', dest='restconf', action='store_true')
+    args, _ = parser.parse_known_args()
+    checkpoint = os.path.abspath(args.checkpoint) if args.checkpoint else None
+    if args.resume and checkpoint is None:
+        parser.error('--resume needs the --checkpoint of the interrupted run')
+    if checkpoint and not args.resume:
+        # A fresh run starts a fresh checkpoint
+        open(checkpoint, 'w').close()
+
     # Get absolute path for testbed file
     testbed_path = os.path.join(os.path.dirname(__file__), 
                                 '..', 'testbeds', 'testbed.yaml')
     
-    # Load the testbed file
+    # Load the testbed file, genie is only imported once the job actually runs
+    from genie.testbed import load
     testbed = load(testbed_path)
     
     # Get script paths
@@ -22,18 +50,48 @@ def main(runtime):
     ospf_path = os.path.join(os.path.dirname(__file__), 
                             '..', 'tests', 'routing', 'test_ospf.py')
     
-    # Run tests
-    runtime.tasks.run(
-        testscript=connectivity_path,
-        taskid="Connectivity Tests",
-        testbed=testbed
-    )
+    # Stream every device x check result into one matrix, rewritten while
+    # the tasks run so the job can be watched live (health_matrix.py)
+    stream_path = os.path.join(runtime.directory, STREAM_FILE)
+    if args.resume:
+        # Results of the previous run complete this run's matrix
+        stream = ResultStream(stream_path)
+        records = read_checkpoint(checkpoint)
+        for record in records:
+            stream.record(record['device'], record['check'], record['verdict'],
+                          record.get('task'))
+        stream.close()
+        log.info(f"Resuming from {len(records)} checkpointed results in {checkpoint}")
+    aggregator = HealthMatrixAggregator(
+        stream_path, os.path.join(runtime.directory, MATRIX_FILE)).start()
+    try:
+        # Run tests
+        runtime.tasks.run(
+            testscript=connectivity_path,
+            taskid="Connectivity Tests",
+            testbed=testbed,
+            results_stream=stream_path,
+            checkpoint=checkpoint,
+            resume=args.resume,
+            restconf=args.restconf,
+            task_name="Connectivity Tests"
+        )
     
-    runtime.tasks.run(
-        testscript=ospf_path,
-        taskid="OSPF Tests",
-        testbed=testbed
-    )
+        runtime.tasks.run(
+            testscript=ospf_path,
+            taskid="OSPF Tests",
+            testbed=testbed,
+            results_stream=stream_path,
+            checkpoint=checkpoint,
+            resume=args.resume,
+            restconf=args.restconf,
+            task_name="OSPF Tests"
+        )
+    finally:
+        matrix = aggregator.stop()
+        log.info(f"Health matrix of {len(matrix.devices)} devices, "
+                 f"unhealthy: {', '.join(matrix.unhealthy()) or 'none'}")
 
 if __name__ == '__main__':
+    from pyats.easypy import run
     run(main)
\ No newline at end of file
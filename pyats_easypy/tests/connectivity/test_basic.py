@@ -2,9 +2,17 @@
 
 import logging
 import os
+import sys
 from pyats import aetest
-from pyats.log.utils import banner
-from genie.testbed import load
+
+# Shared tooling modules live in other/
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                '..', '..', '..', 'other'))
+
+from check_testcase import CheckTestcase
+from checkpoint import Checkpoint, load_checkpoint, pending_devices
+from health_matrix import ResultStream, report_result
+from rate_limit import CommandGovernor
 
 log = logging.getLogger(__name__)
 
@@ -17,21 +25,50 @@ class common_setup(aetest.CommonSetup):
     """Common Setup Section"""
 
     @aetest.subsection
-    def connect_to_devices(self, testbed):
-        """Connect to all devices from the testbed"""
+    def open_checkpoint(self, testbed, checkpoint=None, resume=False, task_name=None):
+        """Checkpoint completed results, on resume only test what is left (checkpoint.py)"""
+        completed = load_checkpoint(checkpoint, task_name) if checkpoint and resume else {}
+        pending = pending_devices(testbed.devices, Connectivity_Test.checks, completed)
+        self.parent.parameters['checkpoint'] = Checkpoint(checkpoint) if checkpoint else None
+        self.parent.parameters['completed'] = completed
+        self.parent.parameters['pending'] = pending
+        if resume:
+            log.info(f"Resuming: {len(pending)} of {len(testbed.devices)} devices "
+                     f"have checks left")
+
+    @aetest.subsection
+    def connect_to_devices(self, testbed, pending):
+        """Connect to the devices with checks left"""
         try:
-            testbed.connect(log_stdout=True)
-            log.info("Successfully connected to all devices")
+            if pending:
+                testbed.connect(*[testbed.devices[name] for name in pending],
+                                log_stdout=True)
+            log.info(f"Successfully connected to {len(pending)} devices")
         except Exception as e:
             log.error(f"Failed to connect to device: {str(e)}")
             self.failed(f"Failed to connect to device: {str(e)}")
 
     @aetest.subsection
-    def loop_mark(self, testbed):
-        """Mark testcases to run per device"""
-        aetest.loop.mark(Connectivity_Test, device_name=list(testbed.devices.keys()))
+    def configure_rate_limits(self, testbed):
+        """Send every command through the testbed rate limits (rate_limit.py)"""
+        self.parent.parameters['governor'] = CommandGovernor.from_testbed(testbed)
+
+    @aetest.subsection
+    def open_result_stream(self, results_stream=None):
+        """Stream per-device results to the job's health matrix (health_matrix.py)"""
+        self.parent.parameters['result_stream'] = (
+            ResultStream(results_stream) if results_stream else None)
+
+    @aetest.subsection
+    def loop_mark(self, pending):
+        """Mark testcases to run per device with checks left"""
+        if not pending:
+            aetest.skip.affix(section=Connectivity_Test,
+                              reason="Every device completed in a previous run")
+            return
+        aetest.loop.mark(Connectivity_Test, device_name=pending)
 
-class Connectivity_Test(aetest.Testcase):
+class Connectivity_Test(CheckTestcase):
     """Network Connectivity Test Suite
     
     This test suite validates:
@@ -39,62 +76,24 @@ class Connectivity_Test(aetest.Testcase):
     - Peer router connectivity
     - End host reachability"""
 
+    # Registry checks run by the tests below (checks.py)
+    checks = ('ping_test', 'ping_peer_ip', 'ping_pc_hosts')
+
+    @aetest.processors.post(report_result)
     @aetest.test
     def ping_test(self, testbed, device_name):
         """✨ Validates basic connectivity to device management IP"""
-        device = testbed.devices[device_name]
-        try:
-            ip = device.connections.cli.ip
-            log.info(f"Pinging {device_name} at {ip}")
-            result = device.execute(f"ping {ip}")
-            if "Success rate is 0 percent" in result:
-                self.failed(f"Ping to {device_name} failed")
-        except Exception as e:
-            self.failed(f"Error executing ping on {device_name}: {str(e)}")
+        self.run_check(testbed.devices[device_name], 'ping_test')
 
+    @aetest.processors.post(report_result)
     @aetest.test
     def ping_peer_ip(self, testbed, device_name):
-        device = testbed.devices[device_name]
-        try:
-            # Define peer IP mapping
-            peer_ips = {
-                'R1': '172.16.0.2',  # R2's IP
-                'R2': '172.16.0.1'   # R1's IP
-            }
-            
-            # Get peer IP for current device
-            if device_name in peer_ips:
-                peer_ip = peer_ips[device_name]
-                log.info(f"Device {device_name} pinging peer IP {peer_ip}")
-                result = device.execute(f"ping {peer_ip}")
-                if "Success rate is 0 percent" in result:
-                    self.failed(f"Ping from {device_name} to {peer_ip} failed")
-                else:
-                    log.info(f"Ping from {device_name} to {peer_ip} successful")
-        except Exception as e:
-            self.failed(f"Error executing peer ping on {device_name}: {str(e)}")
+        self.run_check(testbed.devices[device_name], 'ping_peer_ip')
 
+    @aetest.processors.post(report_result)
     @aetest.test
     def ping_pc_hosts(self, testbed, device_name):
-        device = testbed.devices[device_name]
-        try:
-            # Define PC host IPs
-            pc_ips = {
-                'PC1': '172.16.1.1',
-                'PC2': '172.16.2.1'
-            }
-            
-            # Try to ping each PC from the current device
-            for pc_name, pc_ip in pc_ips.items():
-                log.info(f"Device {device_name} pinging {pc_name} at {pc_ip}")
-                result = device.execute(f"ping {pc_ip}")
-                if "Success rate is 0 percent" in result:
-                    self.failed(f"Ping from {device_name} to {pc_name}({pc_ip}) failed")
-                else:
-                    log.info(f"Ping from {device_name} to {pc_name}({pc_ip}) successful")
-                    
-        except Exception as e:
-            self.failed(f"Error executing PC ping test on {device_name}: {str(e)}")
+        self.run_check(testbed.devices[device_name], 'ping_pc_hosts')
 
 class CommonCleanup(aetest.CommonCleanup):
     """Cleanup Section"""
@@ -106,10 +105,19 @@ class CommonCleanup(aetest.CommonCleanup):
         except Exception as e:
             log.error(f"Error during cleanup: {str(e)}")
 
+    @aetest.subsection
+    def close_result_stream(self, result_stream=None):
+        if result_stream:
+            result_stream.close()
+
+    @aetest.subsection
+    def close_checkpoint(self, checkpoint=None):
+        if checkpoint:
+            checkpoint.close()
+
 
 if __name__ == '__main__':
-    import sys
-    from pyats.topology import loader
+    from genie.testbed import load
     
     # Set log level for standalone execution
     log.setLevel(logging.INFO)
@@ -1,8 +1,15 @@
 #!/usr/bin/env python
 
+import logging
 import os
-from pyats.easypy import run
-from genie.testbed import load
+import sys
+
+# Shared tooling modules live in other/
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'other'))
+
+from health_matrix import MATRIX_FILE, STREAM_FILE, HealthMatrixAggregator
+
+log = logging.getLogger(__name__)
 
 def main(runtime):
     """
@@ -12,26 +19,42 @@ def main(runtime):
     # Get absolute path for testbed file
     testbed_path = os.path.join(os.path.dirname(__file__), 'testbed.yaml')
     
-    # Load the testbed file
+    # Load the testbed file, genie is only imported once the job actually runs
+    from genie.testbed import load
     testbed = load(testbed_path)
     
     # Get script paths
     script1_path = os.path.join(os.path.dirname(__file__), 'auto_script1.py')
     script2_path = os.path.join(os.path.dirname(__file__), 'auto_script2.py')
     
-    # Run connectivity tests
-    runtime.tasks.run(
-        testscript=script1_path,
-        taskid="Connectivity Tests",
-        testbed=testbed
-    )
+    # Stream every device x check result into one matrix, rewritten while
+    # the tasks run so the job can be watched live (health_matrix.py)
+    stream_path = os.path.join(runtime.directory, STREAM_FILE)
+    aggregator = HealthMatrixAggregator(
+        stream_path, os.path.join(runtime.directory, MATRIX_FILE)).start()
+    try:
+        # Run connectivity tests
+        runtime.tasks.run(
+            testscript=script1_path,
+            taskid="Connectivity Tests",
+            testbed=testbed,
+            results_stream=stream_path,
+            task_name="Connectivity Tests"
+        )
     
-    # Run OSPF tests
-    runtime.tasks.run(
-        testscript=script2_path,
-        taskid="OSPF Tests",
-        testbed=testbed
-    )
+        # Run OSPF tests
+        runtime.tasks.run(
+            testscript=script2_path,
+            taskid="OSPF Tests",
+            testbed=testbed,
+            results_stream=stream_path,
+            task_name="OSPF Tests"
+        )
+    finally:
+        matrix = aggregator.stop()
+        log.info(f"Health matrix of {len(matrix.devices)} devices, "
+                 f"unhealthy: {', '.join(matrix.unhealthy()) or 'none'}")
 
 if __name__ == '__main__':
+    from pyats.easypy import run
     run(main)
\ No newline at end of file
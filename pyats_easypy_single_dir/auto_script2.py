@@ -2,9 +2,15 @@
 
 import logging
 import os
+import sys
 from pyats import aetest
-from pyats.log.utils import banner
-from genie.testbed import load
+
+# Shared tooling modules live in other/
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'other'))
+
+from check_testcase import CheckTestcase
+from health_matrix import ResultStream, report_result
+from rate_limit import CommandGovernor
 
 log = logging.getLogger(__name__)
 
@@ -25,12 +31,23 @@ class common_setup(aetest.CommonSetup):
             log.error(f"Failed to connect to device: {str(e)}")
             self.failed(f"Failed to connect to device: {str(e)}")
 
+    @aetest.subsection
+    def configure_rate_limits(self, testbed):
+        """Send every command through the testbed rate limits (rate_limit.py)"""
+        self.parent.parameters['governor'] = CommandGovernor.from_testbed(testbed)
+
+    @aetest.subsection
+    def open_result_stream(self, results_stream=None):
+        """Stream per-device results to the job's health matrix (health_matrix.py)"""
+        self.parent.parameters['result_stream'] = (
+            ResultStream(results_stream) if results_stream else None)
+
     @aetest.subsection
     def loop_mark(self, testbed):
         """Mark testcases to run per device"""
         aetest.loop.mark(OSPF_Test, device_name=list(testbed.devices.keys()))
 
-class OSPF_Test(aetest.Testcase):
+class OSPF_Test(CheckTestcase):
     """OSPF Routing Test Suite
     
     This test suite validates OSPF routing:
@@ -38,60 +55,20 @@ class OSPF_Test(aetest.Testcase):
     - OSPF route verification
     - Expected network reachability"""
 
-    def _execute_with_retry(self, device, command, max_retries=3):
-        """Execute command with retry logic on device failure"""
-        for attempt in range(max_retries):
-            try:
-                return device.execute(command)
-            except Exception as e:
-                if attempt == max_retries - 1:
-                    raise
-                log.warning(f"Retry {attempt + 1} after error: {str(e)}")
+    # Registry checks run by the tests below (checks.py)
+    checks = ('verify_ospf_neighbors', 'verify_ospf_routes')
 
+    @aetest.processors.post(report_result)
     @aetest.test
     def verify_ospf_neighbors(self, testbed, device_name):
         """🌐 Validates OSPF neighbor relationships"""
-        device = testbed.devices[device_name]
-        try:
-            log.info(f"Checking OSPF neighbors on {device_name}")
-            result = self._execute_with_retry(device, 'show ip ospf neighbor')
-            
-            if 'FULL' not in result:
-                self.failed(f"No FULL OSPF neighbors found on {device_name}")
-            else:
-                log.info(f"OSPF neighbors verified on {device_name}")
-                
-        except Exception as e:
-            self.failed(f"Error checking OSPF on {device_name}: {str(e)}")
+        self.run_check(testbed.devices[device_name], 'verify_ospf_neighbors')
 
+    @aetest.processors.post(report_result)
     @aetest.test
     def verify_ospf_routes(self, testbed, device_name):
         """🌐 Validates OSPF routes are properly learned"""
-        device = testbed.devices[device_name]
-        try:
-            log.info(f"Checking OSPF routes on {device_name}")
-            result = self._execute_with_retry(device, 'show ip route ospf')
-            
-            expected_networks = {
-                'R1': ['172.16.2.0'],  # R2's subnet
-                'R2': ['172.16.1.0']   # R1's subnet
-            }
-            
-            # Check for device-specific expected networks
-            if device_name in expected_networks:
-                for network in expected_networks[device_name]:
-                    if network not in result:
-                        self.failed(f"Network {network} not found in OSPF routes on {device_name}")
-                    else:
-                        log.info(f"Network {network} found in OSPF routes on {device_name}")
-                        
-                log.info(f"OSPF routes verified on {device_name}")
-            else:
-                log.info(f"No specific routes to verify for {device_name}")
-            
-        except Exception as e:
-            self.failed(f"Error checking OSPF routes on {device_name}: {str(e)}")
-            
+        self.run_check(testbed.devices[device_name], 'verify_ospf_routes')
 
 class CommonCleanup(aetest.CommonCleanup):
     """Cleanup Section"""
@@ -103,8 +80,15 @@ class CommonCleanup(aetest.CommonCleanup):
         except Exception as e:
             log.error(f"Error during cleanup: {str(e)}")
 
+    @aetest.subsection
+    def close_result_stream(self, result_stream=None):
+        if result_stream:
+            result_stream.close()
+
 
 if __name__ == '__main__':
+    from genie.testbed import load
+    
     # Set log level for standalone execution
     log.setLevel(logging.INFO)
     
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Shared tooling modules live in other/
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'other'))
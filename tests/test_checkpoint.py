@@ -0,0 +1,37 @@
+from types import SimpleNamespace
+
+from checkpoint import Checkpoint, load_checkpoint, pending_devices, read_checkpoint
+from health_matrix import report_result
+
+
+def _checkpoint(path, records):
+    checkpoint = Checkpoint(path)
+    for device_name, check, verdict in records:
+        checkpoint.record(device_name, check, verdict, 'Connectivity Tests')
+    checkpoint.close()
+
+
+def test_only_completed_verdicts_are_skipped_on_resume(tmp_path):
+    path = str(tmp_path / 'run.jsonl')
+    _checkpoint(path, [('R1', 'ping_test', 'passed'), ('R1', 'ping_peer_ip', 'failed'),
+                       ('R2', 'ping_test', 'errored'), ('R2', 'ping_peer_ip', 'aborted'),
+                       ('R3', 'ping_test', 'blocked'), ('R3', 'ping_peer_ip', 'skipped')])
+    completed = load_checkpoint(path, 'Connectivity Tests')
+    assert completed == {'R1': {'ping_test': 'passed', 'ping_peer_ip': 'failed'},
+                         'R3': {'ping_peer_ip': 'skipped'}}
+    assert pending_devices(['R1', 'R2', 'R3'], ('ping_test', 'ping_peer_ip'),
+                           completed) == ['R2', 'R3']
+    assert load_checkpoint(path, 'OSPF Tests') == {}
+
+
+def test_replayed_verdicts_are_not_checkpointed_again(tmp_path):
+    path = str(tmp_path / 'run.jsonl')
+    _checkpoint(path, [('R1', 'ping_test', 'passed')])
+    checkpoint = Checkpoint(path)
+    parameters = {'device_name': 'R1', 'checkpoint': checkpoint,
+                  'completed': load_checkpoint(path), 'task_name': 'Connectivity Tests'}
+    report_result(SimpleNamespace(parameters=parameters, uid='ping_test', result='passed'))
+    report_result(SimpleNamespace(parameters=parameters, uid='ping_peer_ip', result='failed'))
+    checkpoint.close()
+    assert [(record['check'], record['verdict']) for record in read_checkpoint(path)] == [
+        ('ping_test', 'passed'), ('ping_peer_ip', 'failed')]
@@ -0,0 +1,13 @@
+import time
+
+from connection_pipeline import ConnectionPipeline, _SimulatedDevice
+
+
+def test_close_while_feeding():
+    devices = [_SimulatedDevice(f"R{index}", 0.05) for index in range(20)]
+    pipeline = ConnectionPipeline(devices, max_open=2, workers=2).start()
+    time.sleep(0.1)
+    pipeline.close()
+    assert not pipeline._feeder.is_alive()
+    assert pipeline.open == 0
+    assert not any(device.connected for device in devices)
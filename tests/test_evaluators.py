@@ -0,0 +1,26 @@
+import pytest
+
+from evaluators import evaluate_cpu, parse_cpu_usage
+from results_export import _metrics
+from state_baseline import snapshot
+
+CPU_OUTPUT = "CPU utilization for five seconds: 5%/0%; one minute: 6%; five minutes: 6%\n"
+INVALID_OUTPUT = "                  ^\n% Invalid input detected at '^' marker.\n"
+
+
+def test_parse_cpu_usage():
+    assert parse_cpu_usage(CPU_OUTPUT) == 5
+    assert evaluate_cpu('R1', CPU_OUTPUT, 80) == (True, "CPU and memory usage normal on R1")
+
+
+@pytest.mark.parametrize('output', [INVALID_OUTPUT, '', 'CPU utilization unavailable'])
+def test_parse_cpu_usage_unparsable(output):
+    with pytest.raises(ValueError):
+        parse_cpu_usage(output)
+
+
+def test_unparsable_cpu_skipped_by_export_and_baseline():
+    outputs = [('show processes cpu | include CPU', INVALID_OUTPUT)]
+    assert _metrics('verify_cpu_memory', outputs)['cpu_percent'] is None
+    state = snapshot({'R1': {'verify_cpu_memory': {'outputs': outputs, 'verdict': None}}})
+    assert 'cpu' not in state['R1']['state']
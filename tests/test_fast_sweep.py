@@ -0,0 +1,52 @@
+import time
+
+import fast_sweep
+from fast_sweep import process_start, sweep
+from rate_limit import CommandGovernor
+
+OUTPUTS = {
+    'show ip interface brief': "GigabitEthernet0/0  10.0.0.1  YES NVRAM  up  up\n",
+    'show ip ospf neighbor': "2.2.2.2  1  FULL/DR  00:00:36  172.16.0.2  GigabitEthernet0/0\n",
+    'show processes cpu | include CPU': "CPU utilization for five seconds: 5%/0%;",
+    'show memory statistics | include Processor': "Processor  1000  500  500",
+}
+
+
+class _Device(object):
+    os = 'ios'
+    platform = None
+
+    def __init__(self, name):
+        self.name = name
+        self.connected = False
+
+    def is_connected(self):
+        return self.connected
+
+    def connect(self, **kwargs):
+        self.connected = True
+
+    def disconnect(self):
+        self.connected = False
+
+    def execute(self, command):
+        return OUTPUTS[command]
+
+
+class _Testbed(object):
+    def __init__(self, *names):
+        self.devices = {name: _Device(name) for name in names}
+
+
+def test_sweep_times_from_its_own_start():
+    # Long after import, the startup is measured from the sweep itself
+    time.sleep(0.2)
+    result = sweep(_Testbed('R1', 'R2'), governor=CommandGovernor({}))
+    assert result['ok']
+    assert result['startup_to_first_command'] < 0.2
+    assert result['duration'] < 0.2
+
+
+def test_process_start_precedes_the_imports():
+    # The interpreter started, and pytest loaded, before fast_sweep was imported
+    assert process_start() < fast_sweep._IMPORTED < time.perf_counter()
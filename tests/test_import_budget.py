@@ -0,0 +1,32 @@
+import os
+
+import pytest
+
+from import_budget import SCRIPTS, check, eager_imports, measure, needs_pyats
+
+# Slow CI runners can scale every budget, like import_budget.py --budget-scale
+BUDGET_SCALE = float(os.environ.get('IMPORT_BUDGET_SCALE', 1))
+
+
+@pytest.mark.parametrize('script', sorted(SCRIPTS))
+def test_no_eager_imports(script):
+    if needs_pyats(script):
+        pytest.importorskip('pyats')
+    assert eager_imports(measure(script)[1]) == []
+
+
+@pytest.mark.timing
+@pytest.mark.parametrize('script', sorted(SCRIPTS))
+def test_import_budget(script):
+    if needs_pyats(script):
+        pytest.importorskip('pyats')
+    # Best of three imports, one slow interpreter start is noise
+    assert check({script: SCRIPTS[script]}, BUDGET_SCALE, rounds=3) == []
+
+
+def test_import_failure_is_a_violation(tmp_path, monkeypatch):
+    (tmp_path / 'broken.py').write_text('import no_such_module_here\n')
+    monkeypatch.setattr('import_budget.ROOT', str(tmp_path))
+    [violation] = check({'broken.py': 100})
+    assert 'broken.py fails to import' in violation
+    assert 'no_such_module_here' in violation
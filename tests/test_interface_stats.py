@@ -0,0 +1,84 @@
+from interface_stats import anomalies, delta, parse_interfaces
+
+
+def _block(name, packets, errors=0, crc=0, input_drops=0, output_drops=0, rate=8000):
+    return (f"{name} is up, line protocol is up \n"
+            f"  Hardware is iGbE, address is 5254.0000.0001\n"
+            f"  Input queue: 0/75/{input_drops}/0 (size/max/drops/flushes); "
+            f"Total output drops: {output_drops}\n"
+            f"  5 minute input rate {rate} bits/sec, 10 packets/sec\n"
+            f"  5 minute output rate {rate // 2} bits/sec, 5 packets/sec\n"
+            f"     {packets} packets input, {packets * 100} bytes, 0 no buffer\n"
+            f"     {errors} input errors, {crc} CRC, 0 frame, 0 overrun, 0 ignored\n"
+            f"     {packets} packets output, {packets * 100} bytes, 0 underruns\n"
+            f"     0 output errors, 0 collisions, 1 interface resets\n")
+
+
+def test_parse_interfaces():
+    sample = parse_interfaces(
+        _block('GigabitEthernet0/0', 1000, errors=3, crc=2, input_drops=4, output_drops=5)
+        + "Loopback0 is administratively down, line protocol is down \n"
+          "     0 packets input, 0 bytes, 0 no buffer\n", timestamp=10)
+    assert sample.names == ['GigabitEthernet0/0', 'Loopback0']
+    assert sample.timestamp == 10
+    assert sample.row('GigabitEthernet0/0') == {
+        'input_rate': 8000, 'input_pps': 10, 'output_rate': 4000, 'output_pps': 5,
+        'input_packets': 1000, 'output_packets': 1000, 'input_errors': 3, 'crc': 2,
+        'output_errors': 0, 'input_drops': 4, 'output_drops': 5}
+    assert set(sample.row('Loopback0').values()) == {0}
+
+
+def test_delta_between_samples():
+    first = parse_interfaces(_block('Gi0/0', 1000, errors=1) + _block('Gi0/1', 500), timestamp=0)
+    # Gi0/2 appeared, Gi0/1 is gone
+    second = parse_interfaces(_block('Gi0/2', 70) + _block('Gi0/0', 1500, errors=4, rate=9000),
+                              timestamp=300)
+    change = delta(first, second)
+    assert change.names == ['Gi0/2', 'Gi0/0']
+    assert change.interval == 300
+    row = change.row('Gi0/0')
+    assert (row['input_packets'], row['input_errors'], row['input_rate']) == (500, 3, 9000)
+    # New interfaces count from zero
+    assert change.row('Gi0/2')['input_packets'] == 70
+    assert change.totals()['input_packets'] == 570
+
+
+def test_cleared_or_wrapped_counters_count_from_zero():
+    first = parse_interfaces(_block('Gi0/0', 5000, errors=40) + _block('Gi0/1', 100),
+                             timestamp=0)
+    second = parse_interfaces(_block('Gi0/0', 200, errors=2) + _block('Gi0/1', 300),
+                              timestamp=60)
+    change = delta(first, second)
+    assert change.row('Gi0/0')['input_packets'] == 200
+    assert change.row('Gi0/0')['input_errors'] == 2
+    # Other interfaces keep their difference
+    assert change.row('Gi0/1')['input_packets'] == 200
+
+
+def test_delta_without_previous_sample_is_the_totals():
+    sample = parse_interfaces(_block('Gi0/0', 1000, errors=1), timestamp=5)
+    change = delta(None, sample)
+    assert change.interval == 0
+    assert change.row('Gi0/0')['input_packets'] == 1000
+
+
+def test_anomaly_thresholds():
+    first = parse_interfaces(_block('Gi0/0', 0) + _block('Gi0/1', 0) + _block('Gi0/2', 0)
+                             + _block('Gi0/3', 0), timestamp=0)
+    second = parse_interfaces(
+        # 3 errors in 2000 packets is over the 0.1% default
+        _block('Gi0/0', 1000, errors=3, crc=3)
+        # 1 error in 2000 packets is under it
+        + _block('Gi0/1', 1000, errors=1)
+        # Too few packets to judge
+        + _block('Gi0/2', 100, errors=50)
+        # 30 drops in 2000 packets is over the 1% default
+        + _block('Gi0/3', 1000, input_drops=10, output_drops=20), timestamp=60)
+    change = delta(first, second)
+    assert anomalies(change) == [
+        ('Gi0/0', '3 errors in 2000 packets (0.15%, 3 CRC)'),
+        ('Gi0/3', '30 drops in 2000 packets (1.50%)')]
+    assert [name for name, _ in anomalies(change, error_rate=0.0001)] == ['Gi0/0', 'Gi0/1',
+                                                                          'Gi0/3']
+    assert [name for name, _ in anomalies(change, min_packets=100)] == ['Gi0/0', 'Gi0/2',
+                                                                        'Gi0/3']
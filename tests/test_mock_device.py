@@ -0,0 +1,92 @@
+from mock_device import INVALID_INPUT, MockCLI, MockFleet, MockProfile
+
+
+def _cli(**profile):
+    fleet = MockFleet(3, MockProfile(jitter=0, **profile))
+    return MockCLI(fleet.devices[0])
+
+
+def _text(cli, line):
+    output, _ = cli.handle(line)
+    return output.decode().replace('\r\n', '\n')
+
+
+def test_keywords_can_be_abbreviated():
+    cli = _cli()
+    output, canonical = cli.render('sh ip int br')
+    assert canonical == 'show ip interface brief'
+    assert output.splitlines()[0].startswith('Interface')
+    assert 'Loopback0' in output
+    # The longest command wins over its prefix
+    assert cli.render('sh ip int')[1] == 'show ip interface'
+    assert cli.render('sh ip ospf nei')[1] == 'show ip ospf neighbor'
+
+
+def test_unknown_command_is_invalid_input():
+    cli = _cli()
+    assert cli.render('show bogus') == (INVALID_INPUT, 'show bogus')
+    assert _text(cli, 'sh bogus') == INVALID_INPUT + 'R1#'
+
+
+def test_include_filter():
+    cli = _cli()
+    output, canonical = cli.render('show ip interface | include Internet address')
+    assert canonical == 'show ip interface'
+    lines = output.splitlines()
+    assert len(lines) == 4
+    assert all(line.startswith('  Internet address is ') for line in lines)
+    # Modifiers can be abbreviated too, an unknown one is invalid input
+    assert cli.render('show ip interface | i Internet')[0] == output
+    assert cli.render('show ip interface | frobnicate x')[0] == INVALID_INPUT
+
+
+def test_section_filter():
+    cli = _cli()
+    output, _ = cli.render('show running-config | section router ospf')
+    assert output.splitlines() == [
+        'router ospf 1', ' router-id 10.255.0.1',
+        ' network 10.0.0.0 0.255.255.255 area 0',
+        ' network 172.16.0.0 0.15.255.255 area 0']
+
+
+def test_responses_override_the_renderers():
+    cli = _cli(responses={'show version': 'Custom {hostname} {index}\n'})
+    assert cli.render('sh ver') == ('Custom R1 1\n', 'show version')
+
+
+def test_enable_and_disable():
+    cli = _cli()
+    assert cli.prompt == 'R1#'
+    assert _text(cli, 'disable') == 'R1>'
+    assert cli.handle('en') == (b'Password: ', 0.0)
+    assert _text(cli, 'cisco') == 'R1#'
+    assert cli.mode == 'exec'
+
+
+def test_configuration_modes():
+    cli = _cli()
+    assert _text(cli, 'conf t').endswith('End with CNTL/Z.\nR1(config)#')
+    assert _text(cli, 'int Gi0/0') == 'R1(config-if)#'
+    # do runs exec commands without leaving configuration mode
+    assert 'UTC' in _text(cli, 'do sh clock')
+    assert cli.mode == 'config-if'
+    assert _text(cli, 'exit') == 'R1(config)#'
+    assert _text(cli, 'router ospf 1') == 'R1(config-router)#'
+    assert _text(cli, 'end') == 'R1#'
+    # Configuration mode is only entered from privileged exec
+    _text(cli, 'disable')
+    assert 'Invalid input' in _text(cli, 'conf t')
+    assert cli.mode == 'user'
+
+
+def test_exit_closes_the_session():
+    cli = _cli()
+    assert cli.handle('exit') == (b'', 0.0)
+    assert cli.closed
+
+
+def test_lost_pings_wait_for_the_timeout():
+    cli = _cli(unreachable=['192.0.2.1'], latency={'ping': 0.0})
+    output, latency = cli.handle('ping 192.0.2.1 repeat 3 timeout 1')
+    assert b'...' in output
+    assert latency == 3
@@ -0,0 +1,32 @@
+import threading
+import time
+
+import monitor
+from monitor import Monitor
+from rate_limit import CommandGovernor
+
+
+class _Testbed(object):
+    def __init__(self, names):
+        self.devices = {name: object() for name in names}
+
+
+def test_failed_visit_is_rescheduled(monkeypatch):
+    visits = []
+
+    def run_checks(device, checks, execute, settings, outputs=None):
+        visits.append(time.monotonic())
+        raise RuntimeError('parser crashed')
+
+    monkeypatch.setattr(monitor, 'run_checks', run_checks)
+    scheduler = Monitor(_Testbed(['R1']), intervals={check: 0.1 for check in monitor.DEFAULT_INTERVALS},
+                        coalesce=0, governor=CommandGovernor({}))
+    thread = threading.Thread(target=scheduler.run)
+    thread.start()
+    time.sleep(0.5)
+    scheduler._stop.set()
+    scheduler._wakeup.set()
+    thread.join()
+    scheduler._pool.shutdown(wait=True)
+    assert len(visits) >= 3
+    assert not scheduler._in_flight
@@ -0,0 +1,48 @@
+from capture import OutputCapture, load_capture
+from checks import CPU_COMMAND
+from offline_eval import replay, summarize
+
+CPU_OUTPUT = "CPU utilization for five seconds: 70%/0%; one minute: 5%; five minutes: 3%"
+PING_OUTPUT = "Success rate is 100 percent (5/5), round-trip min/avg/max = 1/2/4 ms"
+
+
+def _capture(path, cpu_verdict):
+    capture = OutputCapture(path)
+    capture.output('R1', 'verify_cpu_memory', CPU_COMMAND, CPU_OUTPUT)
+    capture.verdict('R1', 'verify_cpu_memory', cpu_verdict, 'CPU')
+    capture.output('R1', 'ping_test', 'ping 10.0.0.1', PING_OUTPUT)
+    capture.verdict('R1', 'ping_test', 'passed', 'ping')
+    capture.verdict('R1', 'verify_no_acls', 'failed', 'timeout', replayable=False)
+    capture.close()
+
+
+def test_capture_holds_the_last_run(tmp_path):
+    path = str(tmp_path / 'run.jsonl')
+    _capture(path, 'failed')
+    _capture(path, 'passed')
+    tests = load_capture(path)['R1']
+    assert tests['verify_cpu_memory']['outputs'] == [(CPU_COMMAND, CPU_OUTPUT)]
+    assert tests['verify_cpu_memory']['verdict']['verdict'] == 'passed'
+
+
+def test_replay_through_checks(tmp_path):
+    path = str(tmp_path / 'run.jsonl')
+    _capture(path, 'passed')
+    results = {result['test']: result for result in replay(load_capture(path), cpu_threshold=60)}
+    assert results['verify_cpu_memory']['verdict'] == 'failed'
+    assert results['verify_cpu_memory']['changed']
+    assert results['ping_test']['verdict'] == 'passed'
+    assert not results['verify_no_acls']['replayed']
+    assert summarize(results.values())['changed'] == 1
+
+
+def test_replay_pings_the_captured_peers(tmp_path):
+    path = str(tmp_path / 'run.jsonl')
+    capture = OutputCapture(path)
+    # Peers taken from the OSPF graph during the run, not the static map
+    capture.output('R1', 'ping_peer_ip', 'ping 10.0.12.2', PING_OUTPUT)
+    capture.verdict('R1', 'ping_peer_ip', 'passed', 'peers')
+    capture.close()
+    [result] = replay(load_capture(path))
+    assert result['verdict'] == 'passed'
+    assert not result['changed']
@@ -0,0 +1,85 @@
+from types import SimpleNamespace
+
+from checks import CHECKS, DEFAULT_SETTINGS
+from ospf_topology import OSPFTopology, parse_ospf_neighbors, parse_router_id
+
+IOS_OUTPUT = """
+Neighbor ID     Pri   State           Dead Time   Address         Interface
+2.2.2.2           1   FULL/DR         00:00:36    172.16.0.2      GigabitEthernet0/0
+3.3.3.3           0   FULL/  -        00:00:33    10.0.0.3        Serial0/0
+"""
+
+NXOS_OUTPUT = """ OSPF Process ID 1 VRF default
+ Total number of neighbors: 2
+ Neighbor ID     Pri State            Up Time  Address         Interface
+ 2.2.2.2           1 FULL/DR          1d02h    172.16.0.2      Eth1/1
+ 3.3.3.3           1 INIT/DROTHER     00:00:04 10.0.0.3        Eth1/2
+"""
+
+
+def test_parse_ios_neighbors():
+    assert parse_ospf_neighbors(IOS_OUTPUT) == [
+        ('2.2.2.2', 'FULL', '172.16.0.2', 'GigabitEthernet0/0'),
+        ('3.3.3.3', 'FULL', '10.0.0.3', 'Serial0/0')]
+
+
+def test_parse_indented_nxos_neighbors():
+    assert parse_ospf_neighbors(NXOS_OUTPUT) == [
+        ('2.2.2.2', 'FULL', '172.16.0.2', 'Eth1/1'),
+        ('3.3.3.3', 'INIT', '10.0.0.3', 'Eth1/2')]
+
+
+def test_parse_router_id():
+    assert parse_router_id('Routing Process "ospf 1" with ID 1.1.1.1\n') == '1.1.1.1'
+    assert parse_router_id('') is None
+
+
+def _table(*rows):
+    """IOS neighbor table of (neighbor ID, state, address) rows"""
+    return "Neighbor ID     Pri   State           Dead Time   Address         Interface\n" + "".join(
+        f"{neighbor_id:<15}   1   {state + '/DR':<15} 00:00:36    {address:<15} Gi0/{index}\n"
+        for index, (neighbor_id, state, address) in enumerate(rows))
+
+
+def _fleet():
+    topology = OSPFTopology()
+    topology.add_device('R1', '1.1.1.1', _table(('2.2.2.2', 'FULL', '10.0.12.2'),
+                                                ('3.3.3.3', 'FULL', '10.0.13.3')))
+    topology.add_device('R2', '2.2.2.2', _table(('1.1.1.1', 'FULL', '10.0.12.1')))
+    topology.add_device('R3', '3.3.3.3', _table(('1.1.1.1', 'INIT', '10.0.13.1')))
+    topology.add_device('R4', '4.4.4.4', _table())
+    return topology
+
+
+def test_graph_checks_on_the_arrays():
+    topology = _fleet()
+    report = topology.report([('R1', 'R2'), ('R1', 'R3'), ('R2', 'R4')])
+    assert report['asymmetric'] == [('R1', '3.3.3.3', 'not in the expected state on the neighbor')]
+    assert sorted(report['isolated']) == ['R3', 'R4']
+    assert report['missing'] == [('R1', 'R3'), ('R2', 'R4')]
+    assert report['partitions'] == [['R1', 'R2'], ['R3'], ['R4']]
+    # Rows are sorted by neighbor node
+    for node in topology.devices:
+        row = topology.targets[topology.offsets[node]:topology.offsets[node + 1]]
+        assert list(row) == sorted(row)
+
+
+def test_device_without_router_id_is_left_out():
+    topology = _fleet()
+    topology.add_device('R5', None, _table(('1.1.1.1', 'FULL', '10.0.15.1')))
+    assert 'R5' not in topology
+    assert topology.asymmetric() == [('R1', '3.3.3.3', 'not in the expected state on the neighbor')]
+
+
+def test_ping_peer_ip_targets_come_from_the_graph():
+    topology = _fleet()
+    assert topology.peer_addresses('R1') == ['10.0.12.2', '10.0.13.3']
+    assert topology.peer_addresses('R3') == []
+
+    device = SimpleNamespace(name='R1')
+    settings = dict(DEFAULT_SETTINGS, ospf_topology=topology)
+    assert CHECKS['ping_peer_ip'].commands(device, settings) == ['ping 10.0.12.2',
+                                                                 'ping 10.0.13.3']
+    # Outside the graph, the static map
+    assert CHECKS['ping_peer_ip'].commands(SimpleNamespace(name='R2'), DEFAULT_SETTINGS) == [
+        'ping 172.16.0.1']
@@ -0,0 +1,48 @@
+"""Parse cost budget of the check parsers on large command outputs
+
+Every parser must parse faster than its budget, in milliseconds per MB of
+output, so a regression in parse cost fails like an import-time one
+(test_import_budget.py). PARSE_BUDGET_SCALE multiplies every budget, for
+slow CI runners.
+"""
+
+import os
+
+import pytest
+
+pytest.importorskip('pytest_benchmark')
+
+import synthetic_outputs
+from evaluators import evaluate_interface_status, find_acls, parse_cpu_usage, parse_ping
+from interface_stats import parse_interfaces
+from ospf_topology import parse_ospf_neighbors
+from route_table import parse_routes
+
+BUDGET_SCALE = float(os.environ.get('PARSE_BUDGET_SCALE', 1))
+
+CPU_OUTPUT = "CPU utilization for five seconds: 5%/0%; one minute: 6%; five minutes: 6%\n"
+
+# Benchmark -> (parser, synthetic output, budget in milliseconds per MB of output)
+BENCHMARKS = {
+    'interface_status': (lambda output: evaluate_interface_status('bench', output),
+                         lambda: synthetic_outputs.interface_brief(5000), 5),
+    'no_acls': (find_acls, lambda: synthetic_outputs.acl_bindings(5000), 30),
+    'ospf_neighbors': (parse_ospf_neighbors, lambda: synthetic_outputs.ospf_neighbors(2000), 50),
+    'ospf_routes': (parse_routes, lambda: synthetic_outputs.routes(20000)[0], 350),
+    'interface_errors': (parse_interfaces,
+                         lambda: synthetic_outputs.interfaces(5000, base=1000), 100),
+    'cpu': (parse_cpu_usage, lambda: CPU_OUTPUT, 100),
+    'ping': (parse_ping, lambda: synthetic_outputs.pings(1000), 50),
+}
+
+
+@pytest.mark.parametrize('name', sorted(BENCHMARKS))
+def test_parse_cost(benchmark, name):
+    parser, synthetic, budget = BENCHMARKS[name]
+    output = synthetic()
+    benchmark(parser, output)
+    if benchmark.disabled:
+        return
+    per_mb = benchmark.stats.stats.min * 1000 / (len(output.encode()) / 1e6)
+    assert per_mb <= budget * BUDGET_SCALE, (
+        f"{name} parses at {per_mb:.1f}ms/MB, over its {budget * BUDGET_SCALE:.0f}ms/MB budget")
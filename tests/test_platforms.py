@@ -0,0 +1,108 @@
+from types import SimpleNamespace
+
+from checks import CPU_COMMAND, MEMORY_COMMAND, plan_fleet
+from evaluators import find_acls, parse_cpu_usage, parse_ping
+from platforms import DIALECTS, dialect_for
+from reachability import PingPolicy
+from route_table import parse_routes
+
+IOS_PING = PingPolicy(repeat=5, timeout=1, size=100).command('10.0.0.2')
+
+NXOS_RESOURCES = """Load average:   1 minute: 0.31   5 minutes: 0.29   15 minutes: 0.28
+Processes   :   571 total, 1 running
+CPU states  :   3.10% user,   2.40% kernel,   94.50% idle
+Memory usage:   8155452K total,   4613484K used,   3541968K free
+"""
+
+NXOS_PING = """PING 10.0.0.2 (10.0.0.2): 100 data bytes
+108 bytes from 10.0.0.2: icmp_seq=0 ttl=254 time=1.801 ms
+
+--- 10.0.0.2 ping statistics ---
+5 packets transmitted, 4 packets received, 20.00% packet loss
+round-trip min/avg/max = 1.2/2.6/4.4 ms
+"""
+
+NXOS_ROUTES = """IP Route Table for VRF "default"
+10.1.1.0/24, ubest/mbest: 1/0
+    *via 10.0.0.2, Eth1/1, [110/41], 1d02h, ospf-1, intra
+10.2.0.0/16, ubest/mbest: 1/0
+    *via 10.0.0.3, Eth1/2, [110/20], 1d02h, ospf-1, type-2
+"""
+
+NXOS_ACCESS_GROUPS = """interface Ethernet1/1
+  ip access-group BLOCK-TELNET in
+interface Ethernet1/2
+"""
+
+
+def _device(name, os_name, platform=None):
+    return SimpleNamespace(name=name, os=os_name, platform=platform)
+
+
+def test_dialect_from_os_and_platform():
+    assert dialect_for(_device('R1', 'IOSXE', 'cat9k')).name == 'iosxe'
+    assert dialect_for(_device('R2', 'iosxr')).name == 'iosxr'
+    assert dialect_for(_device('R3', 'junos')).name == 'ios'
+    assert dialect_for(_device('R4', None)).name == 'ios'
+
+
+def test_ios_commands_are_sent_unchanged():
+    assert DIALECTS['ios'].command(IOS_PING) == (IOS_PING, None)
+    assert DIALECTS['iosxe'].command('show ip route ospf') == ('show ip route ospf', None)
+
+
+def test_xr_pings_take_count():
+    assert IOS_PING == 'ping 10.0.0.2 repeat 5 timeout 1 size 100'
+    assert DIALECTS['iosxr'].command(IOS_PING) == ('ping 10.0.0.2 count 5 timeout 1 size 100',
+                                                   None)
+    assert DIALECTS['iosxr'].command('ping 10.0.0.2') == ('ping 10.0.0.2', None)
+
+
+def test_xr_show_commands_and_acl_adapter():
+    xr = DIALECTS['iosxr']
+    assert xr.command('show ip ospf neighbor') == ('show ospf neighbor', None)
+    command, adapt = xr.command('show ip interface | inc access list')
+    assert command == 'show ipv4 interface | include access list'
+    output = adapt("  Inbound  common access list is not set, access list is BLOCK\n")
+    assert find_acls(output) == ['Inbound  access list is BLOCK']
+
+
+def test_nxos_ping_is_rewritten_and_adapted():
+    nxos = DIALECTS['nxos']
+    command, adapt = nxos.command(IOS_PING)
+    assert command == 'ping 10.0.0.2 count 5 timeout 1 packet-size 100'
+    stats = parse_ping(adapt(NXOS_PING))
+    assert (stats['sent'], stats['received']) == (5, 4)
+    assert (stats['rtt_min'], stats['rtt_avg'], stats['rtt_max']) == (1, 3, 4)
+
+
+def test_nxos_shares_system_resources_between_cpu_and_memory():
+    sent = []
+
+    def execute(command):
+        sent.append(command)
+        return NXOS_RESOURCES
+
+    execute_nxos = DIALECTS['nxos'].executor(execute)
+    assert parse_cpu_usage(execute_nxos(CPU_COMMAND)) == 6
+    assert execute_nxos(MEMORY_COMMAND) == (
+        f"Processor  {8155452 * 1024}  {4613484 * 1024}  {3541968 * 1024}")
+    assert sent == ['show system resources']
+
+
+def test_nxos_routes_and_acls_in_ios_form():
+    nxos = DIALECTS['nxos']
+    _, adapt_routes = nxos.command('show ip route ospf')
+    table = parse_routes(adapt_routes(NXOS_ROUTES))
+    assert '10.1.1.0/24' in table and '10.2.0.0/16' in table
+    _, adapt_acls = nxos.command('show ip interface | inc access list')
+    assert find_acls(adapt_acls(NXOS_ACCESS_GROUPS)) == ['Inbound  access list is BLOCK-TELNET']
+
+
+def test_plan_fleet_groups_by_dialect():
+    devices = [_device('R1', 'ios'), _device('N1', 'nxos'), _device('R2', 'iosxe')]
+    groups = plan_fleet(devices, ['verify_cpu_memory', 'verify_ospf_neighbors'])
+    assert groups['nxos'] == {'devices': ['N1'], 'commands': ['show system resources',
+                                                             'show ip ospf neighbors']}
+    assert groups['ios']['devices'] == ['R1']
+    assert groups['iosxe']['commands'] == [CPU_COMMAND, MEMORY_COMMAND, 'show ip ospf neighbor']
@@ -0,0 +1,52 @@
+import threading
+import time
+
+from rate_limit import CommandGovernor
+
+
+def _slow(command):
+    time.sleep(0.5)
+    return command
+
+
+def test_idle_device_not_delayed_by_throttled_device():
+    # R1 is throttled to one command per second and sends four at once,
+    # R2 is idle; with two global slots R2 must not queue behind R1
+    governor = CommandGovernor({'global_concurrency': 2, 'commands_per_second': 1,
+                                'burst': 1})
+    threads = [threading.Thread(target=governor.execute, args=(_slow, 'R1', 'show clock'))
+               for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    time.sleep(0.1)
+    start = time.monotonic()
+    governor.execute(_slow, 'R2', 'show clock')
+    elapsed = time.monotonic() - start
+    for thread in threads:
+        thread.join()
+    assert elapsed < 0.8
+    metrics = governor.metrics()['devices']
+    assert metrics['R1']['commands'] == 4
+    assert metrics['R2']['max_delay'] < 0.2
+
+
+def test_global_concurrency_cap():
+    governor = CommandGovernor({'global_concurrency': 2, 'commands_per_second': 100,
+                                'burst': 100})
+    running, peak, lock = [0], [0], threading.Lock()
+
+    def execute(command):
+        with lock:
+            running[0] += 1
+            peak[0] = max(peak[0], running[0])
+        time.sleep(0.05)
+        with lock:
+            running[0] -= 1
+
+    threads = [threading.Thread(target=governor.execute, args=(execute, f"R{index}", 'show clock'))
+               for index in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert peak[0] == 2
@@ -0,0 +1,46 @@
+import socket
+import threading
+from types import SimpleNamespace
+
+from restconf import StructuredCollector
+from synthetic_outputs import interfaces
+
+
+def _broken_server():
+    """Local server answering every request with a malformed HTTP status line"""
+    server = socket.socket()
+    server.bind(('127.0.0.1', 0))
+    server.listen()
+
+    def serve():
+        while True:
+            try:
+                connection, _ = server.accept()
+            except OSError:
+                return
+            connection.recv(65536)
+            connection.sendall(b'garbage\r\n\r\n')
+            connection.close()
+
+    threading.Thread(target=serve, daemon=True).start()
+    return server
+
+
+def test_http_protocol_errors_fall_back_to_the_cli():
+    server = _broken_server()
+    device = SimpleNamespace(
+        name='R1',
+        connections={'restconf': {'ip': '127.0.0.1', 'port': server.getsockname()[1],
+                                  'protocol': 'http'}},
+        credentials={'default': {'username': 'admin', 'password': 'admin'}})
+    collector = StructuredCollector(timeout=5)
+    try:
+        assert collector.get(device, 'interfaces') is None
+        sample = collector.collect(device, 'interfaces', lambda command: interfaces(3))
+        assert sample.names == ['GigabitEthernet0/0', 'GigabitEthernet0/1',
+                                'GigabitEthernet0/2']
+        # The device stays on the CLI
+        assert not collector.supports(device)
+    finally:
+        collector.close()
+        server.close()
@@ -0,0 +1,28 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from result_cache import ResultCache, parse_config_change
+
+
+def test_lookup_reuses_unchanged_config():
+    cache = ResultCache()
+    cache.record('R1', 'verify_no_acls', '10:01:02 UTC Mon Oct 19 2026', '', True, 'No ACLs')
+    assert cache.lookup('R1', 'verify_no_acls', '10:01:02 UTC Mon Oct 19 2026') == (True, 'No ACLs')
+    assert cache.lookup('R1', 'verify_no_acls', '11:00:00 UTC Mon Oct 19 2026') is None
+    assert cache.lookup('R1', 'verify_no_acls', None) is None
+    assert (cache.hits, cache.misses) == (1, 2)
+
+
+def test_lookup_counts_from_threads():
+    cache = ResultCache()
+    cache.record('R1', 'verify_no_acls', 'changed', '', True, 'No ACLs')
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(lambda index: cache.lookup('R1', 'verify_no_acls',
+                                                 'changed' if index % 2 else 'other'),
+                      range(4000)))
+    assert (cache.hits, cache.misses) == (2000, 2000)
+
+
+def test_parse_config_change():
+    output = "! Last configuration change at 10:01:02 UTC Mon Oct 19 2026 by cisco\r\n"
+    assert parse_config_change(output) == '10:01:02 UTC Mon Oct 19 2026 by cisco'
+    assert parse_config_change('') is None
@@ -0,0 +1,33 @@
+from route_table import ip_to_int, parse_routes
+
+WRAPPED_OUTPUT = """Gateway of last resort is not set
+
+      10.0.0.0/8 is variably subnetted, 3 subnets, 2 masks
+O        10.1.1.0/24 [110/2] via 10.0.0.2, 00:12:34, GigabitEthernet0/1
+O E2     192.168.100.0/24 
+           [110/20] via 10.0.0.2, 00:01:02, GigabitEthernet0/2
+O IA     172.20.0.0/16
+           [110/3] via 10.0.0.3, 00:01:02, GigabitEthernet0/3
+C        10.2.2.0/24 is directly connected, GigabitEthernet0/0
+"""
+
+
+def test_parse_routes():
+    table = parse_routes(WRAPPED_OUTPUT)
+    assert '10.1.1.0/24' in table
+    assert '10.2.2.0/24' in table
+    assert table.routes[(ip_to_int('10.1.1.0'), 24)]['next_hop'] == '10.0.0.2'
+
+
+def test_parse_wrapped_routes():
+    table = parse_routes(WRAPPED_OUTPUT)
+    assert len(table) == 4
+    route = table.routes[(ip_to_int('192.168.100.0'), 24)]
+    assert route == {'code': 'O E2', 'next_hop': '10.0.0.2', 'distance': 110, 'metric': 20}
+    assert table.routes[(ip_to_int('172.20.0.0'), 16)]['next_hop'] == '10.0.0.3'
+
+
+def test_parse_wrapped_routes_crlf():
+    table = parse_routes(WRAPPED_OUTPUT.replace('\n', '\r\n'))
+    assert len(table) == 4
+    assert '192.168.100.0/24' in table
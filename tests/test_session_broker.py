@@ -0,0 +1,92 @@
+import os
+import stat
+import threading
+import time
+
+import pytest
+
+import session_broker
+from session_broker import BrokerClient, BrokerError, SessionBroker, _private_directory
+
+
+class _Device(object):
+    def __init__(self, name):
+        self.name = name
+        self.connected = False
+        self.answers = True
+        self.connects = 0
+
+    def is_connected(self):
+        return self.connected
+
+    def connect(self, log_stdout=True):
+        self.connected = True
+        self.answers = True
+        self.connects += 1
+
+    def disconnect(self):
+        self.connected = False
+
+    def execute(self, command):
+        if not self.answers:
+            raise EOFError('session closed by peer')
+        if command == 'slow':
+            time.sleep(1)
+        return f"{self.name}# {command}"
+
+
+class _Testbed(object):
+    def __init__(self, *names):
+        self.devices = {name: _Device(name) for name in names}
+
+
+@pytest.fixture
+def broker(tmp_path):
+    broker = SessionBroker(_Testbed('R1'), str(tmp_path / 'broker.sock'))
+    thread = threading.Thread(target=broker.serve_forever, daemon=True)
+    thread.start()
+    while not os.path.exists(broker.socket_path):
+        time.sleep(0.01)
+    yield broker
+    broker._server.shutdown()
+    thread.join()
+
+
+def test_socket_is_private(broker):
+    assert stat.S_IMODE(os.stat(broker.socket_path).st_mode) == 0o600
+
+
+def test_dead_session_is_reconnected_before_handout(broker):
+    client = BrokerClient(broker.socket_path)
+    assert client.request(op='connect', devices=['R1'])['devices']['R1'] == 'connected'
+    device = broker.testbed.devices['R1']
+    # Still connected locally, but the device no longer answers
+    device.answers = False
+    assert client.request(op='connect', devices=['R1'])['devices']['R1'] == 'connected'
+    assert device.connects == 2
+    assert client.execute('R1', 'show clock') == 'R1# show clock'
+    client.close()
+
+
+def test_client_timeout(broker):
+    client = BrokerClient(broker.socket_path, timeout=0.2)
+    with pytest.raises(BrokerError, match='No answer'):
+        client.execute('R1', 'slow')
+    # The next request gets a new connection instead of the out of step one
+    assert client.request(op='ping')['ok']
+    client.close()
+    client.close()
+
+
+def test_private_directory(tmp_path):
+    path = str(tmp_path / 'broker')
+    _private_directory(path)
+    assert stat.S_IMODE(os.stat(path).st_mode) == 0o700
+    os.chmod(path, 0o755)
+    with pytest.raises(BrokerError):
+        _private_directory(path)
+
+
+def test_default_socket_is_per_user():
+    assert session_broker.DEFAULT_SOCKET.startswith(session_broker.SOCKET_DIRECTORY + os.sep)
+    assert str(os.getuid()) in session_broker.SOCKET_DIRECTORY
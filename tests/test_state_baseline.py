@@ -0,0 +1,64 @@
+from capture import OutputCapture, load_capture
+from checks import CPU_COMMAND
+from state_baseline import diff, load_baseline, main, save_baseline, snapshot
+
+BRIEF = """Interface              IP-Address      OK? Method Status                Protocol
+GigabitEthernet0/0     10.0.0.1        YES NVRAM  up                    up
+GigabitEthernet0/1     10.0.1.1        YES NVRAM  up                    up
+"""
+
+NEIGHBORS = """Neighbor ID     Pri   State           Dead Time   Address         Interface
+2.2.2.2           1   FULL/DR         00:00:{dead}    172.16.0.2      GigabitEthernet0/0
+"""
+
+
+def _capture(path, brief=BRIEF, dead=36, cpu=12, acls=True):
+    capture = OutputCapture(path)
+    capture.output('R1', 'verify_interface_status', 'show ip interface brief', brief)
+    capture.output('R1', 'verify_ospf_neighbors', 'show ip ospf neighbor',
+                   NEIGHBORS.format(dead=dead))
+    capture.output('R1', 'verify_cpu_memory', CPU_COMMAND,
+                   f"CPU utilization for five seconds: {cpu}%/0%; one minute: 5%")
+    if acls:
+        capture.output('R1', 'verify_no_acls', 'show ip interface | inc access list',
+                       "  Inbound  access list is not set\n")
+    capture.close()
+    return load_capture(path)
+
+
+def test_snapshot_round_trip(tmp_path):
+    records = snapshot(_capture(str(tmp_path / 'run.jsonl')))
+    assert sorted(records['R1']['state']) == ['acl_bindings', 'cpu', 'interfaces',
+                                              'ospf_neighbors']
+    path = str(tmp_path / 'baseline.jsonl')
+    save_baseline(records, path)
+    assert load_baseline(path) == records
+
+
+def test_volatile_fields_are_not_drift(tmp_path):
+    baseline = snapshot(_capture(str(tmp_path / 'run1.jsonl')))
+    # Another dead timer and CPU in the same bucket
+    current = snapshot(_capture(str(tmp_path / 'run2.jsonl'), dead=31, cpu=17))
+    assert diff(baseline, current) == {'drift': {}, 'new_devices': [], 'missing_devices': []}
+
+
+def test_changed_and_missing_sections_drift(tmp_path):
+    baseline = snapshot(_capture(str(tmp_path / 'run1.jsonl')))
+    brief = BRIEF.replace('10.0.1.1        YES NVRAM  up                    up',
+                          '10.0.1.1        YES NVRAM  down                  down')
+    current = snapshot(_capture(str(tmp_path / 'run2.jsonl'), brief=brief, acls=False))
+    drift = diff(baseline, current)['drift']['R1']
+    assert drift['interfaces'] == {
+        'removed': [['GigabitEthernet0/1', '10.0.1.1', 'up', 'up']],
+        'added': [['GigabitEthernet0/1', '10.0.1.1', 'down', 'down']]}
+    assert drift['acl_bindings'] == {'missing': True}
+    assert sorted(drift) == ['acl_bindings', 'interfaces']
+
+
+def test_diff_exits_non_zero_on_drift(tmp_path):
+    _capture(str(tmp_path / 'run1.jsonl'))
+    _capture(str(tmp_path / 'run2.jsonl'), acls=False)
+    baseline = str(tmp_path / 'baseline.jsonl')
+    assert main(['snapshot', str(tmp_path / 'run1.jsonl'), '--baseline', baseline]) == 0
+    assert main(['diff', str(tmp_path / 'run1.jsonl'), '--baseline', baseline]) == 0
+    assert main(['diff', str(tmp_path / 'run2.jsonl'), '--baseline', baseline]) == 1
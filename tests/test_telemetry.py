@@ -0,0 +1,95 @@
+import json
+import socket
+import time
+from types import SimpleNamespace
+
+from restconf import yang_statistics
+from telemetry import HEADER, SENSOR_PATHS, TelemetryReceiver, TelemetryStore, encode
+
+PATHS = {kind: path for path, kind in SENSOR_PATHS.items()}
+
+
+def _message(device_name, kind, rows, timestamp):
+    return {'node_id_str': device_name, 'encoding_path': PATHS[kind],
+            'msg_timestamp': int(timestamp * 1000), 'data_json': rows}
+
+
+def _cpu(device_name, percent, timestamp):
+    return _message(device_name, 'cpu', [{'keys': {}, 'content': {
+        'five-seconds': percent, 'one-minute': 6, 'five-minutes': 6}}], timestamp)
+
+
+def test_ingest_decodes_each_sensor_path():
+    store = TelemetryStore()
+    now = time.time()
+    assert store.ingest(_cpu('R1', 12, now)) == ('R1', 'cpu', int(now * 1000) / 1000)
+    assert store.ingest(_message('R1', 'memory', [
+        {'keys': {'name': 'I/O'}, 'content': {}},
+        {'keys': {'name': 'Processor'}, 'content': {
+            'total-memory': '1000', 'used-memory': '400', 'free-memory': '600'}}], now))
+    row = {'input_rate': 8000, 'input_pps': 10, 'output_rate': 4000, 'output_pps': 5,
+           'input_packets': 100, 'output_packets': 50, 'input_errors': 1, 'crc': 1,
+           'output_errors': 0, 'input_drops': 2, 'output_drops': 3}
+    assert store.ingest(_message('R1', 'interfaces', [
+        {'keys': {'name': 'Gi0/0'}, 'content': {'statistics': yang_statistics(row)}}], now))
+
+    device = SimpleNamespace(name='R1')
+    assert store.get(device, 'cpu') == 12
+    assert store.get(device, 'memory') == {'total': 1000, 'used': 400, 'free': 600}
+    interfaces = store.get(device, 'interfaces')
+    assert interfaces.names == ['Gi0/0']
+    assert interfaces.row('Gi0/0')['input_errors'] == 1
+    assert store.devices() == ['R1']
+
+
+def test_unknown_paths_and_empty_rows_are_ignored():
+    store = TelemetryStore()
+    message = _cpu('R1', 12, time.time())
+    assert store.ingest(dict(message, encoding_path='openconfig-bgp:bgp')) is None
+    assert store.ingest(dict(message, data_json=[])) is None
+    assert store.ingest(_message('R1', 'memory', [{'keys': {'name': 'I/O'}, 'content': {}}],
+                                 time.time())) is None
+    assert store.devices() == []
+
+
+def test_stale_samples_fall_back_to_the_cli():
+    store = TelemetryStore(max_age=60)
+    device = SimpleNamespace(name='R1')
+    store.ingest(_cpu('R1', 12, time.time() - 120))
+    assert store.latest('R1', 'cpu') is None
+    assert store.get(device, 'cpu') is None
+    # A longer max_age accepts it, a missing device or kind has no sample
+    assert store.latest('R1', 'cpu', max_age=300)[1] == 12
+    assert store.latest('R2', 'cpu') is None
+    assert store.latest('R1', 'memory') is None
+    # The latest sample is the one answering
+    store.ingest(_cpu('R1', 30, time.time() - 1))
+    assert store.get(device, 'cpu') == 30
+
+
+def test_history_keeps_the_last_samples():
+    store = TelemetryStore(depth=3)
+    now = time.time()
+    for offset in range(5):
+        store.ingest(_cpu('R1', offset, now + offset))
+    assert [cpu for _, cpu in store.history('R1', 'cpu')] == [2, 3, 4]
+    assert store.history('R2', 'cpu') == []
+
+
+def test_receiver_ingests_framed_messages():
+    store = TelemetryStore()
+    receiver = TelemetryReceiver(store, '127.0.0.1', 0).start()
+    try:
+        payload = json.dumps({'garbage': True}).encode()
+        with socket.create_connection(('127.0.0.1', receiver.port)) as connection:
+            connection.sendall(encode('R1', PATHS['cpu'], [{'keys': {}, 'content': {
+                'five-seconds': 7}}]))
+            # Not a data message, counted as an error and skipped
+            connection.sendall(HEADER.pack(2, 2, 1, 0, len(payload)) + payload)
+            deadline = time.monotonic() + 5
+            while receiver.messages + receiver.errors < 2 and time.monotonic() < deadline:
+                time.sleep(0.01)
+        assert store.get(SimpleNamespace(name='R1'), 'cpu') == 7
+        assert (receiver.messages, receiver.errors) == (1, 1)
+    finally:
+        receiver.stop()